@@ -59,9 +59,397 @@
 # endorsement purposes.
 
 import sys
+import re
+import functools
+import itertools
+from collections import namedtuple
+
 import numpy as np
 from scipy import interpolate, integrate
 
+# Monotonically increasing counter shared by every curve array so that a version
+# number is never reused, even after an array is replaced.
+_version_counter = itertools.count(1)
+
+# Smallest value considered when ranging a logarithmic axis
+LOG_FLOOR = 1e-300
+
+# When True, element-wise operations applied with Curve.transform() are recorded and
+# applied together in one pass over the data when the data is next read.
+LAZY = False
+
+# Number of values each recorded operation is applied to at a time, small enough for
+# a chunk to stay in cache between operations.
+FUSE_CHUNK = 2**16
+
+# The grid binary curve math is evaluated on, one of GRID_POLICIES or a number of points,
+# see math_grid().
+GRID = 'union'
+GRID_POLICIES = ('union', 'left', 'finest', 'coarsest')
+
+CurveSummary = namedtuple('CurveSummary', ['count', 'xmin', 'xmax', 'ymin', 'ymax', 'xminpos', 'yminpos'])
+CurveSummary.__doc__ = """
+Summary statistics of a curve's data.
+
+The ``xminpos`` and ``yminpos`` fields are the smallest values that are not below
+``LOG_FLOOR`` and are used when ranging logarithmic axes. They are None when no
+such value exists.
+"""
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'entries', 'nbytes', 'budget'])
+CacheInfo.__doc__ = """
+Statistics of a ResultCache: the number of lookups found and not found in the cache, the
+number of results held, their size in bytes and the most bytes the cache will hold.
+"""
+
+
+class ResultCache(object):
+    """
+    A least recently used cache of results derived from curves, holding at most budget bytes
+    of array data. Results are looked up by a key made of the name of the operation, the
+    versions of its input curves (see Curve.version) and its parameters, so a curve that is
+    edited after a result was cached never gets the old result.
+
+    Arrays are copied into and out of the cache so results can be edited freely.
+
+    :param budget: the most bytes of array data to hold
+    :type budget: int
+    """
+
+    def __init__(self, budget=256 * 2**20):
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = dict()
+
+    def lookup(self, key, compute):
+        """
+        Return the result cached under key, or compute, cache and return it.
+
+        :param key: A hashable key naming the operation, its input curve versions and its parameters
+        :type key: tuple
+        :param compute: A function with no arguments that computes the result
+        :type compute: function
+        """
+
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._entries[key] = entry
+            self.hits += 1
+            return _copy_result(entry[0])
+
+        self.misses += 1
+        result = compute()
+        nbytes = _result_nbytes(result)
+        if nbytes <= self.budget:
+            self._entries[key] = (_copy_result(result), nbytes)
+            self.nbytes += nbytes
+            self.evict()
+        return result
+
+    def evict(self):
+        """
+        Discard the least recently used results until the cache is within its budget.
+        """
+
+        while self.nbytes > self.budget:
+            key = next(iter(self._entries))
+            self.nbytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        """
+        Discard every result and reset the hit and miss counts.
+        """
+
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        :returns: CacheInfo -- hits, misses, entries, nbytes and budget of the cache
+        """
+
+        return CacheInfo(self.hits, self.misses, len(self._entries), self.nbytes, self.budget)
+
+
+def _copy_result(result):
+    if isinstance(result, np.ndarray):
+        return np.array(result)
+    if isinstance(result, (tuple, list)):
+        return type(result)(_copy_result(r) for r in result)
+    return result
+
+
+def _result_nbytes(result):
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (tuple, list)):
+        return sum(_result_nbytes(r) for r in result)
+    return 0
+
+
+# The cache of derived results shared by every curve
+result_cache = ResultCache()
+
+
+class CurveArray(np.ndarray):
+    """
+    A float ndarray that records in place writes so that data derived from a curve
+    can be cached and invalidated automatically.
+
+    Views share the version of the array they were taken from. Element assignment,
+    in place ufuncs (``c.y *= 2``, ``np.sin(c.y, out=c.y)``), ``sort``, ``fill`` and
+    ``put`` all bump the version.
+    """
+
+    _root = None
+    _version = 0
+
+    def __array_finalize__(self, obj):
+        # Only views share data, new arrays made from a CurveArray (copies, empty_like) do not
+        if isinstance(obj, CurveArray) and self.base is not None and np.shares_memory(self, obj):
+            self._root = obj._root if obj._root is not None else obj
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        args = tuple(np.asarray(i) if isinstance(i, CurveArray) else i for i in inputs)
+        out = kwargs.get('out')
+        if out is not None:
+            kwargs['out'] = tuple(np.asarray(o) if isinstance(o, CurveArray) else o for o in out)
+
+        result = getattr(ufunc, method)(*args, **kwargs)
+
+        if method == 'at' and isinstance(inputs[0], CurveArray):
+            inputs[0].touch()
+
+        if out is None:
+            return result
+
+        for o in out:
+            if isinstance(o, CurveArray):
+                o.touch()
+
+        if isinstance(result, tuple):
+            return tuple(o if isinstance(o, CurveArray) else r for r, o in zip(result, out))
+        return out[0] if isinstance(out[0], CurveArray) else result
+
+    def __setitem__(self, key, value):
+        super(CurveArray, self).__setitem__(key, value)
+        self.touch()
+
+    def sort(self, *args, **kwargs):
+        super(CurveArray, self).sort(*args, **kwargs)
+        self.touch()
+
+    def fill(self, value):
+        super(CurveArray, self).fill(value)
+        self.touch()
+
+    def put(self, *args, **kwargs):
+        super(CurveArray, self).put(*args, **kwargs)
+        self.touch()
+
+    @property
+    def version(self):
+        """
+        The data version of this array, shared with every view of the same data
+        """
+
+        root = self._root if self._root is not None else self
+        return root._version
+
+    def touch(self):
+        """
+        Record that the data of this array has changed
+        """
+
+        root = self._root if self._root is not None else self
+        root._version = next(_version_counter)
+
+
+def as_curve_array(values):
+    """
+    Convert the given values into a CurveArray. Arrays that are already CurveArrays
+    are returned as is so in place edits stay visible to every curve sharing them.
+
+    :param values: the x- or y-values of a curve
+    :type values: array-like
+    :returns: CurveArray -- the values as a float CurveArray, or None if values is None
+    """
+
+    if values is None:
+        return None
+
+    if isinstance(values, CurveArray) and values._root is None and values.dtype == float:
+        return values
+
+    arr = np.asarray(values, dtype=float).view(CurveArray)
+    arr.touch()
+    return arr
+
+
+class RangeIndex(object):
+    """
+    Answers minimum and maximum queries over any index range of an array without
+    scanning the range.
+
+    The array is split into blocks whose extrema are stored in sparse tables, so a
+    query reads at most two partial blocks and two table entries. Queries follow
+    numpy: NaN propagates, and argmin/argmax return the first matching index.
+
+    :param values: the values to index
+    :type values: array-like
+    :param block_size: the number of values summarized by each block
+    :type block_size: int
+    """
+
+    def __init__(self, values, block_size=256):
+        self.values = np.asarray(values, dtype=float)
+        self.block_size = block_size
+
+        isnan = np.isnan(self.values)
+        self._nan_count = np.concatenate(([0], np.cumsum(isnan)))
+        self._nan_positions = np.flatnonzero(isnan)
+
+        n = len(self.values)
+        nblocks = -(-n // block_size)
+        starts = np.arange(nblocks) * block_size
+        self._tables = dict()
+        for name, fill, arg in (('max', -np.inf, np.argmax), ('min', np.inf, np.argmin)):
+            padded = np.full(nblocks * block_size, fill)
+            padded[:n] = np.where(isnan, fill, self.values)
+            level = arg(padded.reshape(nblocks, block_size), axis=1) + starts
+            filled = padded[:n]
+            table = [level]
+            width = 1
+            while 2 * width <= nblocks:
+                left = level[:-width]
+                right = level[width:]
+                if name == 'max':
+                    level = np.where(filled[left] >= filled[right], left, right)
+                else:
+                    level = np.where(filled[left] <= filled[right], left, right)
+                table.append(level)
+                width *= 2
+            self._tables[name] = (filled, table)
+
+    def __len__(self):
+        return len(self.values)
+
+    def block_extrema(self):
+        """
+        Get the minimum and maximum of every block, ignoring NaN.
+
+        :returns: tuple -- arrays of the block minimums and block maximums
+        """
+
+        fmin, tmin = self._tables['min']
+        fmax, tmax = self._tables['max']
+        return fmin[tmin[0]], fmax[tmax[0]]
+
+    def argmax(self, lo=0, hi=None):
+        """
+        Get the index of the first maximum in values[lo:hi].
+
+        :param lo: the first index of the range
+        :type lo: int
+        :param hi: one past the last index of the range, defaults to the end of the array
+        :type hi: int, optional
+        :returns: int -- the index into the full array
+        """
+
+        return self.__query('max', lo, hi)
+
+    def argmin(self, lo=0, hi=None):
+        """
+        Get the index of the first minimum in values[lo:hi].
+
+        :param lo: the first index of the range
+        :type lo: int
+        :param hi: one past the last index of the range, defaults to the end of the array
+        :type hi: int, optional
+        :returns: int -- the index into the full array
+        """
+
+        return self.__query('min', lo, hi)
+
+    def max(self, lo=0, hi=None):
+        """
+        Get the maximum of values[lo:hi].
+
+        :returns: float -- the maximum, NaN if the range contains NaN
+        """
+
+        return self.values[self.argmax(lo, hi)]
+
+    def min(self, lo=0, hi=None):
+        """
+        Get the minimum of values[lo:hi].
+
+        :returns: float -- the minimum, NaN if the range contains NaN
+        """
+
+        return self.values[self.argmin(lo, hi)]
+
+    def where_equal(self, value, lo=0, hi=None):
+        """
+        Get the indices in [lo, hi) where the values equal value. Only blocks whose
+        extrema bracket value are searched.
+
+        :param value: the value to find
+        :type value: float
+        :returns: numpy.ndarray -- the indices into the full array, in increasing order
+        """
+
+        lo, hi = self.__bounds(lo, hi)
+        if lo >= hi:
+            return np.empty(0, dtype=int)
+
+        bs = self.block_size
+        bmin, bmax = self.block_extrema()
+        first = lo // bs
+        last = (hi - 1) // bs + 1
+        blocks = np.flatnonzero((bmin[first:last] <= value) & (bmax[first:last] >= value)) + first
+        found = [np.flatnonzero(self.values[max(b * bs, lo):min((b + 1) * bs, hi)] == value) + max(b * bs, lo)
+                 for b in blocks]
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def __bounds(self, lo, hi):
+        n = len(self.values)
+        hi = n if hi is None else min(hi, n)
+        return max(lo, 0), hi
+
+    def __query(self, name, lo, hi):
+        lo, hi = self.__bounds(lo, hi)
+        if lo >= hi:
+            raise ValueError('attempt to get arg%s of an empty range' % name)
+
+        if self._nan_count[hi] > self._nan_count[lo]:
+            return int(self._nan_positions[np.searchsorted(self._nan_positions, lo)])
+
+        filled, table = self._tables[name]
+        arg = np.argmax if name == 'max' else np.argmin
+        bs = self.block_size
+        first = -(-lo // bs)
+        last = hi // bs
+
+        candidates = list()
+        if first >= last:
+            return lo + int(arg(filled[lo:hi]))
+        if lo < first * bs:
+            candidates.append(lo + int(arg(filled[lo:first * bs])))
+        level = int(np.log2(last - first))
+        candidates.append(int(table[level][first]))
+        candidates.append(int(table[level][last - (1 << level)]))
+        if last * bs < hi:
+            candidates.append(last * bs + int(arg(filled[last * bs:hi])))
+
+        values = filled[candidates]
+        return candidates[int(arg(values))]
+
 
 class Curve(object):
 
@@ -138,6 +526,216 @@ class Curve(object):
         # Other attributes
         self._original_name = name
 
+    # Element-wise operations recorded in lazy mode and not yet applied
+    _pending_x = ()
+    _pending_y = ()
+
+    def __getstate__(self):
+        # Apply any recorded operations rather than pickling them
+        self.x
+        self.y
+        state = self.__dict__.copy()
+        state.pop('_cache', None)
+        state.pop('_version', None)
+        return state
+
+    @property
+    def x(self):
+        if self._pending_x:
+            self.__fuse('x')
+        return self._x
+
+    @x.setter
+    def x(self, values):
+        self._x = as_curve_array(values)
+        self._pending_x = ()
+
+    @property
+    def y(self):
+        if self._pending_y:
+            self.__fuse('y')
+        return self._y
+
+    @y.setter
+    def y(self, values):
+        self._y = as_curve_array(values)
+        self._pending_y = ()
+
+    def transform(self, axis, ufunc, *args, position=0, inplace=False):
+        """
+        Apply an element-wise function to the x- or y-values, i.e. ``values = ufunc(values, *args)``.
+
+        In lazy mode (see LAZY) the operation is only recorded. All the operations recorded for
+        the values are applied together when the values are next read, a chunk at a time, into
+        one new array, so no intermediate arrays are made.
+
+        :param axis: 'x' or 'y'
+        :type axis: str
+        :param ufunc: The function to apply, e.g. `numpy.log` or `scipy.special.j0`
+        :type ufunc: numpy.ufunc
+        :param args: The other inputs of the function
+        :param position: The position of the values among the inputs, e.g. 1 for ``numpy.power(a, values)``
+        :type position: int, optional
+        :param inplace: Write the result into the current values rather than a new array when not lazy
+        :type inplace: bool, optional
+        """
+
+        if LAZY:
+            pending = '_pending_' + axis
+            setattr(self, pending, getattr(self, pending) + ((ufunc, args, position),))
+            return
+
+        values = getattr(self, axis)
+        inputs = args[:position] + (values,) + args[position:]
+        if inplace:
+            ufunc(*inputs, out=values)
+        else:
+            setattr(self, axis, ufunc(*inputs))
+
+    def owns(self, axis, others=()):
+        """
+        Whether the x- or y-values can be overwritten in place. They must be a whole array that owns
+        its memory rather than a view, and share no memory with the curve's other values or with the
+        values of the other curves given. Values with pending lazy operations are never owned since
+        applying the operations makes a new array anyway.
+
+        :param axis: 'x' or 'y'
+        :type axis: str
+        :param others: The other curves that could share the values, e.g. every curve in a session
+        :type others: list
+        :return: bool -- True if the values can be written in place
+        """
+
+        if getattr(self, '_pending_' + axis):
+            return False
+
+        values = getattr(self, '_' + axis)
+        owner = values if values.base is None else values.base
+        if values._root is not None or not owner.flags.owndata or not owner.flags.writeable:
+            return False
+
+        arrays = [self._y if axis == 'x' else self._x]
+        for c in others:
+            if c is not self:
+                arrays.extend((c._x, c._y))
+
+        return not any(np.may_share_memory(values, a) for a in arrays if a is not None)
+
+    def __fuse(self, axis):
+        pending = getattr(self, '_pending_' + axis)
+        values = np.asarray(getattr(self, '_' + axis))
+        out = np.empty(values.shape, dtype=float)
+        for start in range(0, len(values), FUSE_CHUNK):
+            data = values[start:start + FUSE_CHUNK]
+            chunk = out[start:start + FUSE_CHUNK]
+            for ufunc, args, position in pending:
+                ufunc(*(args[:position] + (data,) + args[position:]), out=chunk)
+                data = chunk
+        setattr(self, axis, out)
+
+    @property
+    def version(self):
+        """
+        The data version of the curve. It increases whenever the x- or y-values are reassigned
+        or edited in place, and comes from a counter shared by every curve, so two curves or
+        two states of one curve never have the same version.
+        """
+
+        x = self.x
+        y = self.y
+        state = self.__dict__.get('_version')
+        if state is None or state[0] is not x or state[1] is not y or state[2] != (x.version, y.version):
+            state = (x, y, (x.version, y.version), next(_version_counter))
+            self._version = state
+        return state[3]
+
+    def cached(self, key, compute, maxsize=32):
+        """
+        Return the result of compute() for the curve's data. Results are cached under key
+        until the x- or y-values are reassigned or edited in place.
+
+        :param key: A hashable key naming the result and any parameters it depends on
+        :type key: tuple
+        :param compute: A function with no arguments that computes the result
+        :type compute: function
+        :param maxsize: The number of results to keep, the oldest are discarded first
+        :type maxsize: int
+        """
+
+        version = self.version
+        cache = self.__dict__.get('_cache')
+        if cache is None or cache[0] != version:
+            cache = (version, dict())
+            self._cache = cache
+
+        results = cache[1]
+        if key not in results:
+            if len(results) >= maxsize:
+                results.pop(next(iter(results)))
+            results[key] = compute()
+        return results[key]
+
+    def summary(self):
+        """
+        Return the summary statistics of the curve's data. The statistics are computed
+        once and cached until the x- or y-values are reassigned or edited in place.
+
+        :returns: CurveSummary -- count, xmin, xmax, ymin, ymax, xminpos and yminpos of the curve
+        """
+
+        return self.cached(('summary',), self.__summarize)
+
+    def range_index(self):
+        """
+        Return a RangeIndex over the curve's y-values for minimum and maximum queries
+        on any range of points. The index is built on first use and rebuilt after the
+        x- or y-values are reassigned or edited in place.
+
+        :returns: RangeIndex -- the index of the y-values
+        """
+
+        return self.cached(('range_index',), lambda: RangeIndex(self.y))
+
+    def window(self, xmin=None, xmax=None):
+        """
+        Return the range of points with xmin <= x <= xmax, for a curve whose
+        x-values are in increasing order.
+
+        :param xmin: the minimum x-value, defaults to the start of the curve
+        :type xmin: float, optional
+        :param xmax: the maximum x-value, defaults to the end of the curve
+        :type xmax: float, optional
+        :returns: tuple -- the first index and one past the last index of the points
+        """
+
+        x = self.x
+        lo = 0 if xmin is None else int(np.searchsorted(x, xmin, side='left'))
+        hi = len(x) if xmax is None else int(np.searchsorted(x, xmax, side='right'))
+        return lo, max(lo, hi)
+
+    def increasing(self):
+        """
+        Return True if the curve's x-values are strictly increasing. The check is
+        cached until the x- or y-values are reassigned or edited in place.
+
+        :returns: bool -- True if the x-values are strictly increasing
+        """
+
+        return self.cached(('increasing',), lambda: bool(np.all(self.x[1:] > self.x[:-1])))
+
+    def __summarize(self):
+        x = self._x
+        y = self._y
+        if len(x) and len(y):
+            xpos = x[x >= LOG_FLOOR]
+            ypos = y[y >= LOG_FLOOR]
+            return CurveSummary(count=len(x),
+                                xmin=np.min(x), xmax=np.max(x),
+                                ymin=np.min(y), ymax=np.max(y),
+                                xminpos=np.min(xpos) if len(xpos) else None,
+                                yminpos=np.min(ypos) if len(ypos) else None)
+        return CurveSummary(len(x), None, None, None, None, None, None)
+
     def __add__(a, b):
         c = Curve()
         c.drawstyle = a.drawstyle
@@ -243,13 +841,16 @@ class Curve(object):
         c.y = np.array(-a.y)
         return c
 
-    def copy(self):
+    def copy(self, data=True):
         """
         Return a new copy of the curve object
+
+        :param data: If False, only copy the curve's attributes and leave the x- and y-values empty
+        :type data: bool, optional
         """
 
-        c = Curve(x=np.array(self.x, dtype=float),
-                  y=np.array(self.y, dtype=float),
+        c = Curve(x=self.x if data else np.empty(0),
+                  y=self.y if data else np.empty(0),
                   name=self.name,
                   filename=self.filename,
                   xlabel=self.xlabel,
@@ -300,10 +901,113 @@ class Curve(object):
         return c
 
 
+def is_sorted(x):
+    """
+    Check whether the values are in non-decreasing order.
+
+    :param x: the values to check
+    :type x: numpy.ndarray
+    :returns: bool -- True if the values are sorted
+    """
+
+    x = np.asarray(x)
+    return bool(np.all(x[1:] >= x[:-1]))
+
+
+def union_grid(ax, bx):
+    """
+    Gets the sorted union of two sets of x-values, with duplicates removed.
+
+    When both inputs are already sorted they are merged in linear time, otherwise they are sorted first.
+
+    :param ax: x-values of Curve A
+    :type ax: numpy.ndarray
+    :param bx: x-values of Curve B
+    :type bx: numpy.ndarray
+    :returns: numpy.ndarray -- the sorted union of ax and bx
+    """
+
+    ax = np.asarray(ax, dtype=float)
+    bx = np.asarray(bx, dtype=float)
+
+    if not (is_sorted(ax) and is_sorted(bx)):
+        return np.unique(np.concatenate((ax, bx)))
+
+    ux = np.insert(ax, np.searchsorted(ax, bx, side='right'), bx)
+    if len(ux) > 1:
+        ux = ux[np.concatenate(([True], ux[1:] != ux[:-1]))]
+
+    return ux
+
+
+def check_grid_policy(policy):
+    """
+    Check that policy is a grid policy for binary curve math, see math_grid().
+
+    :param policy: 'union', 'left', 'finest', 'coarsest' or a number of points
+    :type policy: str or int
+    :returns: str or int -- the policy
+    """
+
+    if isinstance(policy, (int, np.integer)) and not isinstance(policy, bool):
+        if policy < 2:
+            raise ValueError("a uniform grid needs at least 2 points")
+        return int(policy)
+    if policy not in GRID_POLICIES:
+        raise ValueError("{} is not a supported grid policy".format(policy))
+    return policy
+
+
+def math_grid(ax, bx, policy=None):
+    """
+    Gets the x-values that binary math on two curves is evaluated on. The union of both sets of
+    x-values keeps every point but grows with every operation in a chained expression, the other
+    policies keep the size of the result bounded.
+
+    :param ax: x-values of Curve A, the left operand
+    :type ax: numpy.ndarray
+    :param bx: x-values of Curve B, the right operand
+    :type bx: numpy.ndarray
+    :param policy: 'union' for the union of ax and bx, 'left' for ax, 'finest' or 'coarsest' for the one
+                   with the smaller or larger average spacing, or a number of points for a uniform grid
+                   over the overlap of both, or over both if they do not overlap. Defaults to GRID.
+    :type policy: str or int, optional
+    :returns: numpy.ndarray -- the sorted grid, with duplicates removed
+    """
+
+    policy = check_grid_policy(GRID if policy is None else policy)
+    ax = np.asarray(ax, dtype=float)
+    bx = np.asarray(bx, dtype=float)
+
+    if policy == 'union':
+        return union_grid(ax, bx)
+
+    if not isinstance(policy, str):
+        lo = max(np.min(ax), np.min(bx))
+        hi = min(np.max(ax), np.max(bx))
+        if lo > hi:
+            lo = min(np.min(ax), np.min(bx))
+            hi = max(np.max(ax), np.max(bx))
+        return np.linspace(lo, hi, policy)
+
+    grid = ax
+    if policy != 'left':
+        spacing_a = (np.max(ax) - np.min(ax)) / (len(ax) - 1) if len(ax) > 1 else np.inf
+        spacing_b = (np.max(bx) - np.min(bx)) / (len(bx) - 1) if len(bx) > 1 else np.inf
+        if (spacing_b < spacing_a) if policy == 'finest' else (spacing_b > spacing_a):
+            grid = bx
+
+    if not is_sorted(grid):
+        return np.unique(grid)
+    if len(grid) > 1:
+        return grid[np.concatenate(([True], grid[1:] != grid[:-1]))]
+    return grid.copy()
+
+
 def getinterp(a, b,
               a_left=None, a_right=None, a_period=None,
               b_left=None, b_right=None, b_period=None,
-              samples=100, match='domain'):
+              samples=100, match='domain', grid=None):
     """
     Gets the interpolated and domain matched versions of the two curves.
 
@@ -325,41 +1029,44 @@ def getinterp(a, b,
     :type: b_period: float, optional
     :param match {'domain','step'},optional: A string indicating how to interpolate the two curves
     :type match: str
+    :param grid: The grid policy of the 'domain' match, see math_grid(). Defaults to GRID.
+    :type grid: str or int, optional
     :returns: curve pair -- the interpolated and domain matched versions of a and b
     """
+    grid = check_grid_policy(GRID if grid is None else grid)
     if match == 'domain':
-        ux = list(set(a.x).union(set(b.x)))  # get union of xvals
-        ux.sort()
-
-        ia = a.copy()
-        ia.x = np.array(ux)
-        ia.y = np.interp(ux, a.x, a.y, a_left, a_right, a_period)  # interpolate y vals
+        def compute():
+            ux = math_grid(a.x, b.x, grid)  # get the shared xvals
+            return (ux, np.interp(ux, a.x, a.y, a_left, a_right, a_period),  # interpolate y vals
+                    ux.copy(), np.interp(ux, b.x, b.y, b_left, b_right, b_period))
+    elif match == 'step':
+        def compute():
+            ax, step = np.linspace(min(a.x), max(a.x), num=samples, retstep=True)
 
-        ib = Curve()
-        ib.x = np.array(ux)
-        ib.y = np.interp(ux, b.x, b.y, b_left, b_right, b_period)  # interpolate y vals
+            bxsamples = int((max(b.x) - min(b.x)) / step)
+            if bxsamples < 1:
+                bxsamples = 1
 
-        return ia, ib
-    elif match == 'step':
-        ax, step = np.linspace(min(a.x), max(a.x), num=samples, retstep=True)
+            bx = np.linspace(min(b.x), max(b.x), bxsamples)
 
-        bxsamples = int((max(b.x) - min(b.x)) / step)
-        if bxsamples < 1:
-            bxsamples = 1
+            return (ax, np.interp(ax, a.x, a.y, a_left, a_right, a_period),  # interpolate y vals
+                    bx, np.interp(bx, b.x, b.y, b_left, b_right, b_period))
+    else:
+        raise ValueError("{} is not a supported option for match".format(match))
 
-        bx = np.linspace(min(b.x), max(b.x), bxsamples)
+    key = ('getinterp', a.version, b.version, a_left, a_right, a_period, b_left, b_right, b_period, samples, match,
+           grid)
+    ax, ay, bx, by = result_cache.lookup(key, compute)
 
-        ia = a.copy()
-        ia.x = ax
-        ia.y = np.interp(ax, a.x, a.y, a_left, a_right, a_period)  # interpolate y vals
+    ia = a.copy(data=False)
+    ia.x = ax
+    ia.y = ay
 
-        ib = Curve()
-        ib.x = bx
-        ib.y = np.interp(bx, b.x, b.y, b_left, b_right, b_period)  # interpolate y vals
+    ib = Curve()
+    ib.x = bx
+    ib.y = by
 
-        return ia, ib
-    else:
-        raise ValueError("{} is not a supported option for match".format(match))
+    return ia, ib
 
 
 def interp1d(a, num=100, retstep=False):
@@ -376,60 +1083,520 @@ def interp1d(a, num=100, retstep=False):
               step: float, optional -- only returned if retstep is True. Size of the spacing between samples
     """
     num = int(num)
-    f = interpolate.interp1d(a.x, a.y, kind='linear', bounds_error=False, fill_value=0)
 
-    ia = a.copy()
+    ia = a.copy(data=False)
 
     if retstep:
-        ia.x, step = np.linspace(min(a.x), max(a.x), num=num, retstep=True)
-        ia.y = f(ia.x)
+        ia.x, step = np.linspace(np.min(a.x), np.max(a.x), num=num, retstep=True)
+        ia.y = resample_values(a.x, a.y, ia.x)
         return ia, step
     else:
-        ia.x = np.linspace(min(a.x), max(a.x), num=num, retstep=False)
-        ia.y = f(ia.x)
+        ia.x = np.linspace(np.min(a.x), np.max(a.x), num=num, retstep=False)
+        ia.y = resample_values(a.x, a.y, ia.x)
         return ia
 
 
-def append(a, b):
+RESAMPLE_METHODS = ('linear', 'pchip', 'cubic', 'nearest', 'previous')
+
+
+def resample_values(x, ys, grid, method='linear'):
+    """
+    Interpolates one or more sets of y-values that share the x-values x onto a grid. The
+    bracketing points of the grid are found once and used for every set of y-values.
+    Grid points outside the x-values are held at the end values, as `numpy.interp()` does.
+
+    :param x: the x-values
+    :type x: numpy.ndarray
+    :param ys: the y-values, either one set or one row per set
+    :type ys: numpy.ndarray
+    :param grid: the x-values to interpolate to
+    :type grid: numpy.ndarray
+    :param method: one of 'linear', 'pchip', 'cubic', 'nearest' or 'previous'
+    :type method: str
+    :returns: numpy.ndarray -- the interpolated values, with one row per set when ys has rows
+    """
+
+    if method not in RESAMPLE_METHODS:
+        raise ValueError("{} is not a supported option for method".format(method))
+
+    x = np.asarray(x, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    grid = np.asarray(grid, dtype=float)
+    n = len(x)
+    if n == 0:
+        raise ValueError('cannot resample values with no points')
+
+    if not is_sorted(x):
+        order = np.argsort(x, kind='stable')
+        x = x[order]
+        ys = ys[..., order]
+
+    if n == 1:
+        return np.repeat(ys[..., :1], len(grid), axis=-1)
+
+    clipped = np.clip(grid, x[0], x[-1])
+    if method in ('pchip', 'cubic'):
+        spline = interpolate.PchipInterpolator if method == 'pchip' else interpolate.CubicSpline
+        return spline(x, ys, axis=-1)(clipped)
+
+    i = np.clip(np.searchsorted(x, clipped, side='right') - 1, 0, n - 2)
+    if method == 'previous':
+        return ys[..., np.where(clipped >= x[i + 1], i + 1, i)]
+    if method == 'nearest':
+        return ys[..., np.where(clipped > (x[i] + x[i + 1]) / 2, i + 1, i)]
+
+    lo = ys[..., i]
+    hi = ys[..., i + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = (hi - lo) / (x[i + 1] - x[i]) * (clipped - x[i]) + lo
+    values = np.where(clipped == x[i + 1], hi, values)
+    return np.where(clipped == x[i], lo, values)
+
+
+def append(a, b, *curves):
     """
     Merge curve a and curve b over the union of their domains. Where domains overlap, take
     the average of the curve's y-values.
 
+    Any additional curves are merged in the same pass and give the same result as appending
+    them one at a time, i.e. ``append(append(a, b), c)``.
+
     :param a: Curve A
     :type a: curve
     :param b: Curve B
     :type b: curve
+    :param curves: additional curves to merge
+    :type curves: curve, optional
     :return: a new curve resulting from the merging of curve a and curve b
     """
-    ux = list(set(a.x).union(set(b.x)))  # get union of xvals
-    ux.sort()
+    curves = (a, b) + curves
+    xs = [np.asarray(c.x, dtype=float) for c in curves]
+    ys = [np.asarray(c.y, dtype=float) for c in curves]
+
+    ux, gid = np.unique(np.concatenate(xs), return_inverse=True)  # group the points by x-value
+    gid = gid.ravel()
+    bounds = np.cumsum([0] + [len(x) for x in xs])
+
+    # a and b are averaged together, including any repeated x-values within each curve
+    ab = slice(0, bounds[2])
+    tot = np.bincount(gid[ab], minlength=len(ux))
+    sum = np.bincount(gid[ab], weights=np.concatenate(ys[:2]), minlength=len(ux))
+    has_y = tot != 0
+    y = np.zeros(len(ux))
+    y[has_y] = sum[has_y] / tot[has_y]
+
+    # every other curve is averaged with the merged value
+    for i in range(2, len(curves)):
+        merged = np.flatnonzero(has_y)
+        idx = np.concatenate((merged, gid[bounds[i]:bounds[i + 1]]))
+        tot = np.bincount(idx, minlength=len(ux))
+        sum = np.bincount(idx, weights=np.concatenate((y[merged], ys[i])), minlength=len(ux))
+
+        has_c = np.zeros(len(ux), dtype=bool)
+        has_c[gid[bounds[i]:bounds[i + 1]]] = True
+        y[has_c] = sum[has_c] / tot[has_c]
+        has_y |= has_c
 
     aub = Curve()
-    aub.x = np.array(ux)
-    aub.y = np.zeros(len(aub.x))
+    aub.x = ux
+    aub.y = y
+
+    return aub
 
-    for i in range(len(aub.x)):
-        xval = aub.x[i]
 
-        aidx = np.where(a.x == xval)[0]
-        bidx = np.where(b.x == xval)[0]
+_EXPRESSION_TOKENS = re.compile(r'\s*(?:(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+                                r'|(?P<op>\*\*|[-+*/()])'
+                                r'|(?P<name>@\d+|[A-Za-z_][\w.]*))')
 
-        has_a = len(aidx) != 0
-        has_b = len(bidx) != 0
 
-        sum = float(0)
-        tot = 0
+def _divide(a, b, out=None):
+    """
+    Divide like Curve.__truediv__, setting the result to `sys.maxsize` where b is zero.
+    """
 
-        if has_a:
-            for idx in aidx:
-                sum += float(a.y[idx])
-                tot += 1
+    zero = b == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.divide(a, b, out=out)
+    out[zero] = float(sys.maxsize)
+    return out
 
-        if has_b:
-            for idx in bidx:
-                sum += float(b.y[idx])
-                tot += 1
 
-        aub.y[i] = sum / float(tot)
+_BINARY_OPERATORS = {'+': np.add,
+                     '-': np.subtract,
+                     '*': np.multiply,
+                     '/': _divide}
 
-    return aub
+_ARRAY_OPERATORS = dict(_BINARY_OPERATORS, **{'/': np.divide})
+
+
+class _Term(object):
+    """
+    An operand of a curve expression: a curve, a function result, or a negated or
+    exponentiated curve, which keep their own x-values like the Curve operators do.
+    """
+
+    __slots__ = ('x', 'y', 'left', 'right', 'period', 'plotname', 'drawstyle', 'curve')
+
+    def __init__(self, x, y, left, right, period, plotname, drawstyle, curve=None):
+        self.x = x
+        self.y = y
+        self.left = left
+        self.right = right
+        self.period = period
+        self.plotname = plotname
+        self.drawstyle = drawstyle
+        self.curve = curve
+
+    @classmethod
+    def from_curve(cls, c):
+        return cls(c.x, c.y, c.math_interp_left, c.math_interp_right, c.math_interp_period,
+                   c.plotname, c.drawstyle, c)
+
+
+class CurveExpression(object):
+    """
+    A compiled curve math expression such as ``a + b * (c - d)``.
+
+    The expression is parsed once into a tree of operators. Evaluating it interpolates the curves
+    onto one common grid, the union of all of their x-values, and applies the operators as whole
+    array NumPy operations without creating a Curve for every intermediate result. The result is
+    the same as evaluating the expression with the Curve operators, including the zero
+    extrapolation of intermediate sums, differences, products and quotients. With any other grid
+    policy (see math_grid()) each operator is evaluated on the grid of its two operands instead.
+
+    Operands are single letters or ``@N`` curve labels, any other name followed by parentheses is a
+    function applied to a curve, and numbers may only be used as exponents, e.g. ``a**2``.
+
+    :param text: the expression
+    :type text: str
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = [(kind, value) for kind, value in self._tokenize(text)]
+        self._pos = 0
+        self.tree = self._parse_sum()
+        if self._pos != len(self._tokens):
+            raise ValueError("unexpected '{}' in expression: {}".format(self._tokens[self._pos][1], text))
+        if self.tree[0] == 'number':
+            raise ValueError("expression has no curves: {}".format(text))
+        del self._tokens, self._pos
+
+        self.operands = []
+        self._collect_operands(self.tree)
+        self.operands = tuple(self.operands)
+
+    @staticmethod
+    def _tokenize(text):
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _EXPRESSION_TOKENS.match(text, pos)
+            if match is None:
+                raise ValueError("invalid expression: {}".format(text))
+            pos = match.end()
+            kind = match.lastgroup
+            yield kind, match.group(kind)
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None, None
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise ValueError("unexpected end of expression: {}".format(self.text))
+        self._pos += 1
+        return token
+
+    def _binary(self, op, left, right):
+        if left[0] == 'number' or right[0] == 'number':
+            raise ValueError("numbers can only be used as exponents: {}".format(self.text))
+        return (op, left, right)
+
+    def _parse_sum(self):
+        node = self._parse_product()
+        while self._peek()[1] in ('+', '-'):
+            op = self._next()[1]
+            node = self._binary(op, node, self._parse_product())
+        return node
+
+    def _parse_product(self):
+        node = self._parse_unary()
+        while self._peek()[1] in ('*', '/'):
+            op = self._next()[1]
+            node = self._binary(op, node, self._parse_unary())
+        return node
+
+    def _parse_unary(self):
+        if self._peek()[1] == '-':
+            self._next()
+            node = self._parse_unary()
+            if node[0] == 'number':
+                return ('number', -node[1])
+            return ('neg', node)
+        return self._parse_power()
+
+    def _parse_power(self):
+        node = self._parse_atom()
+        if self._peek()[1] == '**':
+            self._next()
+            exponent = self._parse_unary()
+            if exponent[0] != 'number':
+                raise ValueError("exponents must be numbers: {}".format(self.text))
+            if node[0] == 'number':
+                return ('number', node[1] ** exponent[1])
+            return ('pow', node, exponent[1])
+        return node
+
+    def _parse_atom(self):
+        kind, value = self._next()
+        if kind == 'number':
+            return ('number', int(value) if value.isdigit() else float(value))
+        if value == '(':
+            node = self._parse_sum()
+            self._expect(')')
+            return node
+        if kind == 'name':
+            if self._peek()[1] == '(':
+                self._next()
+                node = self._parse_sum()
+                self._expect(')')
+                if node[0] == 'number':
+                    raise ValueError("functions must be applied to curves: {}".format(self.text))
+                return ('call', value, node)
+            if len(value) == 1 or value[0] == '@':
+                return ('curve', value)
+            raise ValueError("unknown name '{}' in expression: {}".format(value, self.text))
+        raise ValueError("unexpected '{}' in expression: {}".format(value, self.text))
+
+    def _expect(self, value):
+        if self._next()[1] != value:
+            raise ValueError("expected '{}' in expression: {}".format(value, self.text))
+
+    def _collect_operands(self, node):
+        if node[0] == 'curve':
+            if node[1] not in self.operands:
+                self.operands.append(node[1])
+        elif node[0] in ('neg', 'pow', 'call'):
+            self._collect_operands(node[-1] if node[0] == 'call' else node[1])
+        elif node[0] in _BINARY_OPERATORS:
+            self._collect_operands(node[1])
+            self._collect_operands(node[2])
+
+    def evaluate(self, operands, functions=None, grid=None):
+        """
+        Evaluate the expression.
+
+        :param operands: returns the curve for an operand name
+        :type operands: callable or dict
+        :param functions: returns the function for a function name. The function is called with a curve
+                          and must return a curve.
+        :type functions: callable or dict, optional
+        :param grid: The grid policy of the binary operators, see math_grid(). Defaults to GRID.
+        :type grid: str or int, optional
+        :returns: curve -- the result of the expression
+        """
+
+        if not callable(operands):
+            operands = operands.__getitem__
+        if functions is not None and not callable(functions):
+            functions = functions.__getitem__
+
+        return self._evaluate(self.tree, operands, functions, check_grid_policy(GRID if grid is None else grid))
+
+    def evaluate_arrays(self, operands):
+        """
+        Evaluate the expression element wise on arrays that are already on the same grid.
+
+        :param operands: returns the y-values for an operand name
+        :type operands: callable or dict
+        :returns: numpy.ndarray -- the result of the expression
+        """
+
+        if not callable(operands):
+            operands = operands.__getitem__
+
+        def walk(node):
+            kind = node[0]
+            if kind == 'curve':
+                return np.asarray(operands(node[1]), dtype=float)
+            if kind == 'neg':
+                return np.negative(walk(node[1]))
+            if kind == 'pow':
+                return np.power(walk(node[1]), node[2])
+            if kind in _ARRAY_OPERATORS:
+                return _ARRAY_OPERATORS[kind](walk(node[1]), walk(node[2]))
+            raise ValueError("{} is not supported on arrays".format(kind))
+
+        return walk(self.tree)
+
+    def _evaluate(self, tree, operands, functions, grid):
+        tree = self._bind(tree, operands, functions, grid)
+
+        # No binary operators, the result keeps the curve's own x-values
+        if isinstance(tree, _Term):
+            if tree.curve is not None:
+                return tree.curve.copy()
+            c = Curve(x=tree.x, y=tree.y)
+            c.drawstyle = tree.drawstyle
+            c.plotname = tree.plotname
+            return c
+
+        c = Curve()
+        if grid == 'union':
+            terms = []
+            self._collect_terms(tree, terms)
+            ux = terms[0].x
+            for t in terms[1:]:
+                ux = union_grid(ux, t.x)
+
+            values, mask, c.plotname, c.drawstyle = self._on_grid(tree, ux)
+            if mask.all():
+                c.x = ux
+                c.y = values
+            else:
+                c.x = ux[mask]
+                c.y = values[mask]
+        else:
+            term = self._reduce(tree, grid)
+            c.x = term.x
+            c.y = term.y
+            c.plotname = term.plotname
+            c.drawstyle = term.drawstyle
+        if tree[0] in _BINARY_OPERATORS:
+            c.math_interp_left = 0
+            c.math_interp_right = 0
+        return c
+
+    def _bind(self, node, operands, functions, grid):
+        """
+        Look up the curves and call the functions of the expression, and apply negation and
+        exponentiation directly to the curves they are applied to.
+        """
+
+        kind = node[0]
+        if kind == 'curve':
+            return _Term.from_curve(operands(node[1]))
+        if kind == 'call':
+            if functions is None:
+                raise ValueError("unknown function '{}' in expression: {}".format(node[1], self.text))
+            arg = self._evaluate(node[2], operands, functions, grid)
+            return _Term.from_curve(functions(node[1])(arg))
+        if kind in ('neg', 'pow'):
+            child = self._bind(node[1], operands, functions, grid)
+            if not isinstance(child, _Term):
+                return (kind, child) + node[2:]
+            return self._unary(node, child)
+        return (kind, self._bind(node[1], operands, functions, grid), self._bind(node[2], operands, functions, grid))
+
+    @staticmethod
+    def _unary(node, child):
+        """
+        Negate or exponentiate a term like Curve.__neg__ and Curve.__pow__ do.
+        """
+
+        if node[0] == 'neg':
+            return _Term(np.array(child.x), np.negative(child.y), None, None, None,
+                         str('-' + child.plotname), child.drawstyle)
+        y = np.power(child.y, node[2])
+        nans = np.isnan(y)
+        return _Term(np.array(child.x)[~nans], y[~nans], None, None, None,
+                     str(child.plotname + '^' + str(node[2])).strip('  '), child.drawstyle)
+
+    def _reduce(self, node, grid):
+        """
+        Evaluate a bound node to a term, evaluating each binary operator on the grid that the grid
+        policy gives for its two operands, like the Curve operators do.
+        """
+
+        if isinstance(node, _Term):
+            return node
+
+        kind = node[0]
+        if kind in ('neg', 'pow'):
+            return self._unary(node, self._reduce(node[1], grid))
+
+        left = self._reduce(node[1], grid)
+        right = self._reduce(node[2], grid)
+        x = math_grid(left.x, right.x, grid)
+        values = np.interp(x, left.x, left.y, left.left, left.right, left.period)
+        _BINARY_OPERATORS[kind](values, np.interp(x, right.x, right.y, right.left, right.right, right.period),
+                                out=values)
+        plotname = str(left.plotname + ' ' + kind + ' ' + right.plotname + ' ').strip('  ')
+        return _Term(x, values, 0, 0, None, plotname, left.drawstyle)
+
+    def _collect_terms(self, node, terms):
+        if isinstance(node, _Term):
+            terms.append(node)
+        else:
+            for child in node[1:]:
+                if isinstance(child, (_Term, tuple)):
+                    self._collect_terms(child, terms)
+
+    def _on_grid(self, node, grid):
+        """
+        Evaluate a node on the common grid.
+
+        :returns: the values at every grid point, the mask of the grid points that are the node's own
+                  x-values, the node's plot name and draw style
+        """
+
+        if isinstance(node, _Term):
+            mask = np.zeros(len(grid), dtype=bool)
+            mask[np.searchsorted(grid, node.x)] = True
+            values = np.interp(grid, node.x, node.y, node.left, node.right, node.period)
+            return values, mask, node.plotname, node.drawstyle
+
+        kind = node[0]
+        values, mask, plotname, drawstyle = self._on_grid(node[1], grid)
+
+        if kind == 'neg':
+            np.negative(values, out=values)
+            plotname = str('-' + plotname)
+            if not mask.all():
+                values[~mask] = np.interp(grid[~mask], grid[mask], values[mask])
+            return values, mask, plotname, drawstyle
+
+        if kind == 'pow':
+            plotname = str(plotname + '^' + str(node[2])).strip('  ')
+            if mask.all():
+                np.power(values, node[2], out=values)
+                nans = np.isnan(values)
+                if not nans.any():
+                    return values, mask, plotname, drawstyle
+                mask = ~nans
+            else:
+                values[mask] = np.power(values[mask], node[2])
+                mask = mask & ~np.isnan(values)
+            values[~mask] = np.interp(grid[~mask], grid[mask], values[mask])
+            return values, mask, plotname, drawstyle
+
+        rvalues, rmask, rplotname, _ = self._on_grid(node[2], grid)
+        plotname = str(plotname + ' ' + kind + ' ' + rplotname + ' ').strip('  ')
+        op = _BINARY_OPERATORS[kind]
+        mask |= rmask
+        if mask.all():
+            op(values, rvalues, out=values)
+        else:
+            values[mask] = op(values[mask], rvalues[mask])
+            values[~mask] = np.interp(grid[~mask], grid[mask], values[mask], 0, 0)
+        return values, mask, plotname, drawstyle
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(text):
+    """
+    Compile a curve math expression. Compiled expressions are cached by their text.
+
+    >>> expression = curve.compile_expression('a + b * c')
+
+    >>> c = expression.evaluate({'a': curve1, 'b': curve2, 'c': curve3})
+
+    :param text: the expression
+    :type text: str
+    :returns: CurveExpression -- the compiled expression
+    """
+
+    return CurveExpression(text)
@@ -138,6 +138,42 @@ class LogEnum(Enum):
     LOG10X = 4
 
 
+# The element-wise functions of func_curve: flag -> (function, argument type, position of the curve values)
+FUNC_CURVE_UFUNCS = {'abs': (numpy.abs, None, 0),
+                     'exp': (numpy.exp, None, 0),
+                     'sin': (numpy.sin, None, 0),
+                     'cos': (numpy.cos, None, 0),
+                     'tan': (numpy.tan, None, 0),
+                     'asin': (numpy.arcsin, None, 0),
+                     'acos': (numpy.arccos, None, 0),
+                     'atan': (numpy.arctan, None, 0),
+                     'sinh': (numpy.sinh, None, 0),
+                     'cosh': (numpy.cosh, None, 0),
+                     'tanh': (numpy.tanh, None, 0),
+                     'asinh': (numpy.arcsinh, None, 0),
+                     'acosh': (numpy.arccosh, None, 0),
+                     'atanh': (numpy.arctanh, None, 0),
+                     'j0': (scipy.special.j0, None, 0),
+                     'j1': (scipy.special.j1, None, 0),
+                     'jn': (scipy.special.jn, float, 1),
+                     'y0': (scipy.special.y0, None, 0),
+                     'y1': (scipy.special.y1, None, 0),
+                     'yn': (scipy.special.yn, int, 1),
+                     'powa': (numpy.power, float, 1),
+                     'powr': (numpy.power, float, 0),
+                     'recip': (numpy.reciprocal, None, 0),
+                     'sqr': (numpy.square, None, 0),
+                     'sqrt': (numpy.sqrt, None, 0)}
+
+# The constant operations of modcurve: flag -> (axis, function)
+MODCURVE_UFUNCS = {'mx': ('x', numpy.multiply),
+                   'my': ('y', numpy.multiply),
+                   'divx': ('x', numpy.divide),
+                   'divy': ('y', numpy.divide),
+                   'dx': ('x', numpy.add),
+                   'dy': ('y', numpy.add)}
+
+
 class Command(cmd.Cmd, object):
 
     prompt = '[PyDV]: '
@@ -845,6 +881,97 @@ class Command(cmd.Cmd, object):
         finally:
             self.redraw = False
 
+    def do_lazy(self, line):
+        """
+        Turn on lazy math. Element-wise operations such as log, mx, dy and sqr are then recorded on the
+        curves and applied together in one pass when the curves are next plotted, saved or used by a
+        command that is not element-wise. Most useful with update off. Lazy math is off by default.
+
+        .. code::
+
+            [PyDV]: lazy on | off
+
+            Ex:
+                [PyDV]: lazy on
+                [PyDV]: lazy off
+        """
+
+        try:
+            line = line.strip()
+            if line == '0' or line.upper() == 'OFF':
+                pydvpy.set_lazy(False)
+            elif line == '1' or line.upper() == 'ON':
+                pydvpy.set_lazy(True)
+            else:
+                print('invalid input: requires on or off as argument')
+        except:
+            pdvutil.print_own_docstring(self)
+        finally:
+            self.redraw = False
+
+    def do_mathgrid(self, line):
+        """
+        Show or set the grid that curve math such as `+ a b c` and `a + b * c` is evaluated on. By default
+        the result of each operation has the union of both curves' x-values, so chained operations on curves
+        with different x-values grow the number of points. The left curve's x-values, the finest or coarsest
+        x-values of the two curves, or a number of uniform points over their overlap keep it bounded.
+
+        .. code::
+
+            [PyDV]: mathgrid [union | left | finest | coarsest | <npts>]
+
+            Ex:
+                [PyDV]: mathgrid
+                [PyDV]: mathgrid left
+                [PyDV]: mathgrid 1000
+        """
+
+        try:
+            line = line.strip().lower()
+            if not line:
+                print('\n    mathgrid: %s\n' % pydvpy.set_grid())
+            elif line.isdigit():
+                pydvpy.set_grid(int(line))
+            else:
+                pydvpy.set_grid(line)
+        except:
+            pdvutil.print_own_docstring(self)
+        finally:
+            self.redraw = False
+
+    def do_cache(self, line):
+        """
+        Show the statistics of the cache of derived results, clear it, or set its budget in megabytes.
+        Commands such as derivative, fft, fit, convolvec and diffMeasure reuse cached results when their
+        curves have not changed since. A budget of 0 turns the cache off.
+
+        .. code::
+
+            [PyDV]: cache [clear | budget <megabytes>]
+
+            Ex:
+                [PyDV]: cache
+                [PyDV]: cache clear
+                [PyDV]: cache budget 512
+        """
+
+        try:
+            line = line.split()
+            if not line:
+                info = pydvpy.cache_info()
+                print('\n    hits: %d    misses: %d    entries: %d    size: %.3f MB    budget: %.3f MB\n'
+                      % (info.hits, info.misses, info.entries, info.nbytes / 2.0**20, info.budget / 2.0**20))
+            elif line[0].lower() == 'clear' and len(line) == 1:
+                pydvpy.cache_clear()
+            elif line[0].lower() == 'budget' and len(line) == 2:
+                pydvpy.cache_budget(float(line[1]) * 2**20)
+            else:
+                raise RuntimeError("{} is not a valid input.".format(' '.join(line)))
+        except:
+            pdvutil.print_own_docstring(self)
+        finally:
+            self.redraw = False
+
     def do_tightlayout(self, line):
         """
         Turn on plot tight layout. Useful if tick labels are long.
@@ -1602,16 +1729,18 @@ class Command(cmd.Cmd, object):
 
     def do_stats(self, line):
         """
-        Show various statistics about the curve.
+        Show various statistics about the curve. With table, the statistics of all the curves
+        are computed in parallel and shown as a table.
 
         .. code::
 
-            [PyDV]: stats <curve-list>
+            [PyDV]: stats <curve-list> [table]
 
             Ex:
                 [PyDV]: stats a
                 [PyDV]: stats a:b
                 [PyDV]: stats c d
+                [PyDV]: stats a:z table
         """
         if not line:
             return 0
@@ -1622,15 +1751,23 @@ class Command(cmd.Cmd, object):
         else:
             try:
                 line = line.split()
+                table = 'table' in [arg.lower() for arg in line]
+                curves = list()
                 for i in range(len(line)):
                     try:
                         curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
                         cur = self.plotlist[curvidx]
-                        pydvpy.stats(cur)
+                        if table:
+                            curves.append(cur)
+                        else:
+                            pydvpy.stats(cur)
 
                     except pdvutil.CurveIndexError:
                         pass
 
+                if curves:
+                    pydvpy.stats_table(curves)
+
                 print('\n')
             except:
                 pdvutil.print_own_docstring(self)
@@ -2308,6 +2445,86 @@ class Command(cmd.Cmd, object):
             except:
                 pdvutil.print_own_docstring(self)
 
+    def do_median(self, line):
+        """
+        Makes a new curve with the median y values of curves passed in curvelist over the union of their domains.
+
+        .. code::
+
+            [PyDV]: median <curve-list>
+
+            Ex:
+                [PyDV]: median a:b
+                [PyDV]: median c d e
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_median(pdvutil.getletterargs(line))
+            return 0
+        else:
+            try:
+                line = line.split()
+
+                if len(line) < 2:
+                    return
+
+                curves = list()
+                for i in range(len(line)):
+                    curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                    curves.append(self.plotlist[curvidx])
+
+                nc = pydvpy.median_curve(curves)
+
+                if nc is not None:
+                    self.addtoplot(nc)
+                    self.plotedit = True
+            except:
+                pdvutil.print_own_docstring(self)
+
+    def do_percentile(self, line):
+        """
+        Makes a new curve with the q-th percentile of the y values of curves passed in curvelist
+        over the union of their domains. Run it twice for an envelope, e.g. 5 and 95.
+
+        .. code::
+
+            [PyDV]: percentile <curve-list> <q>
+
+            Ex:
+                [PyDV]: percentile a:j 95
+                [PyDV]: percentile c d e 5
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_percentile(pdvutil.getletterargs(line))
+            return 0
+        else:
+            try:
+                line = line.split()
+
+                if len(line) < 3:
+                    return
+
+                q = float(line.pop(-1))
+                curves = list()
+                for i in range(len(line)):
+                    curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                    curves.append(self.plotlist[curvidx])
+
+                nc = pydvpy.percentile_curve(curves, q)
+
+                if nc is not None:
+                    self.addtoplot(nc)
+                    self.plotedit = True
+            except:
+                pdvutil.print_own_docstring(self)
+
     def do_fit(self, line):
         """
         Make new curve that is polynomial fit to argument. n=1 by default, logy means take log(y-values) before fitting,
@@ -2400,16 +2617,17 @@ class Command(cmd.Cmd, object):
 
     def do_getrange(self, line):
         """
-        Return range of curves.
+        Return range of curves. If a domain is given, the range within that domain is returned.
 
         .. code::
 
-            [PyDV]: getrange <curve-list>
+            [PyDV]: getrange <curve-list> [<xmin> <xmax>]
 
             Ex:
                 [PyDV]: getrange a
                 [PyDV]: getrange a:b
                 [PyDV]: getrange c d
+                [PyDV]: getrange c d 2 7
         """
 
         if not line:
@@ -2421,11 +2639,19 @@ class Command(cmd.Cmd, object):
             else:
                 print('\n   Get Range')
                 line = line.split()
+                xlow = None
+                xhi = None
+                if len(line) > 2:
+                    try:
+                        xlow, xhi = float(line[-2]), float(line[-1])
+                        line = line[:-2]
+                    except ValueError:
+                        xlow = xhi = None
                 for i in range(len(line)):
                     try:
                         idx = pdvutil.getCurveIndex(line[i], self.plotlist)
                         cur = self.plotlist[idx]
-                        plotname, miny, maxy = pydvpy.getrange(cur)[0]
+                        plotname, miny, maxy = pydvpy.getrange(cur, xlow, xhi)[0]
                         print('\nCurve ' + plotname)
                         print('    ymin: %.6e    ymax: %.6e' % (miny, maxy))
                     except pdvutil.CurveIndexError:
@@ -2512,16 +2738,18 @@ class Command(cmd.Cmd, object):
 
     def do_area(self, line):
         """
-        Calculate the area of the curves.
+        Calculate the area of the curves. With limits, the area between them is computed with
+        the trapezoid rule.
 
         .. code::
 
-            [PyDV]: area <curve-list>
+            [PyDV]: area <curve-list> [low-limit high-limit]
 
             Ex:
                 [PyDV]: area a
                 [PyDV]: area a:b
                 [PyDV]: area c d
+                [PyDV]: area c d 3 7
         """
 
         try:
@@ -2532,11 +2760,22 @@ class Command(cmd.Cmd, object):
                 print('\nArea:')
                 line = line.split()
 
+                limits = None
+                if len(line) > 2:
+                    try:
+                        limits = (float(line[-2]), float(line[-1]))
+                        line = line[:-2]
+                    except ValueError:
+                        limits = None
+
                 for i in range(len(line)):
                     try:
                         idx = pdvutil.getCurveIndex(line[i], self.plotlist)
                         cur = self.plotlist[idx]
-                        plotname, area = pydvpy.area(cur)[0]
+                        if limits is None:
+                            plotname, area = pydvpy.area(cur)[0]
+                        else:
+                            plotname, area = pydvpy.integral(cur, *limits)[0]
                         print(f'\nCurve {cur.plotname}: {plotname}')
                         print(f'\tarea: {area:.6e}')
                     except pdvutil.CurveIndexError:
@@ -5221,10 +5460,11 @@ class Command(cmd.Cmd, object):
                     record_id = cur.record_id
                     record_id = record_id.ljust(self.recordidwidth)
                     record_id = pdvutil.truncate(record_id, self.recordidwidth)
-                    xmin = "%.2e" % min(cur.x)
-                    xmax = "%.2e" % max(cur.x)
-                    ymin = "%.2e" % min(cur.y)
-                    ymax = "%.2e" % max(cur.y)
+                    stats = cur.summary()
+                    xmin = "%.2e" % stats.xmin
+                    xmax = "%.2e" % stats.xmax
+                    ymin = "%.2e" % stats.ymin
+                    ymax = "%.2e" % stats.ymax
                     print("{:>5} {} {} {} {:9} {:9} {:9} {:9} {} {}".format(plotname, name, xlabel, ylabel, xmin,
                                                                             xmax, ymin, ymax, fname, record_id))
         except:
@@ -5302,10 +5542,11 @@ class Command(cmd.Cmd, object):
                 record_id = curve.record_id
                 record_id = record_id.ljust(self.recordidwidth)
                 record_id = pdvutil.truncate(record_id, self.recordidwidth)
-                xmin = "%.2e" % min(curve.x)
-                xmax = "%.2e" % max(curve.x)
-                ymin = "%.2e" % min(curve.y)
-                ymax = "%.2e" % max(curve.y)
+                stats = curve.summary()
+                xmin = "%.2e" % stats.xmin
+                xmax = "%.2e" % stats.xmax
+                ymin = "%.2e" % stats.ymin
+                ymax = "%.2e" % stats.ymax
                 print("{:>5} {} {} {} {:9} {:9} {:9} {:9} {} {}".format(plotname, name, xlabel, ylabel, xmin,
                                                                         xmax, ymin, ymax, fname, record_id))
 
@@ -5415,10 +5656,11 @@ class Command(cmd.Cmd, object):
                 record_id = self.curvelist[i].record_id
                 record_id = record_id.ljust(self.recordidwidth)
                 record_id = pdvutil.truncate(record_id, self.recordidwidth)
-                xmin = "%.2e" % min(self.curvelist[i].x)
-                xmax = "%.2e" % max(self.curvelist[i].x)
-                ymin = "%.2e" % min(self.curvelist[i].y)
-                ymax = "%.2e" % max(self.curvelist[i].y)
+                stats = self.curvelist[i].summary()
+                xmin = "%.2e" % stats.xmin
+                xmax = "%.2e" % stats.xmax
+                ymin = "%.2e" % stats.ymin
+                ymax = "%.2e" % stats.ymax
                 print("{:>5} {} {} {} {:9} {:9} {:9} {:9} {} {}".format(index, name, xlabel, ylabel, xmin,
                                                                         xmax, ymin, ymax, fname, record_id))
         except:
@@ -5484,10 +5726,11 @@ class Command(cmd.Cmd, object):
                     record_id = self.curvelist[i].record_id
                     record_id = record_id.ljust(self.recordidwidth)
                     record_id = pdvutil.truncate(record_id, self.recordidwidth)
-                    xmin = "%.2e" % min(self.curvelist[i].x)
-                    xmax = "%.2e" % max(self.curvelist[i].x)
-                    ymin = "%.2e" % min(self.curvelist[i].y)
-                    ymax = "%.2e" % max(self.curvelist[i].y)
+                    stats = self.curvelist[i].summary()
+                    xmin = "%.2e" % stats.xmin
+                    xmax = "%.2e" % stats.xmax
+                    ymin = "%.2e" % stats.ymin
+                    ymax = "%.2e" % stats.ymax
                     print("{:>5} {} {} {} {:9} {:9} {:9} {:9} {} {}".format(index, name, xlabel, ylabel, xmin,
                                                                             xmax, ymin, ymax, fname, record_id))
                     j += 1
@@ -6501,20 +6744,187 @@ class Command(cmd.Cmd, object):
                 return 0
             else:
                 line = line.split()
+                curves = list()
                 for i in range(len(line)):
                     try:
                         curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
-                        cur = self.plotlist[curvidx]
-                        pydvpy.smooth(cur, factor)
-                        cur.edited = True
+                        curves.append(self.plotlist[curvidx])
                     except pdvutil.CurveIndexError:
                         pass
 
+                pydvpy.smooth(curves, factor)
+                for cur in curves:
+                    cur.edited = True
+
             self.plotedit = True
 
         except:
             pdvutil.print_own_docstring(self)
 
+    def do_resample(self, line):
+        """
+        Make new curves by resampling the curves onto npts evenly spaced points. The points span each
+        curve's domain unless xmin and xmax are given. The interpolant is linear by default.
+
+        .. code::
+
+            [PyDV]: resample <curve-list> <npts> [<xmin> <xmax>] [linear | pchip | cubic | nearest | previous]
+
+            Ex:
+                [PyDV]: resample a 200
+                [PyDV]: resample a:b 200 pchip
+                [PyDV]: resample c d 50 0 10 cubic
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_resample(pdvutil.getletterargs(line))
+            return 0
+        else:
+            try:
+                line = line.split()
+
+                method = 'linear'
+                if line[-1].lower() in ('linear', 'pchip', 'cubic', 'nearest', 'previous'):
+                    method = line.pop(-1).lower()
+
+                numbers = list()
+                while len(line) > 1 and len(numbers) < 3:
+                    try:
+                        numbers.insert(0, float(line[-1]))
+                        line.pop(-1)
+                    except ValueError:
+                        break
+
+                if len(numbers) == 1:
+                    grid = int(numbers[0])
+                elif len(numbers) == 3:
+                    grid = numpy.linspace(numbers[1], numbers[2], int(numbers[0]))
+                else:
+                    raise RuntimeError("<npts> or <npts> <xmin> <xmax> must be specified")
+
+                curves = list()
+                for i in range(len(line)):
+                    curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                    curves.append(self.plotlist[curvidx])
+
+                for nc in pydvpy.resample(curves, grid, method):
+                    self.addtoplot(nc)
+                self.plotedit = True
+            except:
+                pdvutil.print_own_docstring(self)
+
+    def do_bin(self, line):
+        """
+        Make new curves of statistics of the curves' y-values in bins of x, e.g. to summarize large scatter
+        curves. Give the number of equal bins spanning each curve's domain or the bin edges. The statistic
+        is the mean by default. Bins without points are left out except for the count.
+
+        .. code::
+
+            [PyDV]: bin <curve-list> <nbins | edges> [mean | min | max | count | std | median]
+
+            Ex:
+                [PyDV]: bin a 100
+                [PyDV]: bin a:c 500 median
+                [PyDV]: bin d 0 1 2 5 10 max
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_bin(pdvutil.getletterargs(line))
+            return 0
+        else:
+            try:
+                line = line.split()
+
+                stat = 'mean'
+                if line[-1].lower() in ('mean', 'min', 'max', 'count', 'std', 'median'):
+                    stat = line.pop(-1).lower()
+
+                numbers = list()
+                while len(line) > 1:
+                    try:
+                        numbers.insert(0, float(line[-1]))
+                        line.pop(-1)
+                    except ValueError:
+                        break
+
+                if len(numbers) == 1:
+                    bins = int(numbers[0])
+                elif len(numbers) > 1:
+                    bins = numbers
+                else:
+                    raise RuntimeError("<nbins> or the bin edges must be specified")
+
+                curves = list()
+                for i in range(len(line)):
+                    curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                    curves.append(self.plotlist[curvidx])
+
+                for nc in pydvpy.binstats(curves, bins, stat):
+                    self.addtoplot(nc)
+                self.plotedit = True
+            except:
+                pdvutil.print_own_docstring(self)
+
+    def do_rolling(self, line):
+        """
+        Make new curves of a statistic of the curves' y-values in a window trailing each point. The window
+        holds the given number of points, or with x the points within the given width in x of each point,
+        e.g. for curves with uneven x-values. The statistic is the mean by default.
+
+        .. code::
+
+            [PyDV]: rolling <curve-list> <window> [mean | sum | std | min | max | median | quantile <q>] [x]
+
+            Ex:
+                [PyDV]: rolling a 10
+                [PyDV]: rolling a:c 50 max
+                [PyDV]: rolling d 2.5 std x
+                [PyDV]: rolling e 100 quantile 0.9
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_rolling(pdvutil.getletterargs(line))
+            return 0
+        else:
+            try:
+                line = line.split()
+
+                by = 'samples'
+                if line[-1].lower() in ('x', 'samples'):
+                    by = line.pop(-1).lower()
+
+                stat = 'mean'
+                q = 0.5
+                if len(line) > 2 and line[-2].lower() == 'quantile':
+                    q = float(line.pop(-1))
+                if line[-1].lower() in ('mean', 'sum', 'std', 'min', 'max', 'median', 'quantile'):
+                    stat = line.pop(-1).lower()
+
+                window = float(line.pop(-1))
+                if by == 'samples':
+                    window = int(window)
+
+                curves = list()
+                for i in range(len(line)):
+                    curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                    curves.append(self.plotlist[curvidx])
+
+                for nc in pydvpy.rolling(curves, window, stat, by, q):
+                    self.addtoplot(nc)
+                self.plotedit = True
+            except:
+                pdvutil.print_own_docstring(self)
+
     def do_fft(self, line):
         """
         Compute the one-dimensional discrete Fourier Transform for the curves.
@@ -6654,18 +7064,25 @@ class Command(cmd.Cmd, object):
 
         .. code::
 
-            [PyDV]: convolveb <curve1> <curve2> [points] [points_interp]
+            [PyDV]: convolveb <curve1> <curve2> [points] [points_interp] [direct | fft]
+
+            The fft method is faster for large curves and falls back to direct integration
+            if it is not accurate enough.
 
             Ex:
                 [PyDV]: convolveb g h
                 [PyDV]: convolveb g h 200
                 [PyDV]: convolveb g h 200 200
+                [PyDV]: convolveb g h 200 200 fft
         """
 
         if not line:
             return 0
         try:
             line = line.split()
+            method = 'direct'
+            if line[-1].lower() in ('direct', 'fft'):
+                method = line.pop().lower()
             for i in range(len(self.plotlist)):
                 if self.plotlist[i].plotname == line[0].upper():
                     c1 = self.plotlist[i]
@@ -6676,14 +7093,14 @@ class Command(cmd.Cmd, object):
                     break
 
             if len(line) == 2:
-                nc = pydvpy.convolveb(c1, c2, debug=self.debug)
+                nc = pydvpy.convolveb(c1, c2, debug=self.debug, method=method)
             elif len(line) == 3:
                 npts = int(line[2])
-                nc = pydvpy.convolveb(c1, c2, npts, debug=self.debug)
+                nc = pydvpy.convolveb(c1, c2, npts, debug=self.debug, method=method)
             elif len(line) == 4:
                 npts = int(line[2])
                 npts_interp = int(line[3])
-                nc = pydvpy.convolveb(c1, c2, npts, npts_interp, debug=self.debug)
+                nc = pydvpy.convolveb(c1, c2, npts, npts_interp, debug=self.debug, method=method)
             else:
                 raise RuntimeError("Wrong number of arguments, expecting 2 or 3 but received %d." % len(line))
 
@@ -6700,18 +7117,25 @@ class Command(cmd.Cmd, object):
 
         .. code::
 
-            [PyDV]: convolvec <curve1> <curve2> [points] [points_interp]
+            [PyDV]: convolvec <curve1> <curve2> [points] [points_interp] [direct | fft]
+
+            The fft method is faster for large curves and falls back to direct integration
+            if it is not accurate enough.
 
             Ex:
                 [PyDV]: convolvec g h
                 [PyDV]: convolvec g h 200
                 [PyDV]: convolvec g h 200 200
+                [PyDV]: convolvec g h 200 200 fft
         """
 
         if not line:
             return 0
         try:
             line = line.split()
+            method = 'direct'
+            if line[-1].lower() in ('direct', 'fft'):
+                method = line.pop().lower()
             for i in range(len(self.plotlist)):
                 if self.plotlist[i].plotname == line[0].upper():
                     c1 = self.plotlist[i]
@@ -6722,14 +7146,14 @@ class Command(cmd.Cmd, object):
                     break
 
             if len(line) == 2:
-                nc = pydvpy.convolvec(c1, c2, debug=self.debug)
+                nc = pydvpy.convolvec(c1, c2, debug=self.debug, method=method)
             elif len(line) == 3:
                 npts = int(line[2])
-                nc = pydvpy.convolvec(c1, c2, npts, debug=self.debug)
+                nc = pydvpy.convolvec(c1, c2, npts, debug=self.debug, method=method)
             elif len(line) == 4:
                 npts = int(line[2])
                 npts_interp = int(line[3])
-                nc = pydvpy.convolvec(c1, c2, npts, npts_interp, debug=self.debug)
+                nc = pydvpy.convolvec(c1, c2, npts, npts_interp, debug=self.debug, method=method)
             else:
                 raise RuntimeError("Wrong number of arguments, expecting 2 or 3 but received %d." % len(line))
 
@@ -6777,16 +7201,92 @@ class Command(cmd.Cmd, object):
         except:
             pdvutil.print_own_docstring(self)
 
+    def do_difftable(self, line):
+        """
+        Compare every curve in the first curve list with the curve of the same name in the second
+        curve list and print a table of the results. The metric is one of AvgDiff, AbsDiff, RelDiff,
+        AbsAndRelDiff or AbsOrRelDiff. AvgDiff, AbsDiff and RelDiff take their one tolerance and the
+        others an absolute and then a relative tolerance. Add plot to also plot the differences curves
+        of each pair.
+
+        .. code::
+
+            [PyDV]: difftable <curve-list> vs <curve-list> [metric] [tolerances] [npts] [plot]
+
+            Ex:
+                [PyDV]: difftable a:m vs n:z
+                [PyDV]: difftable a:m vs n:z AbsDiff 1e-8
+                [PyDV]: difftable a:m vs n:z RelDiff 1e-6 100
+                [PyDV]: difftable a:m vs n:z AbsAndRelDiff 1e-8 1e-6 100 plot
+        """
+
+        if not line:
+            return 0
+
+        if len(line.split(':')) > 1:
+            self.do_difftable(pdvutil.getletterargs(line))
+            return 0
+        else:
+            plot = False
+            try:
+                line = line.split()
+                split = [arg.lower() for arg in line].index('vs')
+                metrics = ['AvgDiff', 'AbsDiff', 'RelDiff', 'AbsAndRelDiff', 'AbsOrRelDiff']
+
+                curves1 = list()
+                for arg in line[:split]:
+                    curves1.append(self.plotlist[pdvutil.getCurveIndex(arg, self.plotlist)])
+
+                curves2 = list()
+                metric = 'AbsAndRelDiff'
+                numbers = list()
+                for arg in line[split + 1:]:
+                    if arg.lower() == 'plot':
+                        plot = True
+                    elif arg.lower() in [m.lower() for m in metrics]:
+                        metric = metrics[[m.lower() for m in metrics].index(arg.lower())]
+                    else:
+                        try:
+                            curves2.append(self.plotlist[pdvutil.getCurveIndex(arg, self.plotlist)])
+                        except pdvutil.CurveIndexError:
+                            numbers.append(float(arg))
+
+                # The numbers are the metric's own tolerances followed by npts
+                tolerances = {'AvgDiff': ['abs'], 'AbsDiff': ['abs'], 'RelDiff': ['rel']}.get(metric, ['abs', 'rel'])
+                tols = dict(zip(tolerances, numbers))
+                abs_tol = tols.get('abs', 1e80)
+                rel_tol = tols.get('rel', 1e80)
+                npts = int(numbers[len(tolerances)]) if len(numbers) > len(tolerances) else 0
+
+                table = pydvpy.DiffTable(curves1, curves2, metric, npts, abs_tol, rel_tol, curves=plot, verbose=True)
+
+                if plot:
+                    for row in table:
+                        # The differences curves follow the two interpolated curves, five values per metric
+                        for differences in row.curves[2:12:5]:
+                            differences.name = row.name + ' ' + differences.name
+                            self.addtoplot(differences)
+                    self.plotedit = True
+                print('')
+            except:
+                pdvutil.print_own_docstring(self)
+            finally:
+                self.redraw = plot
+
     def do_correl(self, line):
         """
-        Computes the cross-correlation of two curves.
+        Computes the cross-correlation of two curves. The x-values of the new curve are the lags of the
+        first curve relative to the second. The mode is 'same' by default, 'norm' normalizes the
+        correlation so that it is 1 where the curves match exactly and maxlag limits the lags computed.
 
         .. code::
 
-            [PyDV]: correl <curve1> <curve2>
+            [PyDV]: correl <curve1> <curve2> [full | same | valid] [norm] [<maxlag>]
 
             Ex:
                 [PyDV]: correl a b
+                [PyDV]: correl a b full norm
+                [PyDV]: correl a b norm 2.5
         """
 
         if not line:
@@ -6795,6 +7295,18 @@ class Command(cmd.Cmd, object):
         try:
             line = line.split()
 
+            mode = 'same'
+            normalize = False
+            maxlag = None
+            while len(line) > 2:
+                arg = line.pop(-1)
+                if arg.lower() in ('full', 'same', 'valid'):
+                    mode = arg.lower()
+                elif arg.lower() == 'norm':
+                    normalize = True
+                else:
+                    maxlag = float(arg)
+
             if len(line) != 2:
                 raise RuntimeError("Wrong number of arguments, expecting 2 but received %d." % len(line))
 
@@ -6804,7 +7316,7 @@ class Command(cmd.Cmd, object):
             idx = pdvutil.getCurveIndex(line[1], self.plotlist)
             c2 = self.plotlist[idx]
 
-            nc = pydvpy.correlate(c1, c2, 'same')
+            nc = pydvpy.correlate(c1, c2, mode, normalize=normalize, maxlag=maxlag)
             self.addtoplot(nc)
             self.plotedit = True
         except:
@@ -8376,6 +8888,55 @@ class Command(cmd.Cmd, object):
         except:
             pdvutil.print_own_docstring(self)
 
+    def do_decimate(self, line):
+        """
+        Decimate the curves to at most npts points, keeping the peaks and spikes that subsample drops.
+        lttb (Largest-Triangle-Three-Buckets, the default) keeps the shape of the curves and minmax keeps
+        the minimum and maximum of every bucket of points.
+
+        .. code::
+
+            [PyDV]: decimate <curve-list> <npts> [lttb | minmax]
+
+            Ex:
+                [PyDV]: decimate a 10000
+                [PyDV]: decimate a:b 10000 minmax
+                [PyDV]: decimate c d 5000 lttb
+        """
+
+        try:
+            if not line:
+                return 0
+            if len(line.split(':')) > 1:
+                self.do_decimate(pdvutil.getletterargs(line))
+                return 0
+            else:
+                line = line.split()
+
+                method = 'lttb'
+                if line[-1].lower() in ('lttb', 'minmax'):
+                    method = line.pop(-1).lower()
+                npts = int(line.pop(-1))
+
+                curvelist = list()
+                for i in range(len(line)):
+                    try:
+                        curvidx = pdvutil.getCurveIndex(line[i], self.plotlist)
+                        curvelist.append(self.plotlist[curvidx])
+                    except pdvutil.CurveIndexError:
+                        pass
+
+                if len(curvelist) > 0:
+                    print("\nDecimating the data to %i points with %s...\n" % (npts, method))
+                    pydvpy.decimate(curvelist, npts, method, True)
+                    for cur in curvelist:
+                        cur.edited = True
+
+                self.plotedit = True
+
+        except:
+            pdvutil.print_own_docstring(self)
+
     ########################################################################################################
     # helper functions #
     ########################################################################################################
@@ -8389,14 +8950,14 @@ class Command(cmd.Cmd, object):
         xmin, xmax = 1e300, -1e300
         for cur in orderlist:
             if not cur.hidden:
-                xmin = min(xmin, min(cur.x))
-                xmax = max(xmax, max(cur.x))
+                stats = cur.summary()
+                xmin = min(xmin, stats.xmin)
+                xmax = max(xmax, stats.xmax)
         if self.xlogscale:
             xmin = 1e-2
             for cur in orderlist:
                 if not cur.hidden:
-                    xdat = numpy.where(cur.x < 1e-300, 1e301, cur.x)
-                    localmin = min(xdat)
+                    localmin = cur.summary().xminpos
                     if localmin and localmin < xmin:
                         xmin = localmin
             if xmax < xmin:
@@ -8412,13 +8973,14 @@ class Command(cmd.Cmd, object):
         ymin, ymax = 1e300, -1e300
         for cur in orderlist:
             if not cur.hidden:
-                ymin = min(ymin, min(cur.y))
-                ymax = max(ymax, max(cur.y))
+                stats = cur.summary()
+                ymin = min(ymin, stats.ymin)
+                ymax = max(ymax, stats.ymax)
         if self.ylogscale:
             ymin = 1e-2
             for cur in orderlist:
                 if not cur.hidden:
-                    localmin = min(numpy.ma.masked_where(numpy.ma.array(cur.y) < 1e-300, numpy.ma.array(cur.y)))
+                    localmin = cur.summary().yminpos
                     if localmin and localmin < ymin:
                         ymin = localmin
             if ymax < ymin:
@@ -8592,32 +9154,18 @@ class Command(cmd.Cmd, object):
             return 0
         else:
             line = line.split()
+            others = self.curvelist + self.plotlist
             for i in range(len(line)):
                 try:
                     curidx = pdvutil.getCurveIndex(line[i], self.plotlist)
                     cur = self.plotlist[curidx]
 
-                    if (flag == 'my'):
-                        cur.y *= float(modvalue)
-                        cur.edited = True
-                    elif (flag == 'mx'):
-                        cur.x *= float(modvalue)
-                        cur.edited = True
-                    elif (flag == 'divy'):
-                        if (float(modvalue) == 0):
+                    if flag in MODCURVE_UFUNCS:
+                        axis, ufunc = MODCURVE_UFUNCS[flag]
+                        if ufunc is numpy.divide and float(modvalue) == 0:
                             modvalue = '1e-10'
-                        cur.y /= float(modvalue)
-                        cur.edited = True
-                    elif (flag == 'divx'):
-                        if (float(modvalue) == 0):
-                            modvalue = '1e-10'
-                        cur.x /= float(modvalue)
-                        cur.edited = True
-                    elif (flag == 'dy'):
-                        cur.y += float(modvalue)
-                        cur.edited = True
-                    elif (flag == 'dx'):
-                        cur.x += float(modvalue)
+                        # Overwrite the values unless another curve shares them
+                        cur.transform(axis, ufunc, float(modvalue), inplace=cur.owns(axis, others))
                         cur.edited = True
                     elif (flag == 'scatter'):
                         if (modvalue == '0' or modvalue.upper() == 'OFF'):
@@ -8703,72 +9251,19 @@ class Command(cmd.Cmd, object):
                                     print('    x: %.6e    y: %.6e' % (x, y))
                         except ValueError as detail:
                             print('Error: %s' % detail)
-                    elif (flag == 'xmin'):
-                        nx = []
-                        ny = []
-                        for dex in range(len(cur.x)):
-                            if (cur.x[dex] >= float(modvalue)):
-                                nx.append(cur.x[dex])
-                                ny.append(cur.y[dex])
-                        if (len(nx) > 0):
-                            cur.x = numpy.array(nx)
-                            cur.y = numpy.array(ny)
-                            cur.edited = True
-                            if len(nx) == 1:
-                                cur.marker = 'o'
-                                cur.markersize = 3
+                    elif flag in ('xmin', 'xmax', 'ymin', 'ymax'):
+                        # Keep the points within the limit in one masked pass
+                        values = cur.x if flag[0] == 'x' else cur.y
+                        if flag[1:] == 'min':
+                            keep = values >= float(modvalue)
                         else:
-                            j = pdvutil.getCurveIndex(cur.plotname, self.plotlist)
-                            cur.plotname = ''
-                            self.plotlist.pop(j)
-                    elif (flag == 'xmax'):
-                        nx = []
-                        ny = []
-                        for dex in range(len(cur.x)):
-                            if (cur.x[dex] <= float(modvalue)):
-                                nx.append(cur.x[dex])
-                                ny.append(cur.y[dex])
-                        if (len(nx) > 0):
-                            cur.x = numpy.array(nx)
-                            cur.y = numpy.array(ny)
-                            cur.edited = True
-                            if len(nx) == 1:
-                                cur.marker = 'o'
-                                cur.markersize = 3
-                        else:
-                            j = pdvutil.getCurveIndex(cur.plotname, self.plotlist)
-                            cur.plotname = ''
-                            self.plotlist.pop(j)
-                    elif (flag == 'ymin'):
-                        nx = []
-                        ny = []
-                        for dex in range(len(cur.y)):
-                            if (cur.y[dex] >= float(modvalue)):
-                                nx.append(cur.x[dex])
-                                ny.append(cur.y[dex])
-                        if (len(nx) > 0):
-                            cur.x = numpy.array(nx)
-                            cur.y = numpy.array(ny)
+                            keep = values <= float(modvalue)
+                        count = numpy.count_nonzero(keep)
+                        if count > 0:
+                            cur.x = cur.x[keep]
+                            cur.y = cur.y[keep]
                             cur.edited = True
-                            if len(nx) == 1:
-                                cur.marker = 'o'
-                                cur.markersize = 3
-                        else:
-                            j = pdvutil.getCurveIndex(cur.plotname, self.plotlist)
-                            cur.plotname = ''
-                            self.plotlist.pop(j)
-                    elif (flag == 'ymax'):
-                        nx = []
-                        ny = []
-                        for dex in range(len(cur.y)):
-                            if (cur.y[dex] <= float(modvalue)):
-                                nx.append(cur.x[dex])
-                                ny.append(cur.y[dex])
-                        if (len(nx) > 0):
-                            cur.x = numpy.array(nx)
-                            cur.y = numpy.array(ny)
-                            cur.edited = True
-                            if len(nx) == 1:
+                            if count == 1:
                                 cur.marker = 'o'
                                 cur.markersize = 3
                         else:
@@ -8791,244 +9286,23 @@ class Command(cmd.Cmd, object):
             return 0
         else:
             line = line.split()
+            others = self.curvelist + self.plotlist
             for i in range(len(line)):
                 try:
                     idx = pdvutil.getCurveIndex(line[i], self.plotlist)
                     cur = self.plotlist[idx]
-
-                    if (flag == 'abs'):
-                        if (do_x == 0):
-                            cur.y = numpy.abs(cur.y)
-                            cur.name = 'abs(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.abs(cur.x)
-                            cur.name = 'absx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'exp'):
-                        if (do_x == 0):
-                            cur.y = numpy.exp(cur.y)
-                            if cur.name[:3] == 'log':
-                                # Pop off the log( from the front and the ) from the back
-                                cur.name = cur.name[4:-1]
-                            else:
-                                cur.name = 'exp(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.exp(cur.x)
-                            if cur.name[:4] == 'logx':
-                                # Pop off the logx( from the front and the ) from the back
-                                cur.name = cur.name[5:-1]
-                            else:
-                                cur.name = 'expx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'sin'):
-                        if (do_x == 0):
-                            cur.y = numpy.sin(cur.y)
-                            cur.name = 'sin(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.sin(cur.x)
-                            cur.name = 'sinx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'cos'):
-                        if (do_x == 0):
-                            cur.y = numpy.cos(cur.y)
-                            cur.name = 'cos(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.cos(cur.x)
-                            cur.name = 'cosx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'tan'):
-                        if (do_x == 0):
-                            cur.y = numpy.tan(cur.y)
-                            cur.name = 'tan(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.tan(cur.x)
-                            cur.name = 'tanx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'asin'):
-                        if (do_x == 0):
-                            cur.y = numpy.arcsin(cur.y)
-                            cur.name = 'asin(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arcsin(cur.x)
-                            cur.name = 'asinx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'acos'):
-                        if (do_x == 0):
-                            cur.y = numpy.arccos(cur.y)
-                            cur.name = 'acos(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arccos(cur.x)
-                            cur.name = 'acosx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'atan'):
-                        if (do_x == 0):
-                            cur.y = numpy.arctan(cur.y)
-                            cur.name = 'atan(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arctan(cur.x)
-                            cur.name = 'atanx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'sinh'):
-                        if (do_x == 0):
-                            cur.y = numpy.sinh(cur.y)
-                            cur.name = 'sinh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.sinh(cur.x)
-                            cur.name = 'sinhx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'cosh'):
-                        if (do_x == 0):
-                            cur.y = numpy.cosh(cur.y)
-                            cur.name = 'cosh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.cosh(cur.x)
-                            cur.name = 'coshx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'tanh'):
-                        if (do_x == 0):
-                            cur.y = numpy.tanh(cur.y)
-                            cur.name = 'tanh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.tanh(cur.x)
-                            cur.name = 'tanhx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'asinh'):
-                        if (do_x == 0):
-                            cur.y = numpy.arcsinh(cur.y)
-                            cur.name = 'asinh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arcsinh(cur.x)
-                            cur.name = 'asinhx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'acosh'):
-                        if (do_x == 0):
-                            cur.y = numpy.arccosh(cur.y)
-                            cur.name = 'acosh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arccosh(cur.x)
-                            cur.name = 'acoshx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'atanh'):
-                        if (do_x == 0):
-                            cur.y = numpy.arctanh(cur.y)
-                            cur.name = 'atanh(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.arctanh(cur.x)
-                            cur.name = 'atanhx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'j0'):
-                        if do_x == 0:
-                            cur.y = scipy.special.j0(cur.y)
-                            cur.name = 'j0(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.j0(cur.x)
-                            cur.name = 'j0x(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'j1'):
-                        if (do_x == 0):
-                            cur.y = scipy.special.j1(cur.y)
-                            cur.name = 'j1(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.j1(cur.x)
-                            cur.name = 'j1x(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'jn'):
-                        if (do_x == 0):
-                            cur.y = scipy.special.jn(float(arg), cur.y)
-                            cur.name = 'jn(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.jn(float(arg), cur.x)
-                            cur.name = 'jnx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'y0'):
-                        if (do_x == 0):
-                            cur.y = scipy.special.y0(cur.y)
-                            cur.name = 'y0(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.y0(cur.x)
-                            cur.name = 'y0x(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'y1'):
-                        if (do_x == 0):
-                            cur.y = scipy.special.y1(cur.y)
-                            cur.name = 'y1(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.y1(cur.x)
-                            cur.name = 'y1x(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'yn'):
-                        if (do_x == 0):
-                            cur.y = scipy.special.yn(int(arg), cur.y)
-                            cur.name = 'yn(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = scipy.special.yn(int(arg), cur.x)
-                            cur.name = 'ynx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'powa'):
-                        if (do_x == 0):
-                            cur.y = numpy.power(float(arg), cur.y)
-                            cur.name = 'powa(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.power(float(arg), cur.x)
-                            cur.name = 'powax(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'powr'):
-                        if (do_x == 0):
-                            cur.y = numpy.power(cur.y, float(arg))
-                            cur.name = 'powr(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.power(cur.x, float(arg))
-                            cur.name = 'powrx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'recip'):
-                        if (do_x == 0):
-                            cur.y = numpy.reciprocal(cur.y)
-                            cur.name = 'recip(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.reciprocal(cur.x)
-                            cur.name = 'recipx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'sqr'):
-                        if (do_x == 0):
-                            cur.y = numpy.square(cur.y)
-                            cur.name = 'sqr(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.square(cur.x)
-                            cur.name = 'sqrx(' + cur.name + ')'
-                            cur.edited = True
-                    elif (flag == 'sqrt'):
-                        if (do_x == 0):
-                            cur.y = numpy.sqrt(cur.y)
-                            cur.name = 'sqrt(' + cur.name + ')'
-                            cur.edited = True
-                        else:
-                            cur.x = numpy.sqrt(cur.x)
-                            cur.name = 'sqrtx(' + cur.name + ')'
-                            cur.edited = True
+                    ufunc, argtype, position = FUNC_CURVE_UFUNCS[flag]
+                    args = () if argtype is None else (argtype(arg),)
+                    axis, suffix = ('y', '') if do_x == 0 else ('x', 'x')
+
+                    # Overwrite the values unless another curve shares them
+                    cur.transform(axis, ufunc, *args, position=position, inplace=cur.owns(axis, others))
+                    if flag == 'exp' and cur.name[:3 + len(suffix)] == 'log' + suffix:
+                        # Pop off the log( or logx( from the front and the ) from the back
+                        cur.name = cur.name[4 + len(suffix):-1]
+                    else:
+                        cur.name = flag + suffix + '(' + cur.name + ')'
+                    cur.edited = True
                 except:
                     if self.debug:
                         traceback.print_exc(file=sys.stdout)
@@ -9348,8 +9622,9 @@ class Command(cmd.Cmd, object):
                 for cur in orderlist:
                     if not cur.hidden:
                         plt.text(cur.x[0], cur.y[0], cur.plotname, color=cur.color, fontsize=self.curvelabelfont)
-                        curxmax = max(cur.x)
-                        curxmin = min(cur.x)
+                        stats = cur.summary()
+                        curxmax = stats.xmax
+                        curxmin = stats.xmin
                         if self.xlim is not None:
                             if self.xlim[1] < curxmax:
                                 curxmax = self.xlim[1]
@@ -276,23 +276,25 @@ class Plotter(QMainWindow):
             self._tableWidget.setItem(row, col, ylabelItem)
             col += 1
 
+            stats = c.summary()
+
             # xmin
-            xminItem = QTableWidgetItem(self.tr("%.2e" % min(c.x)))
+            xminItem = QTableWidgetItem(self.tr("%.2e" % stats.xmin))
             self._tableWidget.setItem(row, col, xminItem)
             col += 1
 
             # xmax
-            xmaxItem = QTableWidgetItem(self.tr("%.2e" % max(c.x)))
+            xmaxItem = QTableWidgetItem(self.tr("%.2e" % stats.xmax))
             self._tableWidget.setItem(row, col, xmaxItem)
             col += 1
 
             # ymin
-            yminItem = QTableWidgetItem(self.tr("%.2e" % min(c.y)))
+            yminItem = QTableWidgetItem(self.tr("%.2e" % stats.ymin))
             self._tableWidget.setItem(row, col, yminItem)
             col += 1
 
             # ymax
-            ymaxItem = QTableWidgetItem(self.tr("%.2e" % max(c.y)))
+            ymaxItem = QTableWidgetItem(self.tr("%.2e" % stats.ymax))
             self._tableWidget.setItem(row, col, ymaxItem)
             col += 1
 
@@ -408,23 +410,25 @@ class Plotter(QMainWindow):
             self._menuTableWidget.setItem(row, col, ylabelItem)
             col += 1
 
+            stats = c.summary()
+
             # xmin
-            xminItem = QTableWidgetItem(self.tr("%.2e" % min(c.x)))
+            xminItem = QTableWidgetItem(self.tr("%.2e" % stats.xmin))
             self._menuTableWidget.setItem(row, col, xminItem)
             col += 1
 
             # xmax
-            xmaxItem = QTableWidgetItem(self.tr("%.2e" % max(c.x)))
+            xmaxItem = QTableWidgetItem(self.tr("%.2e" % stats.xmax))
             self._menuTableWidget.setItem(row, col, xmaxItem)
             col += 1
 
             # ymin
-            yminItem = QTableWidgetItem(self.tr("%.2e" % min(c.y)))
+            yminItem = QTableWidgetItem(self.tr("%.2e" % stats.ymin))
             self._menuTableWidget.setItem(row, col, yminItem)
             col += 1
 
             # ymax
-            ymaxItem = QTableWidgetItem(self.tr("%.2e" % max(c.y)))
+            ymaxItem = QTableWidgetItem(self.tr("%.2e" % stats.ymax))
             self._menuTableWidget.setItem(row, col, ymaxItem)
             col += 1
 
@@ -63,6 +63,14 @@ import inspect
 import traceback
 import sys
 
+# HPC Import
+try:
+    import curve
+
+# Package Import
+except ImportError:
+    from pydv import curve
+
 
 class CurveIndexError(ValueError):
     pass
@@ -84,6 +92,19 @@ def parsemath(line, plotlist, commander, xdomain):
     Parses and calculates mathematical input for curves, then updates plot
     """
 
+    expression = curve.compile_expression(line)
+
+    def getcurve(label):
+        return plotlist[getCurveIndex(label, plotlist)]
+
+    def getfunction(name):
+        # functions are methods of the commander, e.g. commander.derivative(a)
+        if name.startswith('commander.'):
+            return getattr(commander, name[len('commander.'):])
+        raise ValueError("unknown function: " + name)
+
+    c = expression.evaluate(getcurve, getfunction)  # evaluate it on one grid shared by all the curves
+
     line = line.replace('+', ' + ')
     line = line.replace('-', ' - ')
     line = line.replace('*', ' * ')
@@ -91,81 +112,22 @@ def parsemath(line, plotlist, commander, xdomain):
     line = line.replace('(', ' ( ')
     line = line.replace(')', ' ) ')
     line = line.split()
-    # build the line of operations
-    sendline = ''
-    step = True
-    shared_x = []
-    for val in line:
-        dex = None
-        # Curve a-z or curve labeled @N (e.g. @27), i.e., beyond a-z?
-        if (len(val) == 1 and ord(val.upper()) <= ord('Z') and ord(val.upper()) >= ord('A')) or (val[0] == '@'):
-            dex = getCurveIndex(val, plotlist)
-            sendline += ' plotlist[' + str(dex) + '] '
-
-            try:
-                step_i = eval('plotlist[' + str(dex) + '].step')
-                if step_i and step:
-                    shared_x.extend(eval('plotlist[' + str(dex) + '].x'))
-            except:
-                step_i = False
-
-        else:  # no?, then just insert the operation (+,-,*,/, etc)
-            sendline += val
-
-        if not step_i:
-            step = False
-
-    sendline = sendline.lstrip()
-    c = eval(sendline)  # evaluate it --- this works because math ops are defined for, and return, curve objects
     c.name = ' '.join(line).replace('commander.', '').title()  # set name
     c.plotname = commander.getcurvename()  # set label
     c.step = False
 
+    step = all(getattr(getcurve(label), 'step', False) for label in expression.operands)
     if step:
-        shared_x = set(shared_x)
-        sendliney = ''
-        maths = [0] * len(line)
-
-        for i, val in enumerate(line):
-            dex = None
-            # Curve a-z or curve labeled @N (e.g. @27), i.e., beyond a-z?
-            if (len(val) == 1 and ord(val.upper()) <= ord('Z') and ord(val.upper()) >= ord('A')) or (val[0] == '@'):
-                dex = getCurveIndex(val, plotlist)
-                x = list(eval('plotlist[' + str(dex) + '].x'))
-                y = list(eval('plotlist[' + str(dex) + '].y'))
-
-                for xs in shared_x:
-                    if xs not in x:
-
-                        idxs = [i for i, v in enumerate(x) if v < xs]
-
-                        if not idxs:  # missing data at the beginning of the list
-                            y.insert(0, 0.0)
-                            y.insert(1, 0.0)
-                            x.insert(0, xs)
-                            x.insert(1, x[1])
-                        elif idxs[-1] + 2 > len(x):  # missing data at the end of the list
-                            y[-1] = 0.0
-                            y.insert(idxs[-1] + 1, 0.0)
-                            y.insert(idxs[-1] + 2, 0.0)
-                            x.insert(idxs[-1] + 1, xs)
-                            x.insert(idxs[-1] + 2, xs)
-                        else:  # missing data in between
-                            y.insert(idxs[-1] + 1, y[idxs[-1]])
-                            y.insert(idxs[-1] + 2, y[idxs[-1]])
-                            x.insert(idxs[-1] + 1, xs)
-                            x.insert(idxs[-1] + 2, xs)
-
-                maths[i] = np.array(y)
-                sendliney += ' maths[' + str(i) + '] '
-
-            else:
-                sendliney += val
-
-        sendliney = sendliney.lstrip()
-
-        c.x = x
-        c.y = eval(sendliney)
+        shared_x = np.unique(np.concatenate([getcurve(label).x for label in expression.operands]))
+        maths = dict()
+        for label in expression.operands:
+            cur = getcurve(label)
+            maths[label] = padstep(cur.x, cur.y, shared_x)
+
+        # the x-values of the last curve in the expression
+        last = [val for val in line if (len(val) == 1 and 'A' <= val.upper() <= 'Z') or val[0] == '@'][-1]
+        c.x = maths[last][0]
+        c.y = expression.evaluate_arrays(lambda label: maths[label][1])
         c.step = True
 
     if c.x is None or len(c.x) < 2:
@@ -180,6 +142,48 @@ def parsemath(line, plotlist, commander, xdomain):
     # pultry.updateplot()
 
 
+def padstep(x, y, xvalues):
+    """
+    Pad a step curve with the given x-values so that it can be combined point by point with other
+    step curves padded with the same x-values. Each missing x-value is inserted twice, continuing the
+    previous step. Before the first step and after the last step the curve is zero.
+
+    :param x: the sorted x-values of the step curve
+    :type x: numpy.ndarray
+    :param y: the y-values of the step curve
+    :type y: numpy.ndarray
+    :param xvalues: the sorted x-values to pad the curve with
+    :type xvalues: numpy.ndarray
+    :returns: tuple -- the padded x- and y-values
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.array(y, dtype=float)
+    missing = np.setdiff1d(xvalues, x)
+
+    below = missing[missing < x[0]]
+    above = missing[missing > x[-1]]
+    between = missing[(missing > x[0]) & (missing < x[-1])]
+
+    # missing data in between continues the previous step
+    idx = np.searchsorted(x, between, side='left')
+    x = np.insert(x, idx.repeat(2), between.repeat(2))
+    y = np.insert(y, idx.repeat(2), y[idx - 1].repeat(2))
+
+    # missing data at the beginning of the list
+    if len(below):
+        x = np.concatenate((below.repeat(2)[1:], x[:1], x))
+        y = np.concatenate((np.zeros(2 * len(below)), y))
+
+    # missing data at the end of the list
+    if len(above):
+        y[-1] = 0.0
+        x = np.concatenate((x, above.repeat(2)))
+        y = np.concatenate((y, np.zeros(2 * len(above))))
+
+    return x, y
+
+
 def getnumberargs(line, filelist):
     """
     Get a full list of arguments from compact list or mixed notation (ex 4:11)
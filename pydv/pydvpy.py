@@ -64,7 +64,9 @@ import traceback
 import sys
 import re
 import copy
+from collections import namedtuple
 from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
 import subprocess
 
 from distutils.version import LooseVersion
@@ -75,6 +77,7 @@ import scipy.special
 import scipy.integrate
 import scipy.interpolate
 import scipy.ndimage
+import scipy.signal
 
 import matplotlib.pyplot as plt
 
@@ -310,6 +313,238 @@ def _convert_to_curvelist(curvelist):
     return curves
 
 
+def _window_sums(values, start, stop):
+    """
+    Sum values[start:stop] for every pair of window bounds using a prefix sum, so the cost does not
+    depend on the window widths. The finite values are centered on their mean before summing to limit
+    the round-off of the prefix sum, and infinities and NaNs only affect the windows that contain them.
+
+    :param values: The values to sum
+    :type values: numpy.ndarray
+    :param start: The first index of each window
+    :type start: numpy.ndarray
+    :param stop: One past the last index of each window
+    :type stop: numpy.ndarray
+    :returns: numpy.ndarray -- the sum of each window
+    """
+    values = np.asarray(values, dtype=float)
+    start = np.asarray(start)
+    stop = np.asarray(stop)
+
+    def prefix(v):
+        p = np.zeros(len(v) + 1, dtype=np.promote_types(v.dtype, np.intp))
+        np.cumsum(v, out=p[1:])
+        return p
+
+    finite = np.isfinite(values)
+    ref = np.mean(values[finite]) if finite.any() else 0.0
+    p = prefix(np.where(finite, values - ref, 0.0))
+    sums = p[stop] - p[start] + ref * (stop - start)
+
+    if not finite.all():
+        pos = prefix(values == np.inf)
+        neg = prefix(values == -np.inf)
+        nan = prefix(np.isnan(values))
+        pos = pos[stop] - pos[start]
+        neg = neg[stop] - neg[start]
+        nan = nan[stop] - nan[start]
+        sums[pos > 0] = np.inf
+        sums[neg > 0] = -np.inf
+        sums[(nan > 0) | ((pos > 0) & (neg > 0))] = np.nan
+
+    return sums
+
+
+def _padded_window_sums(values, start, stop, first, last):
+    """
+    Sum windows of values that may extend past the ends of their curve, repeating the curve's first and
+    last value for the points outside of it.
+
+    :param values: The values to sum
+    :type values: numpy.ndarray
+    :param start: The first index of each window
+    :type start: numpy.ndarray
+    :param stop: One past the last index of each window
+    :type stop: numpy.ndarray
+    :param first: The index of the first value of each window's curve
+    :type first: numpy.ndarray
+    :param last: The index of the last value of each window's curve
+    :type last: numpy.ndarray
+    :returns: numpy.ndarray -- the sum of each window
+    """
+    values = np.asarray(values, dtype=float)
+    lo = np.clip(start, first, last + 1)
+    hi = np.clip(stop, first, last + 1)
+    below = np.maximum(np.minimum(stop, first) - start, 0)
+    above = np.maximum(stop - np.maximum(start, last + 1), 0)
+
+    sums = _window_sums(values, lo, hi)
+    if below.any():
+        pad = below > 0
+        sums[pad] += values[np.broadcast_to(first, pad.shape)[pad]] * below[pad]
+    if above.any():
+        pad = above > 0
+        sums[pad] += values[np.broadcast_to(last, pad.shape)[pad]] * above[pad]
+
+    return sums
+
+
+def _window_extrema(values, start, stop, ufunc):
+    """
+    Reduce values[start:stop] with numpy.minimum or numpy.maximum for every pair of window bounds. Each
+    window is covered by two overlapping runs of 2**k values, and the extrema of the runs of each length
+    are built from those of half the length, so the cost grows with the log of the longest window.
+
+    :param values: The values to reduce
+    :type values: numpy.ndarray
+    :param start: The first index of each window
+    :type start: numpy.ndarray
+    :param stop: One past the last index of each window, after start
+    :type stop: numpy.ndarray
+    :param ufunc: numpy.minimum or numpy.maximum
+    :type ufunc: numpy.ufunc
+    :returns: numpy.ndarray -- the extremum of each window
+    """
+    values = np.asarray(values, dtype=float)
+    lengths = stop - start
+    levels = np.log2(lengths).astype(int)
+    result = np.empty(len(start))
+
+    runs = values
+    width = 1
+    for level in range(int(levels.max()) + 1 if len(levels) else 0):
+        if level:
+            runs = ufunc(runs[:-width], runs[width:])
+            width *= 2
+        windows = np.flatnonzero(levels == level)
+        result[windows] = ufunc(runs[start[windows]], runs[stop[windows] - width])
+
+    return result
+
+
+def _window_moments(values, start, stop):
+    """
+    Compute the mean and the sum of squared deviations from the mean of values[start:stop] for every pair
+    of window bounds. Each window is split into runs of 2**k values for the bits k of its length, and the
+    means and squared deviations of the runs are combined with the pairwise update of Chan et al., which
+    is free of the cancellation of sums of squares when the values are far from zero.
+
+    :param values: The values
+    :type values: numpy.ndarray
+    :param start: The first index of each window
+    :type start: numpy.ndarray
+    :param stop: One past the last index of each window, after start
+    :type stop: numpy.ndarray
+    :returns: tuple -- the mean and the sum of squared deviations of each window
+    """
+    values = np.asarray(values, dtype=float)
+    lengths = stop - start
+    count = np.zeros(len(start), dtype=np.int64)
+    means = np.zeros(len(start))
+    m2 = np.zeros(len(start))
+    position = np.array(start, dtype=np.intp)
+
+    run_means = values
+    run_m2 = np.where(np.isfinite(values), 0.0, np.nan)
+    width = 1
+    while len(lengths) and width <= lengths.max():
+        if width > 1:
+            half = width // 2
+            delta = run_means[half:] - run_means[:-half]
+            run_m2 = run_m2[:-half] + run_m2[half:] + delta * delta * (half / 2)
+            run_means = run_means[:-half] + delta / 2
+
+        windows = np.flatnonzero(lengths & width)
+        p = position[windows]
+        n = count[windows]
+        total = n + width
+        delta = run_means[p] - means[windows]
+        first = n == 0
+        means[windows] = np.where(first, run_means[p], means[windows] + delta * (width / total))
+        m2[windows] = np.where(first, run_m2[p], m2[windows] + run_m2[p] + delta * delta * (n * width / total))
+        count[windows] = total
+        position[windows] += width
+        width *= 2
+
+    return means, m2
+
+
+def _window_quantiles(values, start, stop, q, width=None, chunk=2**20):
+    """
+    Compute the q-th quantile of values[start:stop] for every pair of window bounds like numpy.quantile.
+    Windows of exactly width values are read from scipy.ndimage.rank_filter at the ranks on either side
+    of the quantile. The other windows are gathered into rows padded to the longest window and sorted,
+    about chunk values at a time.
+
+    :returns: numpy.ndarray -- the quantile of each window
+    """
+    values = np.asarray(values, dtype=float)
+    lengths = stop - start
+    nans = np.concatenate(([0], np.cumsum(np.isnan(values))))
+    result = np.empty(len(start))
+
+    rest = np.arange(len(start))
+    if width is not None and width <= len(values):
+        full = lengths == width
+        rest = rest[~full]
+        # The filter's window is centered, so it covers start:start + width at start + width // 2
+        position = q * (width - 1)
+        lower = int(np.floor(position))
+        fraction = position - lower
+        at = start[full] + width // 2
+        # NaNs upset the filter's order for the windows after them, the windows that hold them are NaN anyway
+        filled = np.where(np.isnan(values), np.inf, values) if nans[-1] else values
+        low = scipy.ndimage.rank_filter(filled, lower, size=width, mode='nearest')[at]
+        if fraction > 0:
+            high = scipy.ndimage.rank_filter(filled, lower + 1, size=width, mode='nearest')[at]
+            with np.errstate(invalid='ignore'):
+                low = low + (high - low) * fraction
+        result[full] = low
+
+    longest = int(lengths[rest].max()) if len(rest) else 1
+    columns = np.arange(longest)
+    rows = max(chunk // longest, 1)
+    for first in range(0, len(rest), rows):
+        windows = rest[first:first + rows]
+        s = start[windows]
+        n = lengths[windows]
+        inside = columns < n[:, None]
+        block = np.where(inside, values[np.where(inside, s[:, None] + columns, 0)], np.inf)
+        block.sort(axis=1)
+
+        position = q * (n - 1)
+        lower = np.floor(position).astype(int)
+        fraction = position - lower
+        r = np.arange(len(s))
+        low = block[r, lower]
+        high = block[r, np.minimum(lower + 1, n - 1)]
+        with np.errstate(invalid='ignore'):
+            result[windows] = np.where(fraction > 0, low + (high - low) * fraction, low)
+
+    result[nans[stop] > nans[start]] = np.nan
+    return result
+
+
+def _segments(curves):
+    """
+    Concatenate the data of a list of curves so they can be processed in one pass.
+
+    :param curves: The list of curves
+    :type curves: list
+    :returns: tuple -- the concatenated x- and y-values, the offset of each point's curve in the
+              concatenated arrays, each point's index within its curve and the length of each point's curve
+    """
+    lengths = np.array([len(c.x) for c in curves], dtype=int)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    n = np.repeat(lengths, lengths)
+    i = np.arange(len(n)) - offsets
+
+    x = np.concatenate([np.asarray(c.x, dtype=float) for c in curves]) if curves else np.empty(0)
+    y = np.concatenate([np.asarray(c.y, dtype=float) for c in curves]) if curves else np.empty(0)
+
+    return x, y, offsets, i, n
+
+
 def create_plot(curvelist,
                 fname=None,
                 ftype='png',
@@ -851,6 +1086,89 @@ def readsina(fname, verbose=False):
 ################## Math Functions  #####################  # noqa e266
 ########################################################
 
+def set_lazy(flag=True):
+    """
+    Turn lazy mode on or off. In lazy mode the element-wise math functions, such as log, mx, dy
+    and sqr, only record the operation on the curve. The operations recorded for a curve are
+    applied together in one pass, without intermediate arrays, when the curve's values are next
+    used, e.g. to plot or save the curve or by a function that is not element-wise.
+
+    >>> pydvpy.set_lazy(True)
+
+    >>> pydvpy.log(curves)
+
+    >>> pydvpy.mx(curves, 2)
+
+    >>> pydvpy.save('log.txt', curves)
+
+    :param flag: True to record element-wise operations, False to apply them immediately
+    :type flag: bool
+    :return: bool -- the previous setting
+    """
+    previous = curve.LAZY
+    curve.LAZY = bool(flag)
+    return previous
+
+
+def set_grid(policy=None):
+    """
+    Set the grid that binary curve math, such as a + b or pydvpy.add, is evaluated on. The union of
+    the curves' x-values keeps every point but the number of points grows with every operation of a
+    chained expression. The other policies keep the size of the result bounded.
+
+    >>> pydvpy.set_grid('left')
+
+    >>> pydvpy.set_grid(1000)
+
+    :param policy: 'union' for the union of both curves' x-values, 'left' for the left curve's x-values,
+                   'finest' or 'coarsest' for the x-values of the curve with the smaller or larger average
+                   spacing, or a number of points for a uniform grid over the overlap of both curves.
+                   None leaves the policy unchanged.
+    :type policy: str or int, optional
+    :return: str or int -- the previous policy
+    """
+    previous = curve.GRID
+    if policy is not None:
+        curve.GRID = curve.check_grid_policy(policy)
+    return previous
+
+
+def cache_info():
+    """
+    Get the statistics of the cache of derived results. Functions such as derivative, fft, fit,
+    convolvec and diffMeasure look up their results in the cache, keyed by the operation, the data
+    versions of their input curves and their parameters, before computing them.
+
+    >>> hits, misses, entries, nbytes, budget = pydvpy.cache_info()
+
+    :return: CacheInfo -- the hits, misses, number of entries, size in bytes and budget in bytes of the cache
+    """
+    return curve.result_cache.info()
+
+
+def cache_clear():
+    """
+    Discard every result in the cache of derived results and reset its hit and miss counts.
+
+    >>> pydvpy.cache_clear()
+    """
+    curve.result_cache.clear()
+
+
+def cache_budget(nbytes):
+    """
+    Set the most bytes of data the cache of derived results holds. The least recently used results
+    are discarded first. A budget of 0 turns the cache off.
+
+    >>> pydvpy.cache_budget(512 * 2**20)
+
+    :param nbytes: the budget in bytes
+    :type nbytes: int
+    """
+    curve.result_cache.budget = int(nbytes)
+    curve.result_cache.evict()
+
+
 def cos(curvelist):
     """
     Take the cosine of y values of a Curve or list of Curves.
@@ -867,7 +1185,7 @@ def cos(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.cos(cur.y)
+        cur.transform('y', np.cos)
 
 
 def cosx(curvelist):
@@ -886,7 +1204,7 @@ def cosx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.cos(cur.x)
+        cur.transform('x', np.cos)
 
 
 def cosh(curvelist):
@@ -905,7 +1223,7 @@ def cosh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.cosh(cur.y)
+        cur.transform('y', np.cosh)
 
 
 def coshx(curvelist):
@@ -924,7 +1242,7 @@ def coshx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.cosh(cur.x)
+        cur.transform('x', np.cosh)
 
 
 def acosh(curvelist):
@@ -943,7 +1261,7 @@ def acosh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.arccosh(cur.y)
+        cur.transform('y', np.arccosh)
 
 
 def acoshx(curvelist):
@@ -962,7 +1280,7 @@ def acoshx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.arccosh(cur.x)
+        cur.transform('x', np.arccosh)
 
 
 def acos(curvelist):
@@ -981,7 +1299,7 @@ def acos(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.arccos(cur.y)
+        cur.transform('y', np.arccos)
 
 
 def acosx(curvelist):
@@ -1000,7 +1318,7 @@ def acosx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.arccos(cur.x)
+        cur.transform('x', np.arccos)
 
 
 def sin(curvelist):
@@ -1017,7 +1335,7 @@ def sin(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.sin(cur.y)
+        cur.transform('y', np.sin)
 
 
 def sinx(curvelist):
@@ -1034,7 +1352,7 @@ def sinx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.sin(cur.x)
+        cur.transform('x', np.sin)
 
 
 def sinh(curvelist):
@@ -1051,7 +1369,7 @@ def sinh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.sinh(cur.y)
+        cur.transform('y', np.sinh)
 
 
 def sinhx(curvelist):
@@ -1068,7 +1386,7 @@ def sinhx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.sinh(cur.x)
+        cur.transform('x', np.sinh)
 
 
 def asinh(curvelist):
@@ -1085,7 +1403,7 @@ def asinh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.asinh(cur.y)
+        cur.transform('y', np.asinh)
 
 
 def asinhx(curvelist):
@@ -1102,7 +1420,7 @@ def asinhx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.asinh(cur.x)
+        cur.transform('x', np.asinh)
 
 
 def asin(curvelist):
@@ -1119,7 +1437,7 @@ def asin(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.asin(cur.y)
+        cur.transform('y', np.asin)
 
 
 def asinx(curvelist):
@@ -1136,7 +1454,7 @@ def asinx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.asin(cur.x)
+        cur.transform('x', np.asin)
 
 
 def tan(curvelist):
@@ -1153,7 +1471,7 @@ def tan(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.tan(cur.y)
+        cur.transform('y', np.tan)
 
 
 def tanx(curvelist):
@@ -1170,7 +1488,7 @@ def tanx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.tan(cur.x)
+        cur.transform('x', np.tan)
 
 
 def tanh(curvelist):
@@ -1187,7 +1505,7 @@ def tanh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.tanh(cur.y)
+        cur.transform('y', np.tanh)
 
 
 def tanhx(curvelist):
@@ -1204,7 +1522,7 @@ def tanhx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.tanh(cur.x)
+        cur.transform('x', np.tanh)
 
 
 def atan(curvelist):
@@ -1221,7 +1539,7 @@ def atan(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.atan(cur.y)
+        cur.transform('y', np.atan)
 
 
 def atanx(curvelist):
@@ -1238,7 +1556,7 @@ def atanx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.atan(cur.x)
+        cur.transform('x', np.atan)
 
 
 def atanh(curvelist):
@@ -1255,7 +1573,7 @@ def atanh(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.atanh(cur.y)
+        cur.transform('y', np.atanh)
 
 
 def atanhx(curvelist):
@@ -1272,7 +1590,7 @@ def atanhx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.atanh(cur.x)
+        cur.transform('x', np.atanh)
 
 
 def atan2(c1, c2, t=None):
@@ -1303,7 +1621,7 @@ def atan2(c1, c2, t=None):
     return c
 
 
-def add(curvelist):
+def add(curvelist, grid=None):
     """
     Add one or more curves.
 
@@ -1311,20 +1629,23 @@ def add(curvelist):
 
     >>> c = pydvpy.add(curves)
 
+    >>> c = pydvpy.add(curves, grid='left')
+
     :param curvelist: The list of curves
     :type curvelist: list
+    :param grid: The grid policy, see set_grid. Defaults to the session's policy.
+    :type grid: str or int, optional
     :returns: curve -- the curve containing the sum of the curves in curvelist
     """
 
     numcurves = len(curvelist)
     if numcurves > 1:
         name = curvelist[0].name
-        sendline = 'curvelist[' + str(0) + ']'
         for i in range(1, numcurves):
             name += ' + ' + curvelist[i].name
-            sendline += '+ curvelist[' + str(i) + ']'
 
-        c = eval(sendline)
+        expression = curve.compile_expression(' + '.join('@%d' % i for i in range(numcurves)))
+        c = expression.evaluate(lambda label: curvelist[int(label[1:])], grid=grid)
         c.name = name
 
         if c.x is None or len(c.x) < 2:
@@ -1338,7 +1659,7 @@ def add(curvelist):
         return curvelist
 
 
-def subtract(curvelist):
+def subtract(curvelist, grid=None):
     """
     Take difference of curves.
 
@@ -1348,18 +1669,19 @@ def subtract(curvelist):
 
     :param curvelist: The list of curves
     :type curvelist: list
+    :param grid: The grid policy, see set_grid. Defaults to the session's policy.
+    :type grid: str or int, optional
     :returns: curve -- the curve containing the difference of the curves
     """
 
     numcurves = len(curvelist)
     if numcurves > 1:
         name = curvelist[0].name
-        sendline = 'curvelist[' + str(0) + ']'
         for i in range(1, numcurves):
             name += ' - ' + curvelist[i].name
-            sendline += '- curvelist[' + str(i) + ']'
 
-        c = eval(sendline)
+        expression = curve.compile_expression(' - '.join('@%d' % i for i in range(numcurves)))
+        c = expression.evaluate(lambda label: curvelist[int(label[1:])], grid=grid)
         c.name = name
 
         if c.x is None or len(c.x) < 2:
@@ -1373,7 +1695,7 @@ def subtract(curvelist):
         return curvelist
 
 
-def multiply(curvelist):
+def multiply(curvelist, grid=None):
     """
     Take product of curves.
 
@@ -1383,17 +1705,18 @@ def multiply(curvelist):
 
     :param curvelist: The list of curves
     :type curvelist: list
+    :param grid: The grid policy, see set_grid. Defaults to the session's policy.
+    :type grid: str or int, optional
     :returns: Curve -- the curve containing the product of the curves
     """
     numcurves = len(curvelist)
     if numcurves > 1:
         name = __toCurveString(curvelist[0])
-        sendline = 'curvelist[' + str(0) + ']'
         for i in range(1, numcurves):
             name += ' * ' + __toCurveString(curvelist[i])
-            sendline += '* curvelist[' + str(i) + ']'
 
-        c = eval(sendline)
+        expression = curve.compile_expression(' * '.join('@%d' % i for i in range(numcurves)))
+        c = expression.evaluate(lambda label: curvelist[int(label[1:])], grid=grid)
         c.name = name
 
         if c.x is None or len(c.x) < 2:
@@ -1407,7 +1730,7 @@ def multiply(curvelist):
         return curvelist
 
 
-def divide(curvelist):
+def divide(curvelist, grid=None):
     """
     Take quotient of curves.
 
@@ -1417,17 +1740,18 @@ def divide(curvelist):
 
     :param curvelist: The list of curves
     :type curvelist: list
+    :param grid: The grid policy, see set_grid. Defaults to the session's policy.
+    :type grid: str or int, optional
     :returns: curve -- the curve containing the quotient of the curves
     """
     numcurves = len(curvelist)
     if numcurves > 1:
         name = __toCurveString(curvelist[0])
-        sendline = 'curvelist[' + str(0) + ']'
         for i in range(1, numcurves):
             name += ' / ' + __toCurveString(curvelist[i])
-            sendline += '/ curvelist[' + str(i) + ']'
 
-        c = eval(sendline)
+        expression = curve.compile_expression(' / '.join('@%d' % i for i in range(numcurves)))
+        c = expression.evaluate(lambda label: curvelist[int(label[1:])], grid=grid)
         c.name = name
 
         if c.x is None or len(c.x) < 2:
@@ -1459,7 +1783,7 @@ def divx(curvelist, value):
     for c in curves:
         if float(value) == 0:
             value = 1.e-10
-        c.x /= float(value)
+        c.transform('x', np.divide, float(value), inplace=True)
 
 
 def divy(curvelist, value):
@@ -1480,7 +1804,7 @@ def divy(curvelist, value):
     for c in curves:
         if float(value) == 0:
             value = 1.e-10
-        c.y /= float(value)
+        c.transform('y', np.divide, float(value), inplace=True)
 
 
 def dx(curvelist, value):
@@ -1502,7 +1826,7 @@ def dx(curvelist, value):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x += float(value)
+        c.transform('x', np.add, float(value), inplace=True)
 
 
 def dy(curvelist, value):
@@ -1524,7 +1848,7 @@ def dy(curvelist, value):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y += float(value)
+        c.transform('y', np.add, float(value), inplace=True)
 
 
 def mx(curvelist, value):
@@ -1546,7 +1870,7 @@ def mx(curvelist, value):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x *= float(value)
+        c.transform('x', np.multiply, float(value), inplace=True)
 
 
 def my(curvelist, value):
@@ -1568,7 +1892,7 @@ def my(curvelist, value):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y *= float(value)
+        c.transform('y', np.multiply, float(value), inplace=True)
 
 
 def l1(c1, c2, xmin=None, xmax=None):
@@ -1713,7 +2037,7 @@ def abs(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.abs(cur.y)
+        cur.transform('y', np.abs)
 
 
 def absx(curvelist):
@@ -1732,7 +2056,7 @@ def absx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.abs(cur.x)
+        cur.transform('x', np.abs)
 
 
 def log(curvelist, keep=True):
@@ -1754,13 +2078,9 @@ def log(curvelist, keep=True):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        if not keep:
-            skiplist = np.where(c.y <= 0)[0]
-            if len(skiplist) > 0:
-                c.y = np.delete(c.y, skiplist)
-                c.x = np.delete(c.x, skiplist)
-
-        c.y = np.log(c.y)
+        # The compacted values are new arrays so the logarithm can overwrite them
+        compacted = not keep and _drop_nonpositive(c, 'y')
+        c.transform('y', np.log, inplace=compacted)
         if c.name[:3] == 'exp':
             c.name = c.name[4:-1]  # Pop off the exp( from the front and the ) from the back
         else:
@@ -1786,13 +2106,9 @@ def logx(curvelist, keep=True):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        if not keep:
-            skiplist = np.where(c.x <= 0)[0]
-            if len(skiplist) > 0:
-                c.y = np.delete(c.y, skiplist)
-                c.x = np.delete(c.x, skiplist)
-
-        c.x = np.log(c.x)
+        # The compacted values are new arrays so the logarithm can overwrite them
+        compacted = not keep and _drop_nonpositive(c, 'x')
+        c.transform('x', np.log, inplace=compacted)
         if c.name[:4] == 'expx':
             c.name = c.name[5:-1]  # Pop off the expx( from the front and the ) from the back
         else:
@@ -1819,13 +2135,9 @@ def log10(curvelist, keep=True):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        if not keep:
-            skiplist = np.where(c.y <= 0)[0]
-            if len(skiplist) > 0:
-                c.y = np.delete(c.y, skiplist)
-                c.x = np.delete(c.x, skiplist)
-
-        c.y = np.log10(c.y)
+        # The compacted values are new arrays so the logarithm can overwrite them
+        compacted = not keep and _drop_nonpositive(c, 'y')
+        c.transform('y', np.log10, inplace=compacted)
         c.name = 'log10(' + c.name + ')'
 
 
@@ -1849,13 +2161,9 @@ def log10x(curvelist, keep=True):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        if not keep:
-            skiplist = np.where(c.x <= 0)[0]
-            if len(skiplist) > 0:
-                c.y = np.delete(c.y, skiplist)
-                c.x = np.delete(c.x, skiplist)
-
-        c.x = np.log10(c.x)
+        # The compacted values are new arrays so the logarithm can overwrite them
+        compacted = not keep and _drop_nonpositive(c, 'x')
+        c.transform('x', np.log10, inplace=compacted)
         c.name = 'log10x(' + c.name + ')'
 
 
@@ -1875,7 +2183,7 @@ def exp(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.exp(cur.y)
+        cur.transform('y', np.exp)
 
 
 def expx(curvelist):
@@ -1894,7 +2202,7 @@ def expx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.exp(cur.x)
+        cur.transform('x', np.exp)
 
 
 def powa(curvelist, a):
@@ -1915,7 +2223,7 @@ def powa(curvelist, a):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.power(float(a), cur.y)
+        cur.transform('y', np.power, float(a), position=1)
 
 
 def powax(curvelist, a):
@@ -1936,7 +2244,7 @@ def powax(curvelist, a):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.power(float(a), cur.x)
+        cur.transform('x', np.power, float(a), position=1)
 
 
 def powr(curvelist, a):
@@ -1957,7 +2265,7 @@ def powr(curvelist, a):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.power(cur.y, float(a))
+        cur.transform('y', np.power, float(a))
 
 
 def powrx(curvelist, a):
@@ -1978,7 +2286,7 @@ def powrx(curvelist, a):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.power(cur.x, float(a))
+        cur.transform('x', np.power, float(a))
 
 
 def sqr(curvelist):
@@ -1991,7 +2299,7 @@ def sqr(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.square(cur.y)
+        cur.transform('y', np.square)
 
 
 def sqrx(curvelist):
@@ -2004,7 +2312,7 @@ def sqrx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.square(cur.x)
+        cur.transform('x', np.square)
 
 
 def sqrt(curvelist):
@@ -2017,7 +2325,7 @@ def sqrt(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.y = np.sqrt(cur.y)
+        cur.transform('y', np.sqrt)
 
 
 def sqrtx(curvelist):
@@ -2030,7 +2338,7 @@ def sqrtx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for cur in curves:
-        cur.x = np.sqrt(cur.x)
+        cur.transform('x', np.sqrt)
 
 
 def xmax(curvelist, max):
@@ -2158,7 +2466,7 @@ def yn(curvelist, n):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.yn(int(n), c.y)
+        c.transform('y', scipy.special.yn, int(n), position=1)
 
 
 def ynx(curvelist, n):
@@ -2174,7 +2482,7 @@ def ynx(curvelist, n):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.yn(int(n), c.x)
+        c.transform('x', scipy.special.yn, int(n), position=1)
 
 
 def y0(curvelist):
@@ -2188,7 +2496,7 @@ def y0(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.y0(c.y)
+        c.transform('y', scipy.special.y0)
 
 
 def y0x(curvelist):
@@ -2202,7 +2510,7 @@ def y0x(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.y0(c.x)
+        c.transform('x', scipy.special.y0)
 
 
 def y1(curvelist):
@@ -2216,7 +2524,7 @@ def y1(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.y1(c.y)
+        c.transform('y', scipy.special.y1)
 
 
 def y1x(curvelist):
@@ -2230,7 +2538,7 @@ def y1x(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.y1(c.x)
+        c.transform('x', scipy.special.y1)
 
 
 def jn(curvelist, n):
@@ -2246,7 +2554,7 @@ def jn(curvelist, n):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.jn(float(n), c.y)
+        c.transform('y', scipy.special.jn, float(n), position=1)
 
 
 def jnx(curvelist, n):
@@ -2262,7 +2570,7 @@ def jnx(curvelist, n):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.jn(int(n), c.x)
+        c.transform('x', scipy.special.jn, int(n), position=1)
 
 
 def j0(curvelist):
@@ -2276,7 +2584,7 @@ def j0(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.j0(c.y)
+        c.transform('y', scipy.special.j0)
 
 
 def j0x(curvelist):
@@ -2290,7 +2598,7 @@ def j0x(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.j0(c.x)
+        c.transform('x', scipy.special.j0)
 
 
 def j1(curvelist):
@@ -2304,7 +2612,7 @@ def j1(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = scipy.special.j1(c.y)
+        c.transform('y', scipy.special.j1)
 
 
 def j1x(curvelist):
@@ -2318,7 +2626,7 @@ def j1x(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = scipy.special.j1(c.x)
+        c.transform('x', scipy.special.j1)
 
 
 def recip(curvelist):
@@ -2337,7 +2645,7 @@ def recip(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.y = np.reciprocal(c.y)
+        c.transform('y', np.reciprocal)
 
 
 def recipx(curvelist):
@@ -2359,7 +2667,7 @@ def recipx(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        c.x = np.reciprocal(c.x)
+        c.transform('x', np.reciprocal)
 
 
 def integrate(curvelist, low=None, high=None):
@@ -2378,7 +2686,7 @@ def integrate(curvelist, low=None, high=None):
     ncurves = list()
 
     for c in curves:
-        nc = c.copy()
+        nc = c.copy(data=False)
         nc.plotname = ''
         nc.color = ''
 
@@ -2387,25 +2695,60 @@ def integrate(curvelist, low=None, high=None):
         else:
             nc.name = 'Integrate %s [%.1f,%.1f]' % (c.plotname, low, high)
 
-        if low is None:
-            low = min(nc.x)
-
-        if high is None:
-            high = max(nc.x)
-
-        r = __get_sub_range(nc.x, low, high)
-        nc.x = nc.x[r[0]:r[1] + 1]
-        nc.y = nc.y[r[0]:r[1] + 1]
-        try:
-            nc.y = np.array(scipy.integrate.cumtrapz(nc.y, nc.x, initial=0.0))
-        except:
-            nc.y = np.array(scipy.integrate.cumulative_trapezoid(nc.y, nc.x, initial=0.0))
+        # The integral over the points in range is a slice of the curve's cumulative integral
+        r = __get_sub_range(c.x, low, high)
+        if r[0] > r[1]:
+            raise ValueError('no x-values between %s and %s' % (low, high))
+        prefix = _prefix_integral(c)
+        nc.x = c.x[r[0]:r[1] + 1]
+        nc.y = prefix[r[0]:r[1] + 1] - prefix[r[0]]
 
         ncurves.append(nc)
 
     return ncurves
 
 
+def integral(curvelist, low=None, high=None):
+    """
+    Return the definite integral of each curve from low to high using the trapezoid rule.
+    The curve is interpolated at the limits, which are limited to the curve's domain.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> integrals = pydvpy.integral(curves, 0, 5)
+
+    >>> plotname, value = integrals[0]
+
+    :param curvelist: The given curve or list of curves
+    :type curvelist: Curve or list
+    :param low: The lower limit, the start of the curve by default
+    :type low: float
+    :param high: The upper limit, the end of the curve by default
+    :type high: float
+    :return: list -- A list of tuples where each tuple contains the curve name and integral
+    """
+    integrals = list()
+    curves = _convert_to_curvelist(curvelist)
+
+    for c in curves:
+        prefix = _prefix_integral(c)
+        lo = c.x[0] if low is None else low
+        hi = c.x[-1] if high is None else high
+
+        # The integral from the start of the curve to each limit
+        limits = np.clip([lo, hi], c.x[0], c.x[-1])
+        i = np.clip(np.searchsorted(c.x, limits, side='right') - 1, 0, max(len(c.x) - 2, 0))
+        j = np.minimum(i + 1, len(c.x) - 1)
+        dx = c.x[j] - c.x[i]
+        frac = np.divide(limits - c.x[i], dx, out=np.zeros(2), where=dx != 0)
+        ylimit = c.y[i] + (c.y[j] - c.y[i]) * frac
+        partial = prefix[i] + (limits - c.x[i]) * (c.y[i] + ylimit) / 2.0
+
+        integrals.append((__toCurveString(c), partial[1] - partial[0]))
+
+    return integrals
+
+
 def alpha(ac, ig, res, npts=-1):
     if npts == -1:
         npts = len(ac.y)
@@ -2453,22 +2796,35 @@ def gaussian(amp, wid, center, num=100, nsd=3):
     return cc
 
 
-def getymax(c, xmin=None, xmax=None):
+def _extremum(c, xmin, xmax, kind):
     """
-    Get the maximum y-value for the curve within the specified domain.
-
-    :param c: the curve
-    :type Curve:
-    :param xmin: the minimum x-value for the sub-domain
-    :type xmin: float, optional
-    :param xmax: the maximum x-value for the sub-domain
-    :type xmax: float, optional
-    :return: str -- curve name
-             list -- a list of tuples where each tuple contains the x-value and
-             the max y-value.
+    Get the (x, y) pairs where the curve, sampled at its points in [xmin, xmax] and
+    interpolated at xmin and xmax, attains its maximum or minimum y-value.
     """
+
     xl = c.x[0] if xmin is None else xmin
     xr = c.x[-1] if xmax is None else xmax
+    best = np.max if kind == 'max' else np.min
+
+    if c.math_interp_period is None and c.increasing():
+        # Query the points inside the window from the range index and only
+        # interpolate at the window edges.
+        lo, hi = c.window(xl, xr)
+        ends = [e for e in sorted(set([xl, xr])) if not (lo < hi and (e == c.x[lo] or e == c.x[hi - 1]))]
+        y_ends = np.interp(ends, c.x, c.y, left=c.math_interp_left, right=c.math_interp_right)
+
+        index = c.range_index()
+        candidates = list(y_ends)
+        if lo < hi:
+            candidates.append(index.max(lo, hi) if kind == 'max' else index.min(lo, hi))
+        target = best(candidates)
+
+        xypairs = [(e, ye) for e, ye in zip(ends, y_ends) if ye == target]
+        if lo < hi:
+            xypairs.extend((c.x[i], c.y[i]) for i in index.where_equal(target, lo, hi))
+        xypairs.sort(key=lambda xy: xy[0])
+        return xypairs
+
     domain = list(c.x[np.where(np.logical_and(c.x >= xl, c.x <= xr))])
     domain.extend([xl, xr])
     domain = list(set(domain))
@@ -2478,18 +2834,18 @@ def getymax(c, xmin=None, xmax=None):
                          right=c.math_interp_right,
                          period=c.math_interp_period)
 
-    indices = np.where(y_interp == np.max(y_interp))[0]
+    indices = np.where(y_interp == best(y_interp))[0]
 
     xypairs = list()
     for index in indices:
         xypairs.append((domain[index], y_interp[index]))
 
-    return __toCurveString(c), xypairs
+    return xypairs
 
 
-def getymin(c, xmin=None, xmax=None):
+def getymax(c, xmin=None, xmax=None):
     """
-    Get the minimum y-value for the curve within the specified domain.
+    Get the maximum y-value for the curve within the specified domain.
 
     :param c: the curve
     :type Curve:
@@ -2499,26 +2855,26 @@ def getymin(c, xmin=None, xmax=None):
     :type xmax: float, optional
     :return: str -- curve name
              list -- a list of tuples where each tuple contains the x-value and
-             the min y-value.
+             the max y-value.
     """
-    xl = c.x[0] if xmin is None else xmin
-    xr = c.x[-1] if xmax is None else xmax
-    domain = list(c.x[np.where(np.logical_and(c.x >= xl, c.x <= xr))])
-    domain.extend([xl, xr])
-    domain = list(set(domain))
-    domain.sort()
-    y_interp = np.interp(domain, c.x, c.y,
-                         left=c.math_interp_left,
-                         right=c.math_interp_right,
-                         period=c.math_interp_period)
+    return __toCurveString(c), _extremum(c, xmin, xmax, 'max')
 
-    indices = np.where(y_interp == np.min(y_interp))[0]
 
-    xypairs = list()
-    for index in indices:
-        xypairs.append((domain[index], y_interp[index]))
+def getymin(c, xmin=None, xmax=None):
+    """
+    Get the minimum y-value for the curve within the specified domain.
 
-    return __toCurveString(c), xypairs
+    :param c: the curve
+    :type Curve:
+    :param xmin: the minimum x-value for the sub-domain
+    :type xmin: float, optional
+    :param xmax: the maximum x-value for the sub-domain
+    :type xmax: float, optional
+    :return: str -- curve name
+             list -- a list of tuples where each tuple contains the x-value and
+             the min y-value.
+    """
+    return __toCurveString(c), _extremum(c, xmin, xmax, 'min')
 
 
 def cumsum(c1):
@@ -2537,9 +2893,19 @@ def cumsum(c1):
     return nc
 
 
-def correlate(c1, c2, mode='valid'):
+def correlate(c1, c2, mode='valid', method='auto', normalize=False, maxlag=None):
     """
     Computes the cross-correlation of two 1D sequences (c1.y and c2.y) as defined by numpy.correlate.
+    Both curves are first interpolated onto the same uniform spacing. The x-values of the new curve are
+    the lags of c1 relative to c2 in the curves' x units, so a peak at a positive lag means c1 is
+    delayed relative to c2.
+
+    The direct method sums the products of the curves at each lag and costs about N*M operations,
+    the FFT method costs about (N+M)*log(N+M) operations and is much faster for long curves.
+
+    >>> nc = pydvpy.correlate(c1, c2, 'same')
+
+    >>> nc = pydvpy.correlate(c1, c2, 'full', normalize=True, maxlag=2.5)
 
     :param c1: The first curve with 1D input sequence c1.y
     :type c1: Curve
@@ -2562,16 +2928,62 @@ def correlate(c1, c2, mode='valid'):
           for points where the signals overlap completely.  Values outside
           the signal boundary have no effect.
     :type mode: 'full'(default), 'same' or 'valid'
+    :param method: 'direct', 'fft' or 'auto' to pick the faster of the two from the sizes of the curves
+    :type method: str
+    :param normalize: If True, divide by the root of the product of the curves' energies so that the
+                      correlation is 1 where the curves match exactly
+    :type normalize: bool
+    :param maxlag: If given, only compute the lags from -maxlag to maxlag
+    :type maxlag: float
     :return: Curve -- the cross-correlation of c1.y and c2.y
     """
+    if method not in ('auto', 'direct', 'fft'):
+        raise ValueError("{} is not a supported option for method".format(method))
+
     ic1, step = curve.interp1d(c1, len(c1.x), True)
-    c2npts = (max(c2.x) - min(c2.x)) / step
+    # Sample c2 with the spacing of c1 so that every lag is a whole number of steps
+    c2npts = round((np.max(c2.x) - np.min(c2.x)) / step) + 1
     ic2 = curve.interp1d(c2, c2npts)
+    y1 = np.asarray(ic1.y)
+    y2 = np.asarray(ic2.y)
+    n = len(y1)
+    m = len(y2)
+
+    # The lags, in samples of c1 relative to c2, that numpy.correlate returns for the mode
+    if mode == 'full':
+        first = 1 - m
+        count = n + m - 1
+    elif mode == 'same':
+        first = ((m - 1) // 2 if n >= m else n // 2) + 1 - m
+        count = max(n, m)
+    elif mode == 'valid':
+        first = min(n, m) - m
+        count = max(n, m) - min(n, m) + 1
+    else:
+        raise ValueError("{} is not a supported option for mode".format(mode))
+
+    lags = np.arange(first, first + count)
+    x = (ic1.x[0] - ic2.x[0]) + lags * step
+    windowed = maxlag is not None
+    if windowed:
+        inside = np.abs(x) <= maxlag
+        lags = lags[inside]
+        x = x[inside]
+
+    if method == 'auto':
+        # Measured costs of a dot product per lag against an FFT of both curves
+        direct = len(lags) * (min(n, m) + (1000 if windowed else 0))
+        method = 'direct' if direct <= 10 * (n + m) * np.log2(n + m) else 'fft'
+
+    if method == 'fft':
+        y = scipy.signal.fftconvolve(y1, y2[::-1], mode='full')[lags + m - 1]
+    elif windowed:
+        y = np.array([np.dot(y1[max(lag, 0):min(n, m + lag)], y2[max(-lag, 0):min(m, n - lag)]) for lag in lags])
+    else:
+        y = np.correlate(y1, y2, mode)
 
-    y = np.correlate(ic1.y, ic2.y, mode)
-    start = min([min(ic1.x), min(ic2.x)])
-    stop = max([max(ic1.x), max(ic2.x)])
-    x = np.linspace(start, stop, num=len(y))
+    if normalize:
+        y = y / np.sqrt(np.dot(y1, y1) * np.dot(y2, y2))
 
     nc = makecurve(x=x,
                    y=y,
@@ -2659,7 +3071,7 @@ def convolve(c1, c2, npts=100, norm=True, debug=False):
     return
 
 
-def convolvec(c1, c2, npts=100, npts_interp=100, debug=False):
+def convolvec(c1, c2, npts=100, npts_interp=100, debug=False, method='direct', rtol=1e-2):
     """
     Computes the convolution of the two given curves:
     -
@@ -2678,13 +3090,17 @@ def convolvec(c1, c2, npts=100, npts_interp=100, debug=False):
     :type npts_interp: int
     :param debug: Used only in CLI, plots curves and c2 h(x-t) as it moves
     :type debug: bool
+    :param method: 'direct' to integrate directly or 'fft' to use an FFT, see convolve_int
+    :type method: str
+    :param rtol: the largest difference between the FFT and direct methods relative to the largest value
+    :type rtol: float
     :return: Curve -- the convolution of the two curves c1 and c2 using integration and no normalization
     """
 
-    return convolve_int(c1, c2, False, npts, npts_interp, debug)
+    return convolve_int(c1, c2, False, npts, npts_interp, debug, method, rtol)
 
 
-def convolveb(c1, c2, npts=100, npts_interp=100, debug=False):
+def convolveb(c1, c2, npts=100, npts_interp=100, debug=False, method='direct', rtol=1e-2):
     """
     Computes the convolution of the two given curves:
     -
@@ -2703,21 +3119,27 @@ def convolveb(c1, c2, npts=100, npts_interp=100, debug=False):
     :type npts_interp: int
     :param debug: Used only in CLI, plots curves and c2 h(x-t) as it moves
     :type debug: bool
+    :param method: 'direct' to integrate directly or 'fft' to use an FFT, see convolve_int
+    :type method: str
+    :param rtol: the largest difference between the FFT and direct methods relative to the largest value
+    :type rtol: float
     :return: Curve -- the convolution of the two curves c1 and c2 using integration and normalizing by c2
     """
 
-    return convolve_int(c1, c2, True, npts, npts_interp, debug)
+    return convolve_int(c1, c2, True, npts, npts_interp, debug, method, rtol)
 
 
-def convolve_int(c1, c2, norm=True, npts=100, npts_interp=100, debug=False):
+def convolve_int(c1, c2, norm=True, npts=100, npts_interp=100, debug=False, method='direct', rtol=1e-2):
     """
     Computes the convolution of the two given curves:
     -
     -   norm=False: ``(g*h)(x) = Int(-inf, inf, dt*g(t)*h(x-t))``
     -   norm=True : ``(g*h)(x) = Int(-inf, inf, dt*g(t)*h(x-t)) / Int(-inf, inf, dt*h(t))``
     -
-    This computes the integrals directly which avoid padding and aliasing
-    problems associated with FFT methods (it is however slower).
+    The direct method computes the integrals directly which avoid padding and aliasing
+    problems associated with FFT methods. The FFT method resamples both curves onto a uniform
+    grid and is much faster for large curves. Its result is checked against the direct method
+    at a few positions and the direct method is used instead if they differ by more than rtol.
 
     :param c1: (N,) The first curve g(t)
     :type c1: Curve
@@ -2731,71 +3153,67 @@ def convolve_int(c1, c2, norm=True, npts=100, npts_interp=100, debug=False):
     :type npts_interp: int
     :param debug: Used only in CLI, plots curves and c2 h(x-t) as it moves
     :type debug: bool
+    :param method: 'direct' to integrate directly or 'fft' to use an FFT
+    :type method: str
+    :param rtol: the largest difference between the FFT and direct methods relative to the largest value
+    :type rtol: float
     :return: nc: Curve -- the convolution of the two curves c1 and c2
     """
 
-    c1_copy = copy.deepcopy(c1)  # g(t)
-    c2_copy = copy.deepcopy(c2)  # h(t)
-
-    c2_original = copy.deepcopy(c2)
+    def compute():
+        c1_copy = copy.deepcopy(c1)  # g(t)
+        c2_copy = copy.deepcopy(c2)  # h(t)
 
-    c2_copy.x = np.flip(c2_copy.x) * float(-1)
-    c2_copy.y = np.flip(c2_copy.y)
+        c2_original = copy.deepcopy(c2)
 
-    dom_c1 = getdomain(c1_copy)
-    dom_c2 = getdomain(c2_copy)
+        c2_copy.x = np.flip(c2_copy.x) * float(-1)
+        c2_copy.y = np.flip(c2_copy.y)
 
-    # Start of g(t)
-    xmn = dom_c1[0][1]
-    # End of g(t) + domain of h(t)
-    xmx = dom_c1[0][2] + (dom_c2[0][2] - dom_c2[0][1])
+        dom_c1 = getdomain(c1_copy)
+        dom_c2 = getdomain(c2_copy)
 
-    # Moving end of h(t) to start of g(t)
-    c2_copy.x += float(xmn) - dom_c2[0][2]
+        # Start of g(t)
+        xmn = dom_c1[0][1]
+        # End of g(t) + domain of h(t)
+        xmx = dom_c1[0][2] + (dom_c2[0][2] - dom_c2[0][1])
 
-    # Delta x is domain of combined domains
-    delx = (xmx - xmn) / (npts)
+        # Delta x is domain of combined domains
+        delx = (xmx - xmn) / (npts)
 
-    def _integ(cr1, cr2, xcur, xval, yval, iter):
+        # Every position of h(x-t), starting with the end of h(t) at the start of g(t)
+        x = float(xmn) - dom_c2[0][2] + delx * np.arange(npts)
 
-        while iter < npts:
+        engine = method
+        if engine == 'fft':
+            y = _convolve_fft(c1_copy.x, c1_copy.y, c2_copy.x, c2_copy.y, x, npts_interp)
 
-            # Current overlap of g(t) and h(t)
-            overlap = list(cr1.x[np.where(np.logical_and(cr1.x >= cr2.x[0], cr1.x <= cr2.x[-1]))])
-            overlap.extend(list(cr2.x[np.where(np.logical_and(cr2.x >= xmn, cr2.x <= cr1.x[-1]))]))
-            overlap = list(set(overlap))
-            overlap.sort()
+            # Check the FFT result against the direct integration at a few positions
+            check = np.unique(np.linspace(0, npts - 1, min(npts, 9)).astype(int))
+            ydirect = _convolve_direct(c1_copy.x, c1_copy.y, c2_copy.x, c2_copy.y, x[check], npts_interp)
+            scale = np.max(np.abs(ydirect))
+            err = np.max(np.abs(y[check] - ydirect)) / scale if scale > 0 else np.max(np.abs(y[check]))
+            if err > rtol:
+                print('Warning: FFT convolution differs from direct integration by %.3e, '
+                      'using direct integration' % err)
+                engine = 'direct'
 
-            # np.linespace() between first and last overlap
-            overlap_interp_points = np.linspace(overlap[0], overlap[-1], npts_interp) if overlap else overlap
+        if engine == 'direct':
+            y = _convolve_direct(c1_copy.x, c1_copy.y, c2_copy.x, c2_copy.y, x, npts_interp)
+        elif engine != 'fft':
+            raise ValueError("method must be 'direct' or 'fft', not '{}'".format(method))
 
-            # Adding np.linespace() points to original overlap points
-            overlap.extend(overlap_interp_points)
-            overlap = list(set(overlap))
-            overlap.sort()
+        if norm:
+            area0 = scipy.integrate.trapezoid(c2_original.y, c2_original.x)
+            y /= area0
 
-            new_y1 = np.interp(overlap, cr1.x, cr1.y)
-            new_y2 = np.interp(overlap, cr2.x, cr2.y)
-            new_y = new_y1 * new_y2
+        return x, y
 
-            area = scipy.integrate.trapezoid(new_y, overlap)
-
-            cr2.x += delx
-            xval.append(xcur)
-            yval.append(area)
-            iter += 1
-            xcur += delx
-            # return _integ(cr1, cr2, xcur + delx, xval, yval, iter)
-
-        return xval, yval
-
-    x, y = _integ(c1_copy, c2_copy, float(xmn) - dom_c2[0][2], [], [], 0)
+    key = ('convolve', c1.version, c2.version, norm, npts, npts_interp, method, rtol)
+    x, y = curve.result_cache.lookup(key, compute)
 
     namestr = f'Conv {c1.plotname} * {c2.plotname}'
     if norm:
         namestr = f'(Conv {c1.plotname} * {c2.plotname})/Area({c2.plotname})'
-        area0 = scipy.integrate.trapezoid(c2_original.y, c2_original.x)
-        y /= area0
 
     nc = makecurve(x=x,
                    y=y,
@@ -2804,6 +3222,121 @@ def convolve_int(c1, c2, norm=True, npts=100, npts_interp=100, debug=False):
     return nc
 
 
+def _ranges(starts, counts):
+    """
+    Concatenate the index ranges starts[k]:starts[k] + counts[k].
+
+    :returns: numpy.ndarray -- the indices of the ranges, in order
+    """
+    counts = np.asarray(counts)
+    ends = np.cumsum(counts)
+    return np.repeat(np.asarray(starts) - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _convolve_direct(x1, y1, x2, y2, shifts, npts_interp, chunk_size=2**22):
+    """
+    Integrate g(t)*h(x-t) for every shift of the reversed curve h by integrating over the points of
+    both curves in their overlap plus npts_interp evenly spaced points. All shifts are computed in
+    batches of about chunk_size points.
+
+    :param x1: the sorted x-values of g(t)
+    :param y1: the y-values of g(t)
+    :param x2: the sorted x-values of the reversed h
+    :param y2: the y-values of the reversed h
+    :param shifts: the shifts of the reversed h
+    :param npts_interp: the number of evenly spaced points in each overlap
+    :returns: numpy.ndarray -- the integral for each shift
+    """
+    x1 = np.asarray(x1, dtype=float)
+    x2 = np.asarray(x2, dtype=float)
+    shifts = np.asarray(shifts, dtype=float)
+    areas = np.zeros(len(shifts))
+    per_shift = len(x1) + len(x2) + npts_interp
+    step = max(1, chunk_size // per_shift)
+
+    for begin in range(0, len(shifts), step):
+        off = shifts[begin:begin + step]
+        k = np.arange(len(off))
+
+        # Points of g(t) under the shifted h and points of the shifted h over g(t)
+        lo1 = np.searchsorted(x1, x2[0] + off, side='left')
+        n1 = np.searchsorted(x1, x2[-1] + off, side='right') - lo1
+        lo2 = np.searchsorted(x2, x1[0] - off, side='left')
+        n2 = np.searchsorted(x2, x1[-1] - off, side='right') - lo2
+        n2 = np.maximum(n2, 0)
+        n1 = np.maximum(n1, 0)
+        has = (n1 + n2) > 0
+
+        pts1 = x1[_ranges(lo1, n1)]
+        pts2 = x2[_ranges(lo2, n2)] + np.repeat(off, n2)
+
+        # Evenly spaced points between the first and last overlap points
+        first = np.minimum(np.where(n1 > 0, x1[np.minimum(lo1, len(x1) - 1)], np.inf),
+                           np.where(n2 > 0, x2[np.minimum(lo2, len(x2) - 1)] + off, np.inf))
+        last = np.maximum(np.where(n1 > 0, x1[np.minimum(lo1 + n1 - 1, len(x1) - 1)], -np.inf),
+                          np.where(n2 > 0, x2[np.minimum(lo2 + n2 - 1, len(x2) - 1)] + off, -np.inf))
+        lin = np.linspace(first[has], last[has], npts_interp, axis=1).ravel()
+
+        seg = np.concatenate((np.repeat(k, n1), np.repeat(k, n2), np.repeat(k[has], npts_interp)))
+        x = np.concatenate((pts1, pts2, lin))
+        order = np.lexsort((x, seg))
+        seg = seg[order]
+        x = x[order]
+        keep = np.ones(len(x), dtype=bool)
+        keep[1:] = (seg[1:] != seg[:-1]) | (x[1:] != x[:-1])
+        seg = seg[keep]
+        x = x[keep]
+
+        y = np.interp(x, x1, y1) * np.interp(x - off[seg], x2, y2)
+
+        # Trapezoid rule within each shift
+        same = seg[1:] == seg[:-1]
+        trap = (x[1:] - x[:-1]) * (y[1:] + y[:-1]) / 2.0
+        areas[begin:begin + step] = np.bincount(seg[:-1][same], weights=trap[same], minlength=len(off))
+
+    return areas
+
+
+def _convolve_fft(x1, y1, x2, y2, shifts, npts_interp, max_points=2**22):
+    """
+    Integrate g(t)*h(x-t) for every shift of the reversed curve h by resampling both curves onto a
+    uniform grid and correlating them with an FFT.
+
+    The grid spacing is the smaller of the spacing of npts_interp points over the shorter curve and
+    the median spacing of the points of each curve, limited to max_points points in all.
+
+    :returns: numpy.ndarray -- the integral for each shift
+    """
+    x1 = np.asarray(x1, dtype=float)
+    x2 = np.asarray(x2, dtype=float)
+    span1 = x1[-1] - x1[0]
+    span2 = x2[-1] - x2[0]
+
+    h = min(span1, span2) / max(npts_interp - 1, 1)
+    for dx in (np.diff(x1), np.diff(x2)):
+        dx = dx[dx > 0]
+        if len(dx):
+            h = min(h, np.median(dx))
+    h = max(h, (span1 + span2) / max_points)
+    if not h > 0:
+        return _convolve_direct(x1, y1, x2, y2, shifts, npts_interp)
+
+    t1 = x1[0] + h * np.arange(int(np.ceil(span1 / h)) + 1)
+    t2 = x2[0] + h * np.arange(int(np.ceil(span2 / h)) + 1)
+    g = np.interp(t1, x1, y1, left=0.0, right=0.0)
+    f = np.interp(t2, x2, y2, left=0.0, right=0.0)
+
+    # The trapezoid rule gives half weight to the ends of the product's support
+    g[0] *= 0.5
+    f[-1] *= 0.5
+
+    # corr[m] = h * sum_j g[j + m] f[j], the integral for a shift of t1[0] - t2[0] + m * h
+    corr = scipy.signal.fftconvolve(g, f[::-1], mode='full') * h
+    lags = t1[0] - t2[0] + h * np.arange(-(len(f) - 1), len(g))
+
+    return np.interp(shifts, lags, corr, left=0.0, right=0.0)
+
+
 def fft(c, n=None, axis=-1, norm=None):
     """
     Compute the one-dimensional discrete Fourier Transform for the x- or y-values of c.
@@ -2842,22 +3375,24 @@ def fft(c, n=None, axis=-1, norm=None):
     :type norm: None, "ortho", optional
     :return: Curve tuple -- Two curves with the real and imaginary parts.
     """
-    numpy1_10 = LooseVersion(np.__version__) >= LooseVersion("1.10.0")
-    cnorm = c.normalize()
-    clen = len(c.x)
+    def compute():
+        numpy1_10 = LooseVersion(np.__version__) >= LooseVersion("1.10.0")
+        cnorm = c.normalize()
+        clen = len(c.x)
 
-    if numpy1_10:
-        complex_array = np.fft.fft(cnorm.y, n, axis, norm)
-        complex_array = np.fft.fftshift(complex_array)
-    else:
-        complex_array = np.fft.fft(cnorm.y, n, axis)
-        complex_array = np.fft.fftshift(complex_array)
+        if numpy1_10:
+            complex_array = np.fft.fft(cnorm.y, n, axis, norm)
+            complex_array = np.fft.fftshift(complex_array)
+        else:
+            complex_array = np.fft.fft(cnorm.y, n, axis)
+            complex_array = np.fft.fftshift(complex_array)
+
+        val = 1.0 / (float(max(cnorm.x) - min(cnorm.x)) / 2.0)
+        x = np.fft.fftfreq(clen, d=val)
+        x = np.fft.fftshift(x)
+        return x, complex_array.real, complex_array.imag
 
-    val = 1.0 / (float(max(cnorm.x) - min(cnorm.x)) / 2.0)
-    x = np.fft.fftfreq(clen, d=val)
-    x = np.fft.fftshift(x)
-    y1 = complex_array.real
-    y2 = complex_array.imag
+    x, y1, y2 = curve.result_cache.lookup(('fft', c.version, n, axis, norm), compute)
 
     nc1 = makecurve(x=x,
                     y=y1,
@@ -2885,8 +3420,9 @@ def derivative(c, eo=1):
     :type eo: int, optional
     :return: A new curve representing the derivate of c
     """
+    y = curve.result_cache.lookup(('derivative', c.version, eo), lambda: np.gradient(c.y, c.x, edge_order=eo))
     nc = makecurve(x=c.x,
-                   y=np.gradient(c.y, c.x, edge_order=eo),
+                   y=y,
                    name='Derivative ' + __toCurveString(c))
 
     return nc
@@ -2914,29 +3450,30 @@ def diffMeasure(c1, c2, tol=1e-8):
     :type tol: float
     :return: tuple -- Two curves representing the fractional difference measure and its average
     """
-    ic1, ic2 = curve.getinterp(c1, c2,
-                               c1.math_interp_left, c1.math_interp_right, c1.math_interp_period,
-                               c2.math_interp_left, c2.math_interp_right, c2.math_interp_period)
-    f1 = tol * (np.max(ic1.y) - np.min(ic1.y))
-    f2 = tol * (np.max(ic2.y) - np.min(ic2.y))
-    ydiff = np.abs(ic1.y - ic2.y)
-    yden = (np.abs(ic1.y) + f1) + (np.abs(ic2.y) + f2)
-    dx = np.max(ic1.x) - np.min(ic1.x)
-    x = np.array(ic1.x)
-    cdiffy = np.array(ydiff / yden)
-    cdiffy[np.isnan(cdiffy)] = 0  # corner case where both curves are all zeros since f1 and f2 will also be 0
-
-    try:
-        yint = scipy.integrate.cumtrapz(cdiffy, x, initial=0.0)
-    except:
-        yint = scipy.integrate.cumulative_trapezoid(cdiffy, x, initial=0.0)
-    cinty = np.array(yint / dx)
+    def compute():
+        ic1, ic2 = curve.getinterp(c1, c2,
+                                   c1.math_interp_left, c1.math_interp_right, c1.math_interp_period,
+                                   c2.math_interp_left, c2.math_interp_right, c2.math_interp_period)
+        f1 = tol * (np.max(ic1.y) - np.min(ic1.y))
+        f2 = tol * (np.max(ic2.y) - np.min(ic2.y))
+        ydiff = np.abs(ic1.y - ic2.y)
+        yden = (np.abs(ic1.y) + f1) + (np.abs(ic2.y) + f2)
+        dx = np.max(ic1.x) - np.min(ic1.x)
+        x = np.array(ic1.x)
+        cdiffy = np.array(ydiff / yden)
+        cdiffy[np.isnan(cdiffy)] = 0  # corner case where both curves are all zeros since f1 and f2 will also be 0
+        return x, cdiffy, _prefix_integral(makecurve(x=x, y=cdiffy)) / dx
+
+    key = ('diffMeasure', c1.version, c2.version, tol,
+           c1.math_interp_left, c1.math_interp_right, c1.math_interp_period,
+           c2.math_interp_left, c2.math_interp_right, c2.math_interp_period)
+    x, cdiffy, cinty = curve.result_cache.lookup(key, compute)
 
     cdiff = makecurve(x=x,
                       y=cdiffy,
                       name='FD = $|$' + __toCurveString(c1) + ' - ' + __toCurveString(c2) +  # noqaw504
                            '$|$/($|$' + __toCurveString(c1) + '$|$ + $|$' + __toCurveString(c2) + '$|$)')
-    cint = makecurve(x=x,
+    cint = makecurve(x=x.copy(),
                      y=cinty,
                      name='Integral(FD)/dX')
 
@@ -3017,6 +3554,164 @@ def subsample(curvelist, stride=2, verbose=False):
             print("Reduced %s from %i -> %i values." % (c.name, n, len(c.x)))
 
 
+def _minmax_points(y, npts):
+    """
+    Indices of the first and last points and of the minimum and maximum of each bucket.
+    The points in between are split into buckets of equal size so they can be reshaped.
+    """
+    n = len(y)
+    size = -(-(n - 2) // ((npts - 2) // 2))
+    starts = np.arange(1, n - 1, size)
+    full = (n - 2) // size
+
+    blocks = y[1:1 + full * size].reshape(full, size)
+    low = np.argmin(blocks, axis=1)
+    high = np.argmax(blocks, axis=1)
+    if full < len(starts):
+        tail = y[starts[-1]:n - 1]
+        low = np.append(low, np.argmin(tail))
+        high = np.append(high, np.argmax(tail))
+
+    keep = np.column_stack((np.minimum(low, high), np.maximum(low, high))) + starts[:, np.newaxis]
+    keep = np.concatenate(([0], keep.ravel(), [n - 1]))
+    return keep[np.concatenate(([True], keep[1:] != keep[:-1]))]
+
+
+def _lttb_points(x, y, npts):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+    """
+    n = len(x)
+    starts = 1 + (np.arange(npts - 2) * (n - 2)) // (npts - 2)
+    counts = np.diff(np.append(starts, n - 1))
+
+    # The average point of each bucket, followed by the last point
+    cx = np.append(np.add.reduceat(x[1:n - 1], starts - 1) / counts, x[-1])
+    cy = np.append(np.add.reduceat(y[1:n - 1], starts - 1) / counts, y[-1])
+
+    keep = np.empty(len(starts) + 2, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i, start in enumerate(starts):
+        stop = start + counts[i]
+        ax = x[a]
+        ay = y[a]
+        # Twice the area of the triangle from the last kept point to each point of the
+        # bucket to the average of the next bucket, which is linear in the point.
+        offset = cx[i + 1] * ay - ax * cy[i + 1]
+        area = np.abs(x[start:stop] * (cy[i + 1] - ay) + y[start:stop] * (ax - cx[i + 1]) + offset)
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+def decimate(curvelist, npts=1000, method='lttb', verbose=False):
+    """
+    Decimate the curve or list of curves to at most npts points while keeping the spikes and
+    peaks that subsampling by a stride drops. The first and last points are always kept and
+    curves with npts or fewer points are left as they are.
+
+    The 'lttb' method (Largest-Triangle-Three-Buckets) keeps the point of each bucket that forms
+    the largest triangle with the point kept before it and the average of the next bucket, which
+    keeps the shape of the curve. The 'minmax' method keeps the minimum and maximum of each
+    bucket, which keeps the envelope of the curve exactly.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> pydvpy.decimate(curves, 10000)
+
+    >>> pydvpy.decimate(curves[0], 10000, 'minmax')
+
+    :param curvelist: The curve or list of curves
+    :type curvelist: Curve or list
+    :param npts: The maximum number of points to keep, at least 4
+    :type npts: int
+    :param method: 'lttb' or 'minmax'
+    :type method: str
+    :param verbose: If True additional information will be printed to stdout
+    :type verbose: bool
+    """
+    if method not in ('lttb', 'minmax'):
+        raise ValueError("{} is not a supported option for method".format(method))
+    npts = int(npts)
+    if npts < 4:
+        raise ValueError('npts must be at least 4')
+
+    curves = _convert_to_curvelist(curvelist)
+
+    for c in curves:
+        n = len(c.x)
+        if n > npts:
+            if method == 'lttb':
+                keep = _lttb_points(np.asarray(c.x), np.asarray(c.y), npts)
+            else:
+                keep = _minmax_points(np.asarray(c.y), npts)
+            c.x = c.x[keep]
+            c.y = c.y[keep]
+
+        if verbose:
+            print("Reduced %s from %i -> %i values." % (c.name, n, len(c.x)))
+
+
+def binstats(curvelist, bins=100, stat='mean', chunk=2**20):
+    """
+    Reduce the curve or list of curves to statistics of their y-values in bins of x, e.g. to summarize
+    scatter data with millions of unsorted points. The points are processed chunk at a time so the memory
+    used does not grow with the size of the curves. Points outside the bins and NaN y-values are ignored.
+    Bins without points are left out of the new curves except for the 'count' statistic.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> binned = pydvpy.binstats(curves, 200)
+
+    >>> binned = pydvpy.binstats(curves[0], [0, 1, 2, 5, 10], 'max')
+
+    :param curvelist: The curve or list of curves
+    :type curvelist: Curve or list
+    :param bins: The number of equal bins spanning each curve's domain, or the bin edges in increasing order
+    :type bins: int or list
+    :param stat: 'mean', 'min', 'max', 'count', 'std' or 'median'
+    :type stat: str
+    :param chunk: The number of points processed at a time
+    :type chunk: int
+    :returns: list -- the binned curves, with the bin centers as x-values
+    """
+    if stat not in ('mean', 'min', 'max', 'count', 'std', 'median'):
+        raise ValueError("{} is not a supported option for stat".format(stat))
+
+    uniform = np.ndim(bins) == 0
+    if not uniform:
+        edges = np.asarray(bins, dtype=float)
+        if len(edges) < 2 or np.any(np.diff(edges) <= 0):
+            raise ValueError('bin edges must be increasing')
+
+    curves = _convert_to_curvelist(curvelist)
+
+    new_curves = list()
+    for c in curves:
+        x = np.asarray(c.x)
+        y = np.asarray(c.y)
+        if uniform:
+            xmin = np.nanmin(x)
+            xmax = np.nanmax(x)
+            if xmin == xmax:
+                xmin -= 0.5
+                xmax += 0.5
+            edges = np.linspace(xmin, xmax, int(bins) + 1)
+
+        values, counts = _bin_reduce(x, y, edges, uniform, stat, int(chunk))
+
+        centers = (edges[:-1] + edges[1:]) / 2
+        if stat != 'count':
+            centers = centers[counts > 0]
+            values = values[counts > 0]
+        new_curves.append(makecurve(x=centers, y=values, name=f"{c.name} Binned {stat} nbins={len(edges) - 1}"))
+
+    return new_curves
+
+
 def smooth(curvelist, factor=1):
     """
     Smooth the curve to the given degree.
@@ -3034,39 +3729,29 @@ def smooth(curvelist, factor=1):
     """
     curves = _convert_to_curvelist(curvelist)
 
-    for c in curves:
-        if len(c.x) < 2:
-            return 0
-
-        x = list()
-        y = list()
+    # Curves after the first one that is too short to smooth are left alone
+    short = [i for i, c in enumerate(curves) if len(c.x) < 2]
+    if short:
+        curves = curves[:short[0]]
 
-        for i in range(len(c.x)):
-            tfactor = factor
+    if curves:
+        x, y, offsets, i, n = _segments(curves)
 
-            if i - factor < 0 and i < (len(c.x) - 1) / 2:
-                tfactor = i
-            elif i + factor >= len(c.x):
-                tfactor = len(c.x) - 1 - i
+        # The x window shrinks near the ends of the curve to stay centered on the point
+        tfactor = np.minimum(np.minimum(i, n - 1 - i), factor)
+        x = _window_sums(x, offsets + i - tfactor, offsets + i + tfactor + 1) / (2 * tfactor + 1)
 
-            xsum = 0
-            ysum = 0
+        # The y window keeps its width and repeats the first and last y-values past the ends
+        start = offsets + i - factor
+        y = _padded_window_sums(y, start, start + 2 * factor + 1, offsets, offsets + n - 1) / (2 * factor + 1)
 
-            for j in range(-tfactor, tfactor + 1):
-                xsum += c.x[i + j]
-            for j in range(-factor, factor + 1):
-                if 0 <= i + j < len(c.x):
-                    ysum += c.y[i + j]
-                elif i + j < 0:
-                    ysum += c.y[0]
-                else:
-                    ysum += c.y[-1]
-
-            x.append(xsum / (2 * tfactor + 1))
-            y.append(ysum / (2 * factor + 1))
+        bounds = np.cumsum([len(c.x) for c in curves])[:-1]
+        for c, cx, cy in zip(curves, np.split(x, bounds), np.split(y, bounds)):
+            c.x = cx
+            c.y = cy
 
-        c.x = np.array(x)
-        c.y = np.array(y)
+    if short:
+        return 0
 
 
 def errorbar(scur, cury1, cury2, curx1=None, curx2=None, mod=1):
@@ -3190,7 +3875,7 @@ def fit(c, n=1, logx=False, logy=False):
     if logy:
         y = np.log10(y)
 
-    coeffs = scipy.polyfit(x, y, n)
+    coeffs = curve.result_cache.lookup(('fit', c.version, n, logx, logy), lambda: scipy.polyfit(x, y, n))
     if len(coeffs) == 2:
         print("slope = ", coeffs[0], " intercept = ", coeffs[1])
     else:
@@ -3239,7 +3924,8 @@ def getdomain(curvelist):
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        domains.append((__toCurveString(c), min(c.x), max(c.x)))
+        stats = c.summary()
+        domains.append((__toCurveString(c), stats.xmin, stats.xmax))
 
     return domains
 
@@ -3284,11 +3970,14 @@ def area(curvelist):
     areas = list()
     curves = _convert_to_curvelist(curvelist)
 
-    for c in curves:
+    def simpson(c):
         try:
-            areas.append((__toCurveString(c), scipy.integrate.simpson(c.y, c.x)))
+            return scipy.integrate.simpson(c.y, c.x)
         except:
-            areas.append((__toCurveString(c), np.trapz(c.y, c.x)))
+            return np.trapz(c.y, c.x)
+
+    for c in curves:
+        areas.append((__toCurveString(c), c.cached(('area',), lambda: simpson(c))))
 
     return areas
 
@@ -3330,71 +4019,191 @@ def getnumpoints(curve):
     return len(curve.x)
 
 
-def stats(curve):
+Statistics = namedtuple('Statistics', ['length', 'mean', 'median', 'mode', 'mode_count', 'std', 'skew', 'kurtosis',
+                                       'min', 'q25', 'q50', 'q75', 'max', 'sum'])
+
+
+def _statistics(values):
     """
-    Print statistics of the given curve.
+    Compute the statistics of an array from one sort for the order statistics and mode, and
+    one pass over the centered values for the moments.
 
-    :param curve: The given curve
+    :returns: Statistics -- the statistics of the values
     """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    s = np.sort(values)
 
-    def find_mode(array):
+    def quantile(q):
+        # Linear interpolation between order statistics, as np.quantile
+        index = (n - 1) * q
+        lo = int(np.floor(index))
+        hi = min(lo + 1, n - 1)
+        t = index - lo
+        diff = s[hi] - s[lo]
+        return s[hi] - diff * (1 - t) if t >= 0.5 else s[lo] + diff * t
 
-        try:
-            mode = scipy.stats.mode(array, keepdims=True)
-        except:
-            mode = scipy.stats.mode(array)
-        if mode.count[0] == 1 and len(array) != 1:
-            return np.nan, np.nan
-        else:
-            return mode.mode[0], mode.count[0]
+    median = s[n // 2] if n % 2 else (s[n // 2 - 1] + s[n // 2]) / 2.0
+
+    # Mode from the runs of equal sorted values, the smallest value of the longest run
+    starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    longest = np.argmax(counts)
+    mode, mode_count = s[starts[longest]], counts[longest]
+    if mode_count == 1 and n != 1:
+        mode, mode_count = np.nan, np.nan
 
-    numx, countx = find_mode(curve.x)
-    numy, county = find_mode(curve.y)
+    total = np.sum(values)
+    mean = total / n
+    d = values - mean
+    d2 = d * d
+    m2 = np.mean(d2)
+    m3 = np.mean(d2 * d)
+    m4 = np.mean(d2 * d2)
+    flat = m2 <= (np.finfo(float).eps * mean)**2
 
-    print('\nCurve ' + curve.plotname)
-    print('\n\t         X:\t              Y:')
-    print(f'\n\tlength:    {len(curve.x):<15.10g}\t{len(curve.y):<15.10g}')
-    print(f'\tmean:      {np.mean(curve.x):<15.10g}\t{np.mean(curve.y):<15.10g}')
-    print(f'\tmedian:    {np.median(curve.x):<15.10g}\t{np.median(curve.y):<15.10g}')
-    print(f'\tmode:      {numx:<15.10g}\t{numy:<15.10g}')
-    print(f'\t    count: {countx:<15.10g}\t{county:<15.10g}')
-    print(f'\tstd:       {np.std(curve.x):<15.10g}\t{np.std(curve.y):<15.10g}')
-    print(f'\tskew:      {scipy.stats.skew(curve.x):<15.10g}\t{scipy.stats.skew(curve.y):<15.10g}')
-    print(f'\tkurtosis:  {scipy.stats.kurtosis(curve.x):<15.10g}\t{scipy.stats.kurtosis(curve.y):<15.10g}')  # noqae501
-    print(f'\tmin:       {np.min(curve.x):<15.10g}\t{np.min(curve.y):<15.10g}')
-    print(f'\t25%:       {np.quantile(curve.x,.25):<15.10g}\t{np.quantile(curve.y,.25):<15.10g}')
-    print(f'\t50%:       {np.quantile(curve.x,.50):<15.10g}\t{np.quantile(curve.y,.50):<15.10g}')
-    print(f'\t75%:       {np.quantile(curve.x,.75):<15.10g}\t{np.quantile(curve.y,.75):<15.10g}')
-    print(f'\tmax:       {np.max(curve.x):<15.10g}\t{np.max(curve.y):<15.10g}')
-    print(f'\tsum:       {np.sum(curve.x):<15.10g}\t{np.sum(curve.y):<15.10g}')
+    return Statistics(length=n,
+                      mean=mean,
+                      median=median,
+                      mode=mode,
+                      mode_count=mode_count,
+                      std=np.sqrt(m2),
+                      skew=np.nan if flat else m3 / m2**1.5,
+                      kurtosis=np.nan if flat else m4 / m2**2 - 3.0,
+                      min=s[0],
+                      q25=quantile(.25),
+                      q50=quantile(.50),
+                      q75=quantile(.75),
+                      max=s[-1],
+                      sum=total)
+
+
+def _curve_statistics(curve):
+    """
+    Compute the statistics of the x- and y-values of a curve.
+    """
+    return _statistics(curve.x), _statistics(curve.y)
 
 
-def getrange(curvelist):
+def stats(curve, verbose=True):
     """
-    Get the range of the curve or list of curves.
+    Compute and print statistics of the given curve.
 
     >>> curves = pydvpy.read('testData.txt')
 
-    >>> ranges = pydvpy.getrange(curves)
+    >>> xstats, ystats = pydvpy.stats(curves[0])
 
-    >>> plotname, miny, maxy = ranges[0]
+    >>> ystats.median
 
-    :param curvelist: The given curve or list of curves
-    :type curvelist: Curve or list
-    :return: list -- A list of tuples where each tuple contains the curve name, minimum y, and maximum y
+    :param curve: The given curve
+    :type curve: Curve
+    :param verbose: If True the statistics will be printed to stdout
+    :type verbose: bool
+    :return: tuple -- The Statistics of the x-values and of the y-values
+    """
+    xs, ys = _curve_statistics(curve)
+
+    if verbose:
+        print('\nCurve ' + curve.plotname)
+        print('\n\t         X:\t              Y:')
+        print(f'\n\tlength:    {xs.length:<15.10g}\t{ys.length:<15.10g}')
+        print(f'\tmean:      {xs.mean:<15.10g}\t{ys.mean:<15.10g}')
+        print(f'\tmedian:    {xs.median:<15.10g}\t{ys.median:<15.10g}')
+        print(f'\tmode:      {xs.mode:<15.10g}\t{ys.mode:<15.10g}')
+        print(f'\t    count: {xs.mode_count:<15.10g}\t{ys.mode_count:<15.10g}')
+        print(f'\tstd:       {xs.std:<15.10g}\t{ys.std:<15.10g}')
+        print(f'\tskew:      {xs.skew:<15.10g}\t{ys.skew:<15.10g}')
+        print(f'\tkurtosis:  {xs.kurtosis:<15.10g}\t{ys.kurtosis:<15.10g}')
+        print(f'\tmin:       {xs.min:<15.10g}\t{ys.min:<15.10g}')
+        print(f'\t25%:       {xs.q25:<15.10g}\t{ys.q25:<15.10g}')
+        print(f'\t50%:       {xs.q50:<15.10g}\t{ys.q50:<15.10g}')
+        print(f'\t75%:       {xs.q75:<15.10g}\t{ys.q75:<15.10g}')
+        print(f'\tmax:       {xs.max:<15.10g}\t{ys.max:<15.10g}')
+        print(f'\tsum:       {xs.sum:<15.10g}\t{ys.sum:<15.10g}')
+
+    return xs, ys
+
+
+def stats_table(curvelist, verbose=True):
+    """
+    Compute statistics of the given curve or list of curves in parallel and print
+    them as a table with one row for the x-values and one for the y-values of each curve.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> table = pydvpy.stats_table(curves)
+
+    >>> plotname, xstats, ystats = table[0]
+
+    :param curvelist: The given curve or list of curves
+    :type curvelist: Curve or list
+    :param verbose: If True the table will be printed to stdout
+    :type verbose: bool
+    :return: list -- A list of tuples where each tuple contains the curve's plotname and the Statistics
+                     of its x-values and y-values
+    """
+    curves = _convert_to_curvelist(curvelist)
+
+    # Threads share the curves' data and numpy releases the GIL while sorting and summing
+    with ThreadPool(processes=min(cpu_count(), max(len(curves), 1))) as pool:
+        results = pool.map(_curve_statistics, curves)
+
+    table = [(c.plotname, xs, ys) for c, (xs, ys) in zip(curves, results)]
+
+    if verbose:
+        columns = ['length', 'mean', 'median', 'std', 'skew', 'kurtosis', 'min', '25%', '50%', '75%', 'max', 'sum']
+        fields = ['length', 'mean', 'median', 'std', 'skew', 'kurtosis', 'min', 'q25', 'q50', 'q75', 'max', 'sum']
+        print('\n' + ('Curve'.ljust(7) + 'Axis'.ljust(6) + ''.join(name.ljust(14) for name in columns)).rstrip())
+        for plotname, xs, ys in table:
+            for axis, st in (('X', xs), ('Y', ys)):
+                values = ''.join(f'{getattr(st, f):<14.6g}' for f in fields)
+                print((plotname.ljust(7) + axis.ljust(6) + values).rstrip())
+
+    return table
+
+
+def getrange(curvelist, xmin=None, xmax=None):
+    """
+    Get the range of the curve or list of curves. If xmin or xmax is given, the range is
+    restricted to that sub-domain, with the curve interpolated at the sub-domain limits.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> ranges = pydvpy.getrange(curves)
+
+    >>> plotname, miny, maxy = ranges[0]
+
+    >>> ranges = pydvpy.getrange(curves, 2, 7)
+
+    :param curvelist: The given curve or list of curves
+    :type curvelist: Curve or list
+    :param xmin: the minimum x-value for the sub-domain
+    :type xmin: float, optional
+    :param xmax: the maximum x-value for the sub-domain
+    :type xmax: float, optional
+    :return: list -- A list of tuples where each tuple contains the curve name, minimum y, and maximum y
     """
     ranges = list()
     curves = _convert_to_curvelist(curvelist)
 
     for c in curves:
-        ranges.append((__toCurveString(c), min(c.y), max(c.y)))
+        if xmin is None and xmax is None:
+            stats = c.summary()
+            ranges.append((__toCurveString(c), stats.ymin, stats.ymax))
+        else:
+            ymin = _extremum(c, xmin, xmax, 'min')
+            ymax = _extremum(c, xmin, xmax, 'max')
+            ranges.append((__toCurveString(c),
+                           ymin[0][1] if ymin else np.nan,
+                           ymax[0][1] if ymax else np.nan))
 
     return ranges
 
 
 def getx(c, value, xmin=None, xmax=None):
     """
-    Get the x values of the curve for a given y.
+    Get the x values of the curve for a given y. A list of y values can be given to find the
+    x values of all of them at once.
 
     >>> curves = pydvpy.read('testData.txt')
 
@@ -3402,52 +4211,93 @@ def getx(c, value, xmin=None, xmax=None):
 
     >>> x, y = vals[0]
 
+    >>> vals = pydvpy.getx(curves[0], [2, 4, 8])
+
+    >>> x, y = vals[1][0]
+
     :param c: The curve
     :type c: Curve
-    :param value: y value
-    :type value: float
-    :return: list -- A list of tuples where each tuple contains the x value, and the given y
+    :param value: y value or list of y values
+    :type value: float or list
+    :param xmin: the minimum x value to search from
+    :type xmin: float
+    :param xmax: the maximum x value to search to
+    :type xmax: float
+    :return: list -- A list of tuples where each tuple contains the x value, and the given y.
+                     If value is a list, a list of these lists, one for each y value. A list
+                     of y values may contain values out of range which have no x values.
     """
-    xypairs = list()
+    values = np.asarray(value, dtype=float)
+    levels = values.ravel()
     r = __get_sub_range(c.x, xmin, xmax)
 
-    if float(value) < np.amin(c.y) or float(value) > np.amax(c.y):
+    stats = c.summary()
+    if values.ndim == 0 and (levels[0] < stats.ymin or levels[0] > stats.ymax):
         raise ValueError('y-value out of range')
 
+    x = np.asarray(c.x, dtype=float)
+    y = np.asarray(c.y, dtype=float)
+
     if r[0] < r[1]:
-        for i in range(r[0], r[1] + 1):
-            if c.y[i] == float(value):  # value exists in curve
-                xypairs.append((c.x[i], float(value)))
-            else:  # value does not exist in curve
-                ymax = c.y[i]
-                if i + 1 < len(c.y):
-                    ymax = c.y[i + 1]
-
-                if c.y[i] < float(value) < ymax:
-                    x = np.interp(float(value), [c.y[i], ymax], [c.x[i], c.x[i + 1]])
-                    xypairs.append((x, float(value)))
-                elif ymax < float(value) < c.y[i]:
-                    x = np.interp(float(value), [ymax, c.y[i]], [c.x[i + 1], c.x[i]])
-                    xypairs.append((x, float(value)))
+        # Check the points in range and the segments that start at them
+        x = x[r[0]:r[1] + 2]
+        y = y[r[0]:r[1] + 2]
+        npoints = r[1] - r[0] + 1
     else:
-
         # User range is in between actual curve points
-        # c.x xmin xmax c.x
+        # c.x xmin [c.x] xmax c.x
         xl = c.x[0] if xmin is None else xmin
         xr = c.x[-1] if xmax is None else xmax
-        range_x = np.linspace(xl, xr, num=1000)
-        y_interp = np.interp(range_x, c.x, c.y)
-        for x, y in zip(range_x, y_interp):
-            if y == value:
-                xypairs.append((x, y))
-
-        # User range has only one curve point in between
-        # xmin c.x xmax
-        if r[0] == r[1]:
-            if c.y[r[0]] == float(value):  # value exists in curve
-                xypairs.append((c.x[r[0]], float(value)))
+        x = np.unique([xl, xr] + ([c.x[r[0]]] if r[0] == r[1] else []))
+        y = np.interp(x, c.x, c.y)
+        npoints = len(x)
 
-    return xypairs
+    idx, xvals = _level_crossings(x, y, levels, npoints)
+    xypairs = [list(zip(xs, [float(v)] * len(xs)))
+               for xs, v in zip(np.split(xvals, np.cumsum(np.bincount(idx, minlength=len(levels)))[:-1]), levels)]
+
+    return xypairs[0] if values.ndim == 0 else xypairs
+
+
+def _level_crossings(x, y, levels, npoints):
+    """
+    Find the x values where y equals each of the levels, either at one of the first npoints points
+    or on the straight line between one of them and the next point.
+
+    :returns: tuple -- the index of the level and the x value of each crossing, ordered by level and then by x
+    """
+    order = np.argsort(levels, kind='stable')
+    order = order[:np.count_nonzero(~np.isnan(levels))]
+    sorted_levels = levels[order]
+
+    # Points that equal a level
+    yp = y[:npoints]
+    lo = np.searchsorted(sorted_levels, yp, side='left')
+    counts = np.searchsorted(sorted_levels, yp, side='right') - lo
+    point = np.repeat(np.arange(npoints), counts)
+    point_level = order[_ranges(lo, counts)]
+
+    # Segments that cross a level between their end points
+    nseg = min(npoints, len(y) - 1)
+    y0 = y[:nseg]
+    y1 = y[1:nseg + 1]
+    lo = np.searchsorted(sorted_levels, np.minimum(y0, y1), side='right')
+    counts = np.maximum(np.searchsorted(sorted_levels, np.maximum(y0, y1), side='left') - lo, 0)
+    seg = np.repeat(np.arange(nseg), counts)
+    seg_level = order[_ranges(lo, counts)]
+
+    # Interpolate from the lower end of each segment
+    rising = y0[seg] < y1[seg]
+    a = np.where(rising, seg, seg + 1)
+    b = np.where(rising, seg + 1, seg)
+    xcross = (x[b] - x[a]) / (y[b] - y[a]) * (levels[seg_level] - y[a]) + x[a]
+
+    idx = np.concatenate((point_level, seg_level))
+    pos = np.concatenate((point, seg))
+    xvals = np.concatenate((x[point], xcross))
+    ordering = np.lexsort((pos, idx))
+
+    return idx[ordering], xvals[ordering]
 
 
 def gety(c, value):
@@ -3719,10 +4569,7 @@ def appendcurves(curvelist):
         else:
             return
     else:
-        nc = curve.append(curvelist[0], curvelist[1])
-
-        for i in range(2, len(curvelist)):
-            nc = curve.append(nc, curvelist[i])
+        nc = curve.append(*curvelist)
 
     suffix = ''
     for c in curvelist:
@@ -3741,123 +4588,298 @@ def max_curve(curvelist):
     :return: Curve -- a new curve with the maximum y-values over the intersection of the
              domains of the specified curves.
     """
-    # Get union of domains
-    if len(curvelist) <= 1:
-        return None
-    else:
-        ux = set(curvelist[0].x).union(set(curvelist[1].x))
-        for i in range(2, len(curvelist)):
-            ux = set(curvelist[i].x).union(ux)
+    return _reduce_curves(curvelist, np.maximum, 'Max')
 
-    ux = list(ux)
-    ux.sort()
 
-    # Create curve label suffix
-    name_suffix = ''
-    for i in range(len(curvelist)):
-        name_suffix += "%s" % curvelist[i].plotname
+def min_curve(curvelist):
+    """
+    Construct a curve from the minimum y values of the intersection of the curves domain.
 
-    # Calculate max
-    x = np.array(ux)
+    :param curvelist: the specified curves
+    :return: Curve -- a new curve with the minimum y-values over the intersection of the
+             domains of the specified curves.
+    """
+    return _reduce_curves(curvelist, np.minimum, 'Min')
 
-    all_data = []
-    for cur in curvelist:
-        all_data.append(np.interp(x, cur.x, cur.y,
-                                  left=cur.math_interp_left,
-                                  right=cur.math_interp_right,
-                                  period=cur.math_interp_period))
 
-    nc = makecurve(x=x,
-                   y=np.max(all_data, axis=0),
-                   name='Max(' + name_suffix + ')')
+def average_curve(curvelist):
+    """
+    Average the specified curves over the intersection of their domains.
 
-    return nc
+    :param curvelist: the specified curves
+    :return: Curve -- a new curve with the average values over the intersection of the domains of the specified curves.
+    """
+    return _reduce_curves(curvelist, np.add, 'Average', mean=True)
 
 
-def min_curve(curvelist):
+def percentile_curve(curvelist, q):
     """
-    Construct a curve from the minimum y values of the intersection of the curves domain.
+    Construct a curve from the q-th percentile of the y values of the curves over the union of their domains.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> upper = pydvpy.percentile_curve(curves, 95)
 
     :param curvelist: the specified curves
-    :return: Curve -- a new curve with the minimum y-values over the intersection of the
-             domains of the specified curves.
+    :type curvelist: list
+    :param q: the percentile, between 0 and 100
+    :type q: float
+    :return: Curve -- a new curve with the q-th percentile of the y-values of the specified curves
     """
-    # Get union of domains
-    if len(curvelist) <= 1:
-        return None
+    return _reduce_curves(curvelist, None, 'Percentile%g' % q, stacked=lambda ys: np.percentile(ys, q, axis=0))
+
+
+def median_curve(curvelist):
+    """
+    Construct a curve from the median of the y values of the curves over the union of their domains.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> median = pydvpy.median_curve(curves)
+
+    :param curvelist: the specified curves
+    :type curvelist: list
+    :return: Curve -- a new curve with the median of the y-values of the specified curves
+    """
+    return _reduce_curves(curvelist, None, 'Median', stacked=lambda ys: np.median(ys, axis=0))
+
+
+########################################################
+################## Private Methods #####################  # noqa e266
+########################################################
+
+
+def _bin_index(x, y, edges, uniform):
+    """
+    Find the bin of each point. Like numpy.histogram, the last bin includes its right edge.
+
+    :param x: The x-values of the points
+    :param y: The y-values of the points
+    :param edges: The bin edges
+    :param uniform: True if the bins are equal so the bins can be computed rather than searched
+    :returns: tuple -- the bins and y-values of the points that are in a bin and not NaN
+    """
+    nbins = len(edges) - 1
+    if uniform:
+        with np.errstate(invalid='ignore'):
+            b = np.floor((x - edges[0]) * (nbins / (edges[-1] - edges[0])))
+        valid = (b >= 0) & (b <= nbins)
+        b = np.where(valid, b, 0).astype(np.intp)
+        # Move the points that rounding put next to their bin
+        b -= x < edges[b]
+        b += (x >= edges[np.minimum(b + 1, nbins)]) & (b < nbins)
     else:
-        ux = set(curvelist[0].x).union(set(curvelist[1].x))
-        for i in range(2, len(curvelist)):
-            ux = set(curvelist[i].x).union(ux)
+        b = np.searchsorted(edges, x, side='right') - 1
+        valid = True
 
-    ux = list(ux)
-    ux.sort()
+    b[x == edges[-1]] = nbins - 1
+    valid = valid & (b >= 0) & (b < nbins) & ~np.isnan(y)
+    return b[valid], y[valid]
 
-    # Create curve label suffix
-    name_suffix = ''
-    for i in range(len(curvelist)):
-        name_suffix += "%s" % curvelist[i].plotname
 
-    # Calculate min
-    x = np.array(ux)
+def _bin_reduce(x, y, edges, uniform, stat, chunk):
+    """
+    Compute a statistic of the y-values in each bin, a chunk of points at a time. The chunks are
+    combined with running counts, minima and maxima, and with the pairwise update of Chan et al.
+    for means and variances.
 
-    all_data = []
-    for cur in curvelist:
-        all_data.append(np.interp(x, cur.x, cur.y,
-                                  left=cur.math_interp_left,
-                                  right=cur.math_interp_right,
-                                  period=cur.math_interp_period))
+    :returns: tuple -- the statistic and the number of points of each bin
+    """
+    nbins = len(edges) - 1
+    counts = np.zeros(nbins, dtype=np.int64)
+    if stat == 'min':
+        values = np.full(nbins, np.inf)
+    elif stat == 'max':
+        values = np.full(nbins, -np.inf)
+    else:
+        values = np.zeros(nbins)
+    m2 = np.zeros(nbins)
+
+    for start in range(0, len(x), chunk):
+        b, yc = _bin_index(x[start:start + chunk], y[start:start + chunk], edges, uniform)
+        n = np.bincount(b, minlength=nbins)
+        if stat == 'min':
+            np.minimum.at(values, b, yc)
+        elif stat == 'max':
+            np.maximum.at(values, b, yc)
+        elif stat in ('mean', 'std'):
+            has = n > 0
+            means = np.zeros(nbins)
+            means[has] = np.bincount(b, weights=yc, minlength=nbins)[has] / n[has]
+            total = counts[has] + n[has]
+            delta = means[has] - values[has]
+            if stat == 'std':
+                squares = np.bincount(b, weights=(yc - means[b]) ** 2, minlength=nbins)
+                m2[has] += squares[has] + delta ** 2 * (counts[has] * n[has] / total)
+            values[has] += delta * (n[has] / total)
+        counts += n
+
+    if stat == 'count':
+        values = counts.astype(float)
+    elif stat == 'std':
+        with np.errstate(invalid='ignore'):
+            values = np.sqrt(m2 / counts)
+    elif stat == 'median':
+        values = _bin_medians(x, y, edges, uniform, chunk, counts)
+    return values, counts
+
+
+def _bin_medians(x, y, edges, uniform, chunk, counts):
+    """
+    Compute the median of the y-values in each bin. The bins are taken in groups of about eight chunks of
+    points, and each group gathers its points in one pass over the data and sorts them by bin and value.
+
+    :returns: numpy.ndarray -- the median of each bin
+    """
+    nbins = len(edges) - 1
+    medians = np.full(nbins, np.nan)
+    ends = np.cumsum(counts)
+
+    lo = 0
+    while lo < nbins:
+        before = ends[lo] - counts[lo]
+        hi = min(max(np.searchsorted(ends, before + 8 * chunk, side='right'), lo + 1), nbins)
+        if ends[hi - 1] > before:
+            bs = list()
+            ys = list()
+            for start in range(0, len(x), chunk):
+                b, yc = _bin_index(x[start:start + chunk], y[start:start + chunk], edges, uniform)
+                inside = (b >= lo) & (b < hi)
+                bs.append(b[inside])
+                ys.append(yc[inside])
+            b = np.concatenate(bs)
+            yg = np.concatenate(ys)
+            # Sort by value and then stably by bin, which is faster than numpy.lexsort
+            order = np.argsort(yg)
+            ordered = yg[order][np.argsort(b[order], kind='stable')]
+
+            n = counts[lo:hi]
+            first = ends[lo:hi] - n - before
+            has = n > 0
+            lower = ordered[(first + (n - 1) // 2)[has]]
+            upper = ordered[(first + n // 2)[has]]
+            medians[lo:hi][has] = (lower + upper) / 2
+        lo = hi
+
+    return medians
+
+
+def _drop_nonpositive(c, axis):
+    """
+    Remove the points of a curve whose x- or y-values are zero or negative in one masked pass.
 
-    nc = makecurve(x=x,
-                   y=np.min(all_data, axis=0),
-                   name='Min(' + name_suffix + ')')
+    :param c: The curve
+    :param axis: 'x' or 'y'
+    :returns: bool -- True if points were removed, the curve then holds new arrays of its own
+    """
+    keep = ~(getattr(c, axis) <= 0)
+    if keep.all():
+        return False
 
-    return nc
+    c.x = c.x[keep]
+    c.y = c.y[keep]
+    return True
 
 
-def average_curve(curvelist):
+def _difference(kind, cr1, cr2, y1, y2, tol):
     """
-    Average the specified curves over the intersection of their domains.
+    Compute the pointwise differences of two curves' values on their overlap grid.
 
-    :param curvelist: the specified curves
-    :return: Curve -- a new curve with the average values over the intersection of the domains of the specified curves.
+    :param kind: Avg for y1 - y2, Abs for abs(y1 - y2) or Rel for the relative difference of RelDiff
+    :param cr1: The first curve, used for the range of the relative difference
+    :param cr2: The second curve, used for the range of the relative difference
+    :param y1: The values of the first curve on the overlap grid
+    :param y2: The values of the second curve on the overlap grid
+    :param tol: The tolerance, used to adjust the relative difference
+    :returns: numpy.ndarray -- the differences
     """
-    # Get union of domains
-    if len(curvelist) <= 1:
-        return None
+    if kind == 'Avg':
+        return y1 - y2
+    elif kind == 'Abs':
+        return np.abs(y1 - y2)
+
+    s1 = cr1.summary()
+    s2 = cr2.summary()
+
+    c1new = np.abs(y1) + tol * (s1.ymax - s1.ymin)
+    c2new = np.abs(y2) + tol * (s2.ymax - s2.ymin)
+
+    return np.abs(y1 - y2) / (c1new + c2new + 1e-80)
+
+
+def _difference_curves(kind, cr1, cr2, cr1_interp, cr2_interp, tol):
+    """
+    Compute the differences of two overlapping interpolated curves and build the curves returned by
+    AvgDiff, AbsDiff and RelDiff.
+
+    :returns: tuple -- the differences curve, average difference, maximum difference, failed points curve
+                       and if any point failed the tolerance
+    """
+    diff = _difference(kind, cr1, cr2, cr1_interp.y, cr2_interp.y, tol)
+
+    avgDiff = np.mean(diff)
+    maxDiff = np.max(diff)
+    differences = makecurve(x=cr1_interp.x,
+                            y=diff,
+                            name=f"Differences avgDiff={avgDiff:.6e} maxDiff={maxDiff:.6e}")
+
+    failed_points = np.where(diff > tol)
+    failed_curve = makecurve(x=differences.x[failed_points],
+                             y=differences.y[failed_points],
+                             name=f"Failed points npts={len(failed_points[0])} with tol={tol}")
+    failed_curve.scatter = True
+
+    if failed_points[0].size:
+        failed = True
     else:
-        ux = set(curvelist[0].x).union(set(curvelist[1].x))
-        for i in range(2, len(curvelist)):
-            ux = set(curvelist[i].x).union(ux)
+        failed = False
 
-    ux = list(ux)
-    ux.sort()
+    return differences, avgDiff, maxDiff, failed_curve, failed
 
-    # Create curve label suffix
-    name_suffix = ''
-    for i in range(len(curvelist)):
-        name_suffix += "%s" % curvelist[i].plotname
 
-    # Calculate average
-    x = np.array(ux)
+def _reduce_curves(curvelist, reduce, name, mean=False, stacked=None, chunk_size=2**22):
+    """
+    Interpolate the curves onto the union of their x-values and combine their y-values point by point.
 
-    all_data = []
-    for cur in curvelist:
-        all_data.append(np.interp(x, cur.x, cur.y,
-                                  left=cur.math_interp_left,
-                                  right=cur.math_interp_right,
-                                  period=cur.math_interp_period))
+    With a binary ufunc the curves are folded into the result one at a time, so only one interpolated
+    curve is held at once. Reductions that need every curve's value at once, such as percentiles, are
+    applied to all the curves interpolated onto chunks of the grid of about chunk_size values.
 
-    nc = makecurve(x=x,
-                   y=np.mean(all_data, axis=0),
-                   name='Average(' + name_suffix + ')')
+    :param curvelist: the curves to combine
+    :param reduce: a binary ufunc such as numpy.maximum, or None with stacked
+    :param name: the name of the new curve, followed by the curves' plotnames
+    :param mean: divide the result by the number of curves
+    :param stacked: a function reducing an array of the curves' values along axis 0, such as a percentile
+    :returns: Curve -- the combined curve, or None if there are fewer than two curves
+    """
+    if len(curvelist) <= 1:
+        return None
 
-    return nc
+    x = np.unique(np.concatenate([np.asarray(cur.x, dtype=float) for cur in curvelist]))
 
+    def interp(cur, xs):
+        return np.interp(xs, cur.x, cur.y,
+                         left=cur.math_interp_left,
+                         right=cur.math_interp_right,
+                         period=cur.math_interp_period)
+
+    if stacked is None:
+        y = interp(curvelist[0], x)
+        for cur in curvelist[1:]:
+            reduce(y, interp(cur, x), out=y)
+        if mean:
+            y /= len(curvelist)
+    else:
+        y = np.empty(len(x))
+        step = max(1, chunk_size // len(curvelist))
+        for start in range(0, len(x), step):
+            xs = x[start:start + step]
+            y[start:start + step] = stacked(np.array([interp(cur, xs) for cur in curvelist]))
+
+    name_suffix = ''.join("%s" % cur.plotname for cur in curvelist)
+
+    return makecurve(x=x, y=y, name=name + '(' + name_suffix + ')')
 
-########################################################
-################## Private Methods #####################  # noqa e266
-########################################################
 
 def __fft(c):
     """
@@ -3967,9 +4989,34 @@ def __get_sub_range(x, low, high):
                       If low or high is not specified, the corresponding return
                       will be None.
     """
-    min_idx = np.where(x >= low)[0][0] if low is not None else 0
-    max_idx = np.where(x <= high)[0][-1] if high is not None else len(x) - 1
-    return min_idx, max_idx
+    if not curve.is_sorted(x):
+        min_idx = np.where(x >= low)[0][0] if low is not None else 0
+        max_idx = np.where(x <= high)[0][-1] if high is not None else len(x) - 1
+        return min_idx, max_idx
+
+    min_idx = np.searchsorted(x, low, side='left') if low is not None else 0
+    max_idx = np.searchsorted(x, high, side='right') - 1 if high is not None else len(x) - 1
+    if min_idx >= len(x) or max_idx < 0:
+        raise IndexError('no x-values in range')
+    return int(min_idx), int(max_idx)
+
+
+def _prefix_integral(c):
+    """
+    Returns the cumulative trapezoid integral of the curve from its first point, cached with the curve
+    until its data change.
+
+    :param c: The curve
+    :type c: Curve
+    :return: numpy.ndarray -- the integral from the first x-value to each x-value
+    """
+    def cumulative():
+        try:
+            return np.array(scipy.integrate.cumtrapz(c.y, c.x, initial=0.0))
+        except:
+            return np.array(scipy.integrate.cumulative_trapezoid(c.y, c.x, initial=0.0))
+
+    return c.cached(('prefix_integral',), cumulative)
 
 
 def __toCurveString(c):
@@ -4273,28 +5320,30 @@ def overlap_interp(cr1, cr2, npts_interp=0):
         - cr1_interp (:py:class:`Curve`) - The first overlapping interpolated curve
         - cr2_interp (:py:class:`Curve`) - The second overlapping interpolated curve
     """
-    # Current overlap of cr1 and cr2
-    overlap = list(cr1.x[np.where(np.logical_and(cr1.x >= cr2.x[0], cr1.x <= cr2.x[-1]))])
-    overlap.extend(list(cr2.x[np.where(np.logical_and(cr2.x >= cr1.x[0], cr2.x <= cr1.x[-1]))]))
-    overlap = list(set(overlap))
-    overlap.sort()
+    x1 = np.asarray(cr1.x, dtype=float)
+    x2 = np.asarray(cr2.x, dtype=float)
 
-    if npts_interp:
-        # np.linespace() between first and last overlap
-        overlap_interp_points = np.linspace(overlap[0], overlap[-1], npts_interp)
+    if not npts_interp and np.array_equal(x1, x2) and np.all(x1[1:] > x1[:-1]):
+        # Both curves already share the same increasing grid
+        overlap = x1
+        new_y1 = cr1.y
+        new_y2 = cr2.y
+    else:
+        # Current overlap of cr1 and cr2
+        overlap = curve.union_grid(x1[np.logical_and(x1 >= x2[0], x1 <= x2[-1])],
+                                   x2[np.logical_and(x2 >= x1[0], x2 <= x1[-1])])
 
-        # Adding np.linespace() points to original overlap points
-        overlap.extend(overlap_interp_points)
-        overlap = list(set(overlap))
-        overlap.sort()
+        if npts_interp:
+            # Adding np.linespace() points between first and last overlap to original overlap points
+            overlap = curve.union_grid(overlap, np.linspace(overlap[0], overlap[-1], npts_interp))
 
-    new_y1 = np.interp(overlap, cr1.x, cr1.y)
-    new_y2 = np.interp(overlap, cr2.x, cr2.y)
+        new_y1 = np.interp(overlap, cr1.x, cr1.y)
+        new_y2 = np.interp(overlap, cr2.x, cr2.y)
 
-    cr1_interp = makecurve(x=np.array(overlap),
+    cr1_interp = makecurve(x=overlap,
                            y=new_y1,
                            name=cr1.name + " overlap_interp")
-    cr2_interp = makecurve(x=np.array(overlap),
+    cr2_interp = makecurve(x=overlap,
                            y=new_y2,
                            name=cr2.name + " overlap_interp")
 
@@ -4329,25 +5378,7 @@ def AvgDiff(cr1, cr2, npts=0, tol=1e80):
     """
     cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
 
-    differences = cr1_interp - cr2_interp
-    avgDiff = np.mean(differences.y)
-    maxDiff = np.max(differences.y)
-    differences = makecurve(x=differences.x,
-                            y=differences.y,
-                            name=f"Differences avgDiff={avgDiff:.6e} maxDiff={maxDiff:.6e}")
-
-    failed_points = np.where(differences.y > tol)
-    failed_curve = makecurve(x=differences.x[failed_points],
-                             y=differences.y[failed_points],
-                             name=f"Failed points npts={len(failed_points[0])} with tol={tol}")
-    failed_curve.scatter = True
-
-    if failed_points[0].size:
-        failed = True
-    else:
-        failed = False
-
-    return cr1_interp, cr2_interp, differences, avgDiff, maxDiff, failed_curve, failed
+    return (cr1_interp, cr2_interp) + _difference_curves('Avg', cr1, cr2, cr1_interp, cr2_interp, tol)
 
 
 def AbsDiff(cr1, cr2, npts=0, tol=1e80):
@@ -4378,26 +5409,7 @@ def AbsDiff(cr1, cr2, npts=0, tol=1e80):
     """
     cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
 
-    differences = cr1_interp - cr2_interp
-    differences.y = np.abs(differences.y)
-    avgDiff = np.mean(differences.y)
-    maxDiff = np.max(differences.y)
-    differences = makecurve(x=differences.x,
-                            y=differences.y,
-                            name=f"Differences avgDiff={avgDiff:.6e} maxDiff={maxDiff:.6e}")
-
-    failed_points = np.where(differences.y > tol)
-    failed_curve = makecurve(x=differences.x[failed_points],
-                             y=differences.y[failed_points],
-                             name=f"Failed points npts={len(failed_points[0])} with tol={tol}")
-    failed_curve.scatter = True
-
-    if failed_points[0].size:
-        failed = True
-    else:
-        failed = False
-
-    return cr1_interp, cr2_interp, differences, avgDiff, maxDiff, failed_curve, failed
+    return (cr1_interp, cr2_interp) + _difference_curves('Abs', cr1, cr2, cr1_interp, cr2_interp, tol)
 
 
 def RelDiff(cr1, cr2, npts=0, tol=1e80):
@@ -4428,45 +5440,7 @@ def RelDiff(cr1, cr2, npts=0, tol=1e80):
     """
     cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
 
-    c1max = np.max(cr1.y)
-    c1min = np.min(cr1.y)
-
-    c2max = np.max(cr2.y)
-    c2min = np.min(cr2.y)
-
-    c1diff = c1max - c1min
-    c2diff = c2max - c2min
-
-    c1Adj = tol * c1diff
-    c2Adj = tol * c2diff
-
-    c1new = np.abs(cr1_interp.y) + c1Adj
-    c2new = np.abs(cr2_interp.y) + c2Adj
-
-    absDiff = np.abs(cr1_interp.y - cr2_interp.y)
-
-    scale = c1new + c2new + 1e-80
-
-    relDiff = absDiff / scale
-
-    avgDiff = np.mean(relDiff)
-    maxDiff = np.max(relDiff)
-    differences = makecurve(x=cr1_interp.x,
-                            y=relDiff,
-                            name=f"Differences avgDiff={avgDiff:.6e} maxDiff={maxDiff:.6e}")
-
-    failed_points = np.where(relDiff > tol)
-    failed_curve = makecurve(x=differences.x[failed_points],
-                             y=differences.y[failed_points],
-                             name=f"Failed points npts={len(failed_points[0])} with tol={tol}")
-    failed_curve.scatter = True
-
-    if failed_points[0].size:
-        failed = True
-    else:
-        failed = False
-
-    return cr1_interp, cr2_interp, differences, avgDiff, maxDiff, failed_curve, failed
+    return (cr1_interp, cr2_interp) + _difference_curves('Rel', cr1, cr2, cr1_interp, cr2_interp, tol)
 
 
 def AbsAndRelDiff(cr1, cr2, npts=0, abs_tol=1e80, rel_tol=1e80):
@@ -4507,15 +5481,15 @@ def AbsAndRelDiff(cr1, cr2, npts=0, abs_tol=1e80, rel_tol=1e80):
         - failed_AND (:py:class:`bool`) - If the `differences` failed the tolerance or not for AbsDiff AND RelDiff
     """
 
-    (cr1_interp, cr2_interp,
-     differences_Abs, avgDiff_Abs,
+    cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
+
+    (differences_Abs, avgDiff_Abs,
      maxDiff_Abs, failed_curve_Abs,
-     failed_Abs) = AbsDiff(cr1, cr2, npts, abs_tol)
+     failed_Abs) = _difference_curves('Abs', cr1, cr2, cr1_interp, cr2_interp, abs_tol)
 
-    (cr1_interp, cr2_interp,
-     differences_Rel, avgDiff_Rel,
+    (differences_Rel, avgDiff_Rel,
      maxDiff_Rel, failed_curve_Rel,
-     failed_Rel) = RelDiff(cr1, cr2, npts, rel_tol)
+     failed_Rel) = _difference_curves('Rel', cr1, cr2, cr1_interp, cr2_interp, rel_tol)
 
     if failed_Abs and failed_Rel:
         failed_AND = True
@@ -4566,15 +5540,15 @@ def AbsOrRelDiff(cr1, cr2, npts=0, abs_tol=1e80, rel_tol=1e80):
         - failed_OR (:py:class:`bool`) - If the `differences` failed the tolerance or not for AbsDiff OR RelDiff
     """
 
-    (cr1_interp, cr2_interp,
-     differences_Abs, avgDiff_Abs,
+    cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
+
+    (differences_Abs, avgDiff_Abs,
      maxDiff_Abs, failed_curve_Abs,
-     failed_Abs) = AbsDiff(cr1, cr2, npts, abs_tol)
+     failed_Abs) = _difference_curves('Abs', cr1, cr2, cr1_interp, cr2_interp, abs_tol)
 
-    (cr1_interp, cr2_interp,
-     differences_Rel, avgDiff_Rel,
+    (differences_Rel, avgDiff_Rel,
      maxDiff_Rel, failed_curve_Rel,
-     failed_Rel) = RelDiff(cr1, cr2, npts, rel_tol)
+     failed_Rel) = _difference_curves('Rel', cr1, cr2, cr1_interp, cr2_interp, rel_tol)
 
     if failed_Abs or failed_Rel:
         failed_OR = True
@@ -4587,6 +5561,108 @@ def AbsOrRelDiff(cr1, cr2, npts=0, abs_tol=1e80, rel_tol=1e80):
             failed_OR)
 
 
+DiffSummary = namedtuple('DiffSummary', ['name', 'failed', 'avgDiff', 'maxDiff', 'curves'])
+
+
+def DiffTable(curvelist1, curvelist2, metric='AbsAndRelDiff', npts=0, abs_tol=1e80, rel_tol=1e80, curves=False,
+              verbose=False):
+    """
+    Compare every curve in the first list with the curve of the same name in the second list, using one
+    of AvgDiff, AbsDiff, RelDiff, AbsAndRelDiff or AbsOrRelDiff. The pairs are compared in parallel and
+    each pair is interpolated onto its overlap once for all the differences of the metric.
+
+    >>> baseline = pydvpy.read('baseline.ult')
+
+    >>> current = pydvpy.read('current.ult')
+
+    >>> table = pydvpy.DiffTable(baseline, current, 'AbsAndRelDiff', abs_tol=1e-8, rel_tol=1e-6)
+
+    >>> failures = [row.name for row in table if row.failed]
+
+    :param curvelist1: The first list of curves, e.g. the baseline
+    :type curvelist1: list
+    :param curvelist2: The second list of curves
+    :type curvelist2: list
+    :param metric: The comparison, one of AvgDiff, AbsDiff, RelDiff, AbsAndRelDiff or AbsOrRelDiff
+    :type metric: str
+    :param npts: The number of points in the interpolation
+    :type npts: int
+    :param abs_tol: The tolerance for AvgDiff or AbsDiff failure
+    :type abs_tol: float
+    :param rel_tol: The tolerance for RelDiff failure
+    :type rel_tol: float
+    :param curves: If True the full results of the metric's function are returned for each pair
+    :type curves: bool
+    :param verbose: If True the table will be printed to stdout
+    :type verbose: bool
+    :return: list -- A DiffSummary for each curve name found in both lists, in the order of the first list,
+                     with the name, whether it failed, dictionaries of the average and maximum differences
+                     keyed by Avg, Abs or Rel, and the tuple returned by the metric's function or None.
+                     Pairs that do not overlap fail with NaN differences.
+    """
+    kinds = {'AvgDiff': (('Avg', abs_tol),),
+             'AbsDiff': (('Abs', abs_tol),),
+             'RelDiff': (('Rel', rel_tol),),
+             'AbsAndRelDiff': (('Abs', abs_tol), ('Rel', rel_tol)),
+             'AbsOrRelDiff': (('Abs', abs_tol), ('Rel', rel_tol))}
+    if metric not in kinds:
+        raise ValueError('metric must be one of ' + ', '.join(kinds))
+
+    curves2 = dict()
+    for c in _convert_to_curvelist(curvelist2):
+        curves2.setdefault(c.name, c)
+    pairs = [(c, curves2[c.name]) for c in _convert_to_curvelist(curvelist1) if c.name in curves2]
+
+    def compare(pair):
+        cr1, cr2 = pair
+        try:
+            cr1_interp, cr2_interp = overlap_interp(cr1, cr2, npts)
+        except IndexError:
+            # No overlap to interpolate over
+            cr1_interp, cr2_interp = overlap_interp(cr1, cr2)
+        avgDiff = dict()
+        maxDiff = dict()
+        failed = dict()
+        results = (cr1_interp, cr2_interp)
+        for kind, tol in kinds[metric]:
+            if len(cr1_interp.x):
+                if curves:
+                    result = _difference_curves(kind, cr1, cr2, cr1_interp, cr2_interp, tol)
+                    results += result
+                    avgDiff[kind], maxDiff[kind], failed[kind] = result[1], result[2], result[4]
+                else:
+                    diff = _difference(kind, cr1, cr2, cr1_interp.y, cr2_interp.y, tol)
+                    avgDiff[kind], maxDiff[kind], failed[kind] = np.mean(diff), np.max(diff), bool(np.any(diff > tol))
+            else:
+                avgDiff[kind], maxDiff[kind], failed[kind] = np.nan, np.nan, True
+
+        if metric == 'AbsOrRelDiff':
+            pair_failed = failed['Abs'] or failed['Rel']
+        else:
+            pair_failed = all(failed.values())
+        if curves and len(kinds[metric]) > 1:
+            results += (pair_failed,)
+
+        return DiffSummary(cr1.name, pair_failed, avgDiff, maxDiff, results if curves else None)
+
+    # Threads share the curves' data and numpy releases the GIL for the interpolation and reductions
+    with ThreadPool(processes=min(cpu_count(), max(len(pairs), 1))) as pool:
+        table = pool.map(compare, pairs)
+
+    if verbose:
+        labels = [kind for kind, tol in kinds[metric]]
+        columns = ''.join(f'avg{kind}'.ljust(14) + f'max{kind}'.ljust(14) for kind in labels)
+        print('\n' + 'Result'.ljust(8) + columns + 'Name')
+        for row in table:
+            values = ''.join(f'{row.avgDiff[kind]:<14.6e}{row.maxDiff[kind]:<14.6e}' for kind in labels)
+            print(('FAIL' if row.failed else 'PASS').ljust(8) + values + row.name)
+        missing = [c.name for c in _convert_to_curvelist(curvelist1) if c.name not in curves2]
+        if missing:
+            print('\nNot found in the second list: ' + ', '.join(missing))
+
+    return table
+
+
 def addPoint(curvelist, x, y):
     """
     Appends both x and y coordinates to the end of each list of values of a Curve.
@@ -4704,6 +5780,77 @@ def crop_and_interp(curvelist, npts=None, idomian=None):
     return new_curves
 
 
+def resample(curvelist, grid=100, method='linear', stacked=False):
+    """
+    Resample curves onto a uniform number of points or onto a given grid. Curves that share
+    the same x-values are interpolated together, so resampling many curves from one file onto
+    one grid costs little more than resampling one of them.
+
+    Grid points outside a curve's domain are held at the curve's end values.
+
+     >>> curves = pydvpy.read('testData.txt')
+
+     >>> new_curves = pydvpy.resample(curves, 200) OR
+
+     >>> new_curves = pydvpy.resample(curves, np.linspace(0, 4, 50), method='pchip') OR
+
+     >>> x, y = pydvpy.resample(curves, np.linspace(0, 4, 50), stacked=True)
+
+    :param curvelist: The Curve or list of Curves
+    :type curvelist: Curve or list
+    :param grid: The number of evenly spaced points spanning each curve's domain, or the x-values to resample to
+    :type grid: int or array-like
+    :param method: The interpolant, one of 'linear', 'pchip', 'cubic', 'nearest' or 'previous'
+    :type method: str
+    :param stacked: Return the grid and an array with one row of y-values per curve instead of curves.
+                    The curves must share their x-values unless a grid is given.
+    :type stacked: bool
+    :return: list -- A list of new curves, or the tuple (x, y) if stacked is True
+    """
+    curves = _convert_to_curvelist(curvelist)
+    if method not in curve.RESAMPLE_METHODS:
+        raise ValueError("{} is not a supported option for method".format(method))
+
+    # Group the curves by their x-values
+    groups = dict()
+    for i, cur in enumerate(curves):
+        x = np.asarray(cur.x, dtype=float)
+        key = (len(x), x[0], x[-1]) if len(x) else (0,)
+        for gx, members in groups.setdefault(key, list()):
+            if gx is x or np.array_equal(gx, x):
+                members.append(i)
+                break
+        else:
+            groups[key].append((x, [i]))
+    groups = [group for bucket in groups.values() for group in bucket]
+
+    shared = np.ndim(grid) > 0
+    if shared:
+        grid = np.asarray(grid, dtype=float)
+        values = np.empty((len(curves), len(grid)))
+    elif stacked and len(groups) != 1:
+        raise ValueError('curves must share their x-values to be stacked without a grid')
+
+    rows = [None] * len(curves)
+    for x, members in groups:
+        xs = grid if shared else np.linspace(np.min(x), np.max(x), int(grid))
+        ys = curve.resample_values(x, [curves[i].y for i in members], xs, method)
+        if shared:
+            values[members] = ys
+        for row, i in enumerate(members):
+            rows[i] = (xs, values[i] if shared else ys[row])
+
+    if stacked:
+        return (grid, values) if shared else (xs, ys)
+
+    new_curves = list()
+    for cur, (xs, ys) in zip(curves, rows):
+        new_curves.append(makecurve(x=xs.copy(),
+                                    y=ys,
+                                    name=f"{cur.name} Resampled {method} npts={len(xs)}"))
+    return new_curves
+
+
 def shift(curvelist, x=0, y=0):
     """
     Shifts curves by an x and y value.
@@ -4782,7 +5929,8 @@ def ClipValues(curvelist, ymin, ymax):
 def LinearFit(c, x):
     """
     This method takes in a value for x and uses linear interpolation to return
-    the cooresponding y value for the given data
+    the cooresponding y value for the given data. A list of x values can be given
+    to interpolate all of them at once.
 
     >>> curves = pydvpy.read('testData.txt')
 
@@ -4790,36 +5938,29 @@ def LinearFit(c, x):
 
     >>> x, y = vals[0]
 
+    >>> vals = pydvpy.LinearFit(curves[0], [2, 3, 4])
+
     :param c: The curve
     :type c: Curve
-    :param value: x value
-    :type value: float
+    :param value: x value or list of x values
+    :type value: float or list
     :return: list -- A list of tuples where each tuple contains the y value, and the given x
     """
-    xypairs = list()
+    xvals = np.atleast_1d(np.asarray(x, dtype=float)).ravel()
 
-    def findSegment(x):
-        iLeft = 0
-        iRight = len(c.x) - 1
-        while 1:
-            if (iRight - iLeft) <= 1:
-                return iLeft
-            i = (iLeft + iRight) // 2
-            if x < c.x[i]:
-                iRight = i
-            else:
-                iLeft = i
-
-    i = findSegment(x)
+    # The segment to the left of each x, using the first and last segments outside the curve
+    i = np.clip(np.searchsorted(c.x, xvals, side='right') - 1, 0, len(c.x) - 2)
     slope = (c.y[i + 1] - c.y[i]) / (c.x[i + 1] - c.x[i])
-    y = slope * (x - c.x[i]) + c.y[i]
-    xypairs.append((float(x), y))
-    return xypairs
+    y = slope * (xvals - c.x[i]) + c.y[i]
+
+    return list(zip(xvals.tolist(), y))
 
 
 def PolyFit(c, value, order):
     """
-    Using a Polynomial Fit, get the y values of the curve for a given x.
+    Using a Polynomial Fit, get the y values of the curve for a given x. The fitted
+    polynomial is cached with the curve until its data change, and a list of x values
+    can be given to evaluate all of them at once.
 
     >>> curves = pydvpy.read('testData.txt')
 
@@ -4827,24 +5968,27 @@ def PolyFit(c, value, order):
 
     >>> x, y = vals[0]
 
+    >>> vals = pydvpy.PolyFit(curves[0], [2, 3, 4], 2)
+
     :param c: The curve
     :type c: Curve
-    :param value: x value
-    :type value: float
+    :param value: x value or list of x values
+    :type value: float or list
     :param order: Order of polynomial
     :type order: int
     :return: list -- A list of tuples where each tuple contains the y value, and the given x
     """
-    xypairs = list()
-    poly = np.poly1d(np.polyfit(c.x, c.y, order))
-    y = poly(value)
-    xypairs.append((float(value), y))
-    return xypairs
+    xvals = np.atleast_1d(np.asarray(value, dtype=float)).ravel()
+    poly = c.cached(('polyfit', order), lambda: np.poly1d(np.polyfit(c.x, c.y, order)))
+
+    return list(zip(xvals.tolist(), poly(xvals)))
 
 
 def SplineFit(c, value, order, smooth):
     """
-    Using a Spline Fit, get the y values of the curve for a given x.
+    Using a Spline Fit, get the y values of the curve for a given x. The fitted
+    spline is cached with the curve until its data change, and a list of x values
+    can be given to evaluate all of them at once.
 
     >>> curves = pydvpy.read('testData.txt')
 
@@ -4852,21 +5996,22 @@ def SplineFit(c, value, order, smooth):
 
     >>> x, y = vals[0]
 
+    >>> vals = pydvpy.SplineFit(curves[0], [2, 3, 4], 3, 0)
+
     :param c: The curve
     :type c: Curve
-    :param value: x value
-    :type value: float
+    :param value: x value or list of x values
+    :type value: float or list
     :param order: Order for spline
     :type order: int
     :param smooth: Smoothing condition for spline
     :type smooth: int
     :return: list -- A list of tuples where each tuple contains the y value, and the given x
     """
-    xypairs = list()
-    spline = scipy.interpolate.splrep(c.x, c.y, k=order, s=smooth)
-    y = scipy.interpolate.splev(value, spline, der=0)
-    xypairs.append((float(value), y))
-    return xypairs
+    xvals = np.atleast_1d(np.asarray(value, dtype=float)).ravel()
+    spline = c.cached(('splrep', order, smooth), lambda: scipy.interpolate.splrep(c.x, c.y, k=order, s=smooth))
+
+    return list(zip(xvals.tolist(), scipy.interpolate.splev(xvals, spline, der=0)))
 
 
 def MovingAvg(c, npts):
@@ -4886,30 +6031,111 @@ def MovingAvg(c, npts):
     :return: Curve -- A new smoothed curve
     """
     xset = c.x
-    yset = c.y
-    newvals = []
-    avgvals = []
-    count = 0
-    avgsum = 0
-    for i in range(npts // 2):
-        avgvals.append(yset[count])
-        avgsum += yset[count]
-        count += 1
-
-    for i in range(len(yset)):
-        if count < len(yset):
-            avgvals.append(yset[count])
-            avgsum += yset[count]
-            count += 1
-        newvals.append(avgsum / len(avgvals))
-        if len(avgvals) == npts or count >= len(yset):
-            avgsum -= avgvals.pop(0)
+    yset = np.asarray(c.y, dtype=float)
+    n = len(yset)
+    i = np.arange(n)
+
+    # The window reaches npts // 2 points ahead of each point. It starts at the first point until
+    # it holds npts points, or until it reaches the end of the curve, and then slides forward by one
+    # point per point, shrinking at the end of the curve. A curve shorter than the reach fills one window.
+    ahead = min(max(npts // 2, 0), n - 1)
+    filled = min(npts - 1 - ahead, n - 1 - ahead) if npts > 0 else n - 1 - ahead
+    start = np.maximum(i - filled, 0)
+    stop = np.minimum(i + ahead, n - 1) + 1
+    newvals = _window_sums(yset, start, stop) / (stop - start)
 
     return makecurve(x=xset,
                      y=newvals,
                      name=f"{c.name} MovingAvg npts={npts}")
 
 
+def rolling(curvelist, window, stat='mean', by='samples', q=0.5):
+    """
+    Compute a statistic of the y-values in a window trailing each point of the curve or list of curves.
+    The window of a point holds the point and the window - 1 points before it, or with by='x' the points
+    whose x-values are within window of the point's x-value, so it suits curves with non-uniform x-values.
+    Windows are cut short at the start of the curve. All of the curves are processed together, and NaN
+    y-values make the statistic of every window that holds them NaN.
+
+    Sums and means use prefix sums, and standard deviations, minimums and maximums combine doubling runs
+    of points, so their cost barely depends on the window size. Medians and quantiles of windows of window
+    points come from scipy.ndimage.rank_filter, and only the shorter windows at the start of each curve
+    and windows in x are sorted.
+
+    >>> curves = pydvpy.read('testData.txt')
+
+    >>> maxima = pydvpy.rolling(curves, 10, 'max')
+
+    >>> spread = pydvpy.rolling(curves[0], 2.5, 'std', by='x')
+
+    >>> upper = pydvpy.rolling(curves, 50, 'quantile', q=0.9)
+
+    :param curvelist: The curve or list of curves
+    :type curvelist: Curve or list
+    :param window: The number of points in each window, or its width in x with by='x'
+    :type window: int or float
+    :param stat: 'mean', 'sum', 'std', 'min', 'max', 'median' or 'quantile'
+    :type stat: str
+    :param by: 'samples' or 'x', how the window is measured
+    :type by: str
+    :param q: The quantile, between 0 and 1, of the 'quantile' statistic
+    :type q: float
+    :returns: list -- the new curves, with the statistic of each point's window as its y-value
+    """
+    if stat not in ('mean', 'sum', 'std', 'min', 'max', 'median', 'quantile'):
+        raise ValueError("{} is not a supported option for stat".format(stat))
+    if by not in ('samples', 'x'):
+        raise ValueError("{} is not a supported option for by".format(by))
+    if not 0 <= q <= 1:
+        raise ValueError('q must be between 0 and 1')
+    if by == 'samples':
+        window = int(window)
+        if window < 1:
+            raise ValueError('window must hold at least one point')
+    elif not window >= 0:
+        raise ValueError('window must not be negative')
+
+    curves = _convert_to_curvelist(curvelist)
+    if not curves:
+        return list()
+
+    x, y, offsets, i, n = _segments(curves)
+    stop = offsets + i + 1
+    if by == 'samples':
+        start = offsets + np.maximum(i - window + 1, 0)
+    else:
+        lows = list()
+        for c in curves:
+            cx = np.asarray(c.x, dtype=float)
+            if not curve.is_sorted(cx):
+                raise ValueError('the x-values of {} must be increasing for windows in x'.format(c.name))
+            lows.append(np.searchsorted(cx, cx - window, side='right'))
+        start = offsets + np.concatenate(lows)
+        start = np.minimum(start, stop - 1)
+
+    count = stop - start
+    if stat in ('mean', 'sum'):
+        values = _window_sums(y, start, stop)
+        if stat == 'mean':
+            values /= count
+    elif stat == 'std':
+        with np.errstate(invalid='ignore'):
+            values = np.sqrt(_window_moments(y, start, stop)[1] / count)
+    elif stat in ('min', 'max'):
+        values = _window_extrema(y, start, stop, np.minimum if stat == 'min' else np.maximum)
+    else:
+        values = _window_quantiles(y, start, stop, 0.5 if stat == 'median' else q,
+                                   window if by == 'samples' else None)
+
+    name = stat if stat != 'quantile' else 'quantile q={}'.format(q)
+    new_curves = list()
+    bounds = np.cumsum([len(c.x) for c in curves])[:-1]
+    for c, cx, cy in zip(curves, np.split(x, bounds), np.split(values, bounds)):
+        new_curves.append(makecurve(x=cx, y=cy, name=f"{c.name} Rolling {name} window={window}"))
+
+    return new_curves
+
+
 def GuassianFilter(c, sigma):
     """
     This smooths a curve using a Gaussian filter.
@@ -4984,32 +6210,30 @@ def TimeShift(cbase, cset, tol=1e80, pairID=0, version=0):
 
     :param cbase: The base Curve
     :type cbase: Curve
-    :param cset: The set Curve
-    :type cset: Curve
+    :param cset: The set Curve or a list of set Curves, which are all shifted against cbase in one pass
+    :type cset: Curve or list
     :param tol: The tolerance for the shift
     :type tol: float
     :param pairID: The pair ID for the curve names
     :type pairID: float
     :param version: The version for the curve names
     :type version: float
-    :return: Curve -- A new time shifted curve
-    """
-    def moving_average(a, n=3):
-        y = np.copy(a)
-        for i in range(n // 2):
-            y = np.insert(y, 0, a[0])
-            y = np.append(y, a[-1])
-        ret = np.cumsum(y, dtype=float)
-        ret = np.insert(ret, 0, 0.)
-        ret[n:] = ret[n:] - ret[:-n]
-        return ret[n:] / n
-
+    :return: Curve or list -- A new time shifted curve, or a list of them if cset is a list
+    """
+    csets = _convert_to_curvelist(cset)
     smthWindow = 5
 
     xbase = cbase.x
     ybase = cbase.y
-    xset = cset.x
-    yset = cset.y
+    xset, yset = _segments(csets)[:2]
+
+    def moving_average(a, n=smthWindow):
+        # average of the n values centered on each value, repeating the first and last value. Each curve
+        # gets its own plain cumulative sum, so equal windows give the same averages as the old loop.
+        y = np.concatenate((np.repeat(a[:1], n // 2), a, np.repeat(a[-1:], n // 2)))
+        ret = np.concatenate(([0.], np.cumsum(y, dtype=float)))
+        return (ret[n:] - ret[:-n]) / n
+
     # find index into xbase of the values in xset
     indx = np.digitize(xset, xbase) - 1
     # keep values in bounds so points off the xbase array
@@ -5019,36 +6243,44 @@ def TimeShift(cbase, cset, tol=1e80, pairID=0, version=0):
     slopebase = (ybase[1:] - ybase[:-1]) / (xbase[1:] - xbase[:-1] + 1e-20)  # len of xbase - 1
     yintrp = np.interp(xset, xbase, ybase)  # len of xset
     residual = yset - yintrp
-    delta_t = residual / (slopebase[indx] + 1e-20)
-
-    # smooth the slopes before finding the max value.
-    # noe indices of smthslopebase match those of cset arrays
-    smthslopebase = moving_average(slopebase[indx], smthWindow)
-
-    # find the slope of the new curve and smooth it
-    slopeset = (yset[1:] - yset[:-1]) / (xset[1:] - xset[:-1] + 1e-20)  # len of xset - 1
-    smthslopeset = moving_average(slopeset, smthWindow)
-    smthslopeset = np.append(smthslopeset, smthslopeset[-1])  # extend to length of xset
-
-    # set slope to zero when base and set have different signs
-    # The delta_t is likely a poor choice if this is true
-    smthslopebase = np.where(smthslopebase * smthslopeset > 0, smthslopebase, 0.0)
-
-    # Use the delta_t at the point with the largest slope (abs value)
-    maxslopebase = np.argmax(np.abs(smthslopebase))
-    delta_t = residual[maxslopebase] / (slopebase[indx])[maxslopebase]
-    #
-    # this gives least squares delta_t
-    # delta_t = np.sum(residual*slopebase[indx] )/np.sum(np.power(slopebase[indx],2))
-
-    if np.abs(delta_t) > tol:
-        # result.setOutcome(False)
-        delta_t = np.abs(delta_t) * tol / delta_t
-    xshifted = xset + delta_t
-
-    return makecurve(x=xshifted,
-                     y=yset,
-                     name=f"{cset.name} pairID={pairID} version={version}")
+
+    # find the slope of the new curves, the last point of each curve has no slope
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopeset = (yset[1:] - yset[:-1]) / (xset[1:] - xset[:-1] + 1e-20)
+
+    shifted = list()
+    for c, start in zip(csets, np.cumsum([0] + [len(c.x) for c in csets])):
+        seg = slice(start, start + len(c.x))
+
+        # smooth the slopes before finding the max value.
+        # noe indices of smthslopebase match those of cset arrays
+        smthslopebase = moving_average(slopebase[indx[seg]])
+        smthslopeset = moving_average(slopeset[start:start + len(c.x) - 1])
+        smthslopeset = np.append(smthslopeset, smthslopeset[-1:])  # extend to length of xset
+
+        # set slope to zero when base and set have different signs
+        # The delta_t is likely a poor choice if this is true
+        smthslopebase = np.where(smthslopebase * smthslopeset > 0, smthslopebase, 0.0)
+
+        # Use the delta_t at the point with the largest slope (abs value)
+        maxslopebase = np.argmax(np.abs(smthslopebase))
+        delta_t = residual[seg][maxslopebase] / (slopebase[indx[seg]])[maxslopebase]
+        #
+        # this gives least squares delta_t
+        # delta_t = np.sum(residual*slopebase[indx] )/np.sum(np.power(slopebase[indx],2))
+
+        if np.abs(delta_t) > tol:
+            # result.setOutcome(False)
+            delta_t = np.abs(delta_t) * tol / delta_t
+        xshifted = xset[seg] + delta_t
+
+        shifted.append(makecurve(x=xshifted,
+                                 y=yset[seg],
+                                 name=f"{c.name} pairID={pairID} version={version}"))
+
+    if isinstance(cset, list):
+        return shifted
+    return shifted[0]
 
 
 def getfl(curvelist):
@@ -301,3 +301,75 @@ def test_getx_getymax_getymin():
     with open('out.txt', 'r') as f:
         contents = f.readlines()
         assert contents == pydv_output
+
+
+def test_padstep():
+
+    # step curve with steps at 2, 4, 6 padded with 1, 3, 7
+    x, y = pdv.pdvutil.padstep([2, 4, 4, 6], [1, 1, 5, 5], np.array([1, 2, 3, 4, 6, 7]))
+
+    np.testing.assert_array_equal(x, [1, 2, 2, 3, 3, 4, 4, 6, 7, 7])
+    np.testing.assert_array_equal(y, [0, 0, 1, 1, 1, 1, 5, 0, 0, 0])
+
+
+def test_func_curve_inplace():
+
+    main = pdv.Command()
+    if not pdv.QApplication.instance():
+        main.app = pdv.QApplication([])
+    else:
+        main.app = pdv.QApplication.instance()
+
+    main.plotter = pdv.pdvplot.Plotter(main)
+
+    a = pdv.pydvpy.makecurve(np.linspace(0, 1, 5), np.linspace(0, 1, 5), name='a')
+    b = pdv.pydvpy.makecurve(np.linspace(0, 1, 5), np.linspace(0, 1, 5), name='b')
+    a.plotname = 'A'
+    b.plotname = 'B'
+    main.curvelist = []
+    main.plotlist = [a, b]
+
+    # a owns its values so they are overwritten
+    y = a.y
+    main.func_curve('a', 'sin')
+    assert a.y is y
+    np.testing.assert_allclose(a.y, np.sin(np.linspace(0, 1, 5)))
+    assert a.name == 'sin(a)'
+
+    main.func_curve('a', 'powa', do_x=1, arg=2)
+    np.testing.assert_allclose(a.x, 2 ** np.linspace(0, 1, 5))
+    assert a.name == 'powax(sin(a))'
+
+    main.modcurve('a', 'my', '2')
+    assert a.y is y
+    np.testing.assert_allclose(a.y, 2 * np.sin(np.linspace(0, 1, 5)))
+
+    # b shares its values with a so a new array is made
+    b.y = a.y[:]
+    main.func_curve('a', 'sqr')
+    np.testing.assert_allclose(b.y, 2 * np.sin(np.linspace(0, 1, 5)))
+    np.testing.assert_allclose(a.y, (2 * np.sin(np.linspace(0, 1, 5))) ** 2)
+
+    # one masked pass keeps the points within the limit
+    main.modcurve('b', 'ymin', '0.4')
+    np.testing.assert_allclose(b.x, [0.25, 0.5, 0.75, 1])
+    assert b.edited
+
+
+def test_difftable_tolerances(monkeypatch):
+
+    main = pdv.Command()
+    a = pdv.pydvpy.makecurve([0, 1, 2], [1, 2, 3], name='a')
+    b = pdv.pydvpy.makecurve([0, 1, 2], [1, 2, 4], name='a')
+    a.plotname = 'A'
+    b.plotname = 'B'
+    main.plotlist = [a, b]
+
+    calls = list()
+    monkeypatch.setattr(pdv.pydvpy, 'DiffTable', lambda *args, **kwargs: calls.append(args[2:]) or [])
+
+    # the numbers are the metric's own tolerances followed by npts
+    main.do_difftable('a vs b RelDiff 1e-6')
+    main.do_difftable('a vs b AbsDiff 1e-8 100')
+    main.do_difftable('a vs b AbsAndRelDiff 1e-8 1e-6 50')
+    assert calls == [('RelDiff', 0, 1e80, 1e-6), ('AbsDiff', 100, 1e-8, 1e80), ('AbsAndRelDiff', 50, 1e-8, 1e-6)]
@@ -13,6 +13,7 @@ PYDV_DIR = os.path.dirname(TEST_DIR)
 
 sys.path.append(os.path.join(PYDV_DIR, "pydv"))
 import pydvpy  # noqa E402
+import curve  # noqa E402
 
 
 test_files = list(pathlib.Path(TEST_DIR).glob('testData.*'))
@@ -275,3 +276,614 @@ def test_BIG_file():
     os.remove(big_file)
 
     assert end < 10
+
+
+def test_summary_cache():
+
+    c = pydvpy.makecurve([1, 2, 3, 4], [-1, 0, 5, 2], name='summary')
+
+    stats = c.summary()
+    assert stats.count == 4
+    assert (stats.xmin, stats.xmax, stats.ymin, stats.ymax) == (1, 4, -1, 5)
+    assert stats.yminpos == 2
+    assert c.summary() is stats
+
+    # in place edits
+    c.y *= 2
+    assert c.summary().ymax == 10
+
+    c.y[0] = -20
+    assert c.summary().ymin == -20
+
+    np.negative(c.x, out=c.x)
+    assert c.summary().xmin == -4
+    assert c.summary().xminpos is None
+
+    # reassignment
+    c.x = [5, 6, 7, 8]
+    assert c.summary().xmin == 5
+
+    # copies do not share the cache
+    d = c.copy()
+    d.y[:] = 0
+    assert c.summary().ymax == 10
+    assert d.summary().ymax == 0
+
+
+def test_getinterp_union():
+
+    a = pydvpy.makecurve([0, 1, 2, 2, 4], [1, 2, 3, 3, 5], name='a')
+    b = pydvpy.makecurve([3, 0.5, 1], [1, 1, 2], name='b')
+    a.math_interp_right = -1
+
+    ia, ib = curve.getinterp(a, b, a.math_interp_left, a.math_interp_right, None)
+
+    ux = sorted(set(a.x).union(set(b.x)))
+    np.testing.assert_array_equal(ia.x, ux)
+    np.testing.assert_array_equal(ib.x, ux)
+    np.testing.assert_array_equal(ia.y, np.interp(ux, a.x, a.y, None, -1))
+    np.testing.assert_array_equal(ib.y, np.interp(ux, b.x, b.y))
+    assert ia.name == 'a'
+
+
+def test_appendcurves():
+
+    a = pydvpy.makecurve([1, 2, 2, 3], [1, 2, 4, 3])
+    b = pydvpy.makecurve([3, 4, 2], [5, 4, 6])
+    c = pydvpy.makecurve([2, 5], [10, 5])
+
+    nc = pydvpy.appendcurves([a, b, c])
+
+    np.testing.assert_array_equal(nc.x, [1, 2, 3, 4, 5])
+    # duplicates of a and b are averaged together, then averaged with c
+    np.testing.assert_array_equal(nc.y, [1, 7, 4, 4, 5])
+
+
+def test_compile_expression():
+
+    a = pydvpy.makecurve([0, 1, 2, 3], [1, 2, 0, 4], name='a')
+    b = pydvpy.makecurve([0.5, 1.5, 2.5], [2, 0, 1], name='b')
+    c = pydvpy.makecurve([1, 2, 4], [3, 1, 2], name='c')
+    a.math_interp_left = 5
+
+    expression = curve.compile_expression('-(a - b) * c / b + a**2')
+    assert curve.compile_expression('-(a - b) * c / b + a**2') is expression
+    assert expression.operands == ('a', 'b', 'c')
+
+    nc = expression.evaluate({'a': a, 'b': b, 'c': c})
+    expected = -(a - b) * c / b + a**2
+    np.testing.assert_array_equal(nc.x, expected.x)
+    np.testing.assert_array_equal(nc.y, expected.y)
+
+    nc = pydvpy.divide([a, b, c])
+    expected = a / b / c
+    np.testing.assert_array_equal(nc.x, expected.x)
+    np.testing.assert_array_equal(nc.y, expected.y)
+
+
+def test_smooth():
+
+    c1 = pydvpy.makecurve([0, 1, 2, 3, 4], [1, 2, 3, 4, 5])
+    c2 = pydvpy.makecurve([0, 2, 6], [4, 0, 2])
+
+    pydvpy.smooth([c1, c2], 2)
+
+    # x window shrinks at the ends, y window repeats the end values
+    np.testing.assert_allclose(c1.x, [0, 1, 2, 3, 4])
+    np.testing.assert_allclose(c1.y, [1.6, 2.2, 3, 3.8, 4.4])
+    np.testing.assert_allclose(c2.x, [0, 8 / 3, 6])
+    np.testing.assert_allclose(c2.y, [14 / 5, 12 / 5, 2])
+
+    # NaNs and infinities only reach the windows that contain them
+    c3 = pydvpy.makecurve(np.arange(8), [1, 2, np.nan, 4, 5, 6, 7, 8])
+    c4 = pydvpy.makecurve(np.arange(8), [1, 2, np.inf, 4, 5, 6, 7, -np.inf])
+    pydvpy.smooth([c3, c4], 1)
+    np.testing.assert_allclose(c3.y, [4 / 3, np.nan, np.nan, np.nan, 5, 6, 7, 23 / 3])
+    np.testing.assert_allclose(c4.y, [4 / 3, np.inf, np.inf, np.inf, 5, 6, -np.inf, -np.inf])
+
+
+def test_movingavg_timeshift():
+
+    c = pydvpy.makecurve(np.arange(6), [1, 2, 3, 4, 5, 6])
+
+    # the window fills up to npts points, then slides and shrinks at the end
+    np.testing.assert_allclose(pydvpy.MovingAvg(c, 3).y, [1.5, 2, 3, 4, 5, 5.5])
+    np.testing.assert_allclose(pydvpy.MovingAvg(c, 4).y, [2, 2.5, 3.5, 4.5, 5, 5.5])
+
+    # curves shorter than half the window average all of their points first
+    np.testing.assert_allclose(pydvpy.MovingAvg(pydvpy.makecurve([0, 1], [1, 2]), 4).y, [1.5, 2])
+    np.testing.assert_allclose(pydvpy.MovingAvg(pydvpy.makecurve([0, 1, 2], [1, 2, 6]), 10).y, [3, 4, 6])
+
+    x = np.linspace(0, 3, 40)
+    base = pydvpy.makecurve(x, np.sin(x))
+    csets = [pydvpy.makecurve(x[::2], np.sin(x[::2] + 0.01)), pydvpy.makecurve(x[1::3], np.sin(x[1::3] - 0.02))]
+
+    shifted = pydvpy.TimeShift(base, csets)
+    assert len(shifted) == 2
+    for cset, nc in zip(csets, shifted):
+        np.testing.assert_allclose(nc.x, pydvpy.TimeShift(base, cset).x)
+    np.testing.assert_allclose(shifted[0].x - csets[0].x, 0.01, rtol=0.1)
+    np.testing.assert_allclose(shifted[1].x - csets[1].x, -0.02, rtol=0.1)
+
+    # a set curve past the end of the baseline has tied smoothed slopes, which pick the same point as the old loop
+    def old_shift(xb, yb, xs, ys):
+        def moving_average(a, n=5):
+            y = np.concatenate(([a[0]] * (n // 2), a, [a[-1]] * (n // 2)))
+            ret = np.insert(np.cumsum(y, dtype=float), 0, 0.)
+            ret[n:] = ret[n:] - ret[:-n]
+            return ret[n:] / n
+
+        indx = np.clip(np.digitize(xs, xb) - 1, 0, len(xb) - 2)
+        slopebase = (yb[1:] - yb[:-1]) / (xb[1:] - xb[:-1] + 1e-20)
+        residual = ys - np.interp(xs, xb, yb)
+        smthslopeset = moving_average((ys[1:] - ys[:-1]) / (xs[1:] - xs[:-1] + 1e-20))
+        smthslopeset = np.append(smthslopeset, smthslopeset[-1])
+        smthslopebase = moving_average(slopebase[indx])
+        smthslopebase = np.where(smthslopebase * smthslopeset > 0, smthslopebase, 0.0)
+        k = np.argmax(np.abs(smthslopebase))
+        return xs + residual[k] / slopebase[indx][k]
+
+    xb = np.linspace(0, 4, 9)
+    xs = np.linspace(0.1, 5.5, 12)
+    base = pydvpy.makecurve(xb, 0.5 * xb + 0.3 * xb ** 2)
+    csets = [pydvpy.makecurve(xs, 0.5 * xs + 0.3 * xs ** 2 + 0.05), pydvpy.makecurve(xs[:7], np.sin(xs[:7]))]
+    for cset, nc in zip(csets, pydvpy.TimeShift(base, csets)):
+        np.testing.assert_array_equal(nc.x, old_shift(base.x, base.y, cset.x, cset.y))
+
+
+def test_convolve_methods():
+
+    # two unit boxes convolve to a triangle
+    g = pydvpy.makecurve([0, 1], [1, 1])
+    h = pydvpy.makecurve([0, 1], [1, 1])
+
+    direct = pydvpy.convolvec(g, h, 40)
+    np.testing.assert_allclose(direct.x, np.arange(40) * 0.05, atol=1e-12)
+    np.testing.assert_allclose(direct.y, np.maximum(0, 1 - np.abs(direct.x - 1)), atol=1e-12)
+
+    fft = pydvpy.convolvec(g, h, 40, method='fft')
+    np.testing.assert_allclose(fft.x, direct.x)
+    np.testing.assert_allclose(fft.y, direct.y, atol=1e-2)
+
+    x = np.linspace(0, 10, 200)
+    g = pydvpy.makecurve(x, np.sin(x))
+    h = pydvpy.makecurve(np.linspace(-1, 1, 50), np.exp(-4 * np.linspace(-1, 1, 50)**2))
+    np.testing.assert_allclose(pydvpy.convolveb(g, h, method='fft').y, pydvpy.convolveb(g, h).y, atol=1e-2)
+
+
+def test_getx_levels():
+
+    c = pydvpy.makecurve([0, 1, 2, 3, 4], [0, 2, 0, 2, 2])
+
+    assert pydvpy.getx(c, 1) == [(0.5, 1.0), (1.5, 1.0), (2.5, 1.0)]
+    assert pydvpy.getx(c, 2) == [(1.0, 2.0), (3.0, 2.0), (4.0, 2.0)]
+
+    # all levels at once, levels out of range have no x values
+    vals = pydvpy.getx(c, [2, 1, 5])
+    assert vals == [pydvpy.getx(c, 2), pydvpy.getx(c, 1), []]
+
+    # range in between curve points
+    assert pydvpy.getx(c, 1, 0.25, 0.75) == [(0.5, 1.0)]
+
+
+def test_fit_queries():
+
+    c = pydvpy.makecurve([0, 1, 2, 4], [0, 2, 3, 7])
+
+    # outside the curve the end segments are extended
+    assert pydvpy.LinearFit(c, [-1, 0.5, 1, 3, 5]) == [(-1, -2), (0.5, 1), (1, 2), (3, 5), (5, 9)]
+    assert pydvpy.LinearFit(c, 3) == [(3, 5)]
+
+    vals = pydvpy.PolyFit(c, [1, 2], 1)
+    assert [y for x, y in vals] == pytest.approx([12 / 7, 24 / 7])
+
+    # the fit is cached until the curve changes
+    assert pydvpy.PolyFit(c, 2, 1) == [vals[1]]
+    c.y[3] = 4
+    assert pydvpy.PolyFit(c, 2, 1)[0][1] == pytest.approx(87 / 35)
+
+    vals = pydvpy.SplineFit(c, [0, 1, 2, 4], 1, 0)
+    np.testing.assert_allclose([y for x, y in vals], c.y)
+
+
+def test_stats():
+
+    y = np.array([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5])
+    c = pydvpy.makecurve(np.arange(len(y)), y)
+    c.plotname = 'A'
+
+    xs, ys = pydvpy.stats(c, verbose=False)
+    assert xs.length == ys.length == 11
+    assert (ys.mode, ys.mode_count) == (5, 3)
+    assert np.isnan(xs.mode) and np.isnan(xs.mode_count)
+    assert (ys.min, ys.median, ys.max, ys.sum) == (1, 4, 9, 44)
+    assert ys.mean == pytest.approx(np.mean(y))
+    assert ys.std == pytest.approx(np.std(y))
+    np.testing.assert_allclose([ys.q25, ys.q50, ys.q75], np.quantile(y, [.25, .5, .75]))
+    assert ys.skew == pytest.approx(scipy.stats.skew(y))
+    assert ys.kurtosis == pytest.approx(scipy.stats.kurtosis(y))
+
+    table = pydvpy.stats_table([c, c.copy()], verbose=False)
+    assert [row[0] for row in table] == ['A', 'A']
+    assert table[1][2] == ys
+
+
+def test_envelopes():
+
+    curves = [pydvpy.makecurve([0, 2], [0, 2]), pydvpy.makecurve([1, 2], [3, 3]), pydvpy.makecurve([0, 1], [1, 2])]
+    for c, plotname in zip(curves, 'ABC'):
+        c.plotname = plotname
+
+    # the curves are interpolated onto the union of their x-values, extrapolating the end values
+    np.testing.assert_array_equal(pydvpy.max_curve(curves).y, [3, 3, 3])
+    np.testing.assert_array_equal(pydvpy.min_curve(curves).y, [0, 1, 2])
+    np.testing.assert_array_equal(pydvpy.average_curve(curves).y, [4 / 3, 2, 7 / 3])
+
+    median = pydvpy.median_curve(curves)
+    assert median.name == 'Median(ABC)'
+    np.testing.assert_array_equal(median.x, [0, 1, 2])
+    np.testing.assert_array_equal(median.y, [1, 2, 2])
+    np.testing.assert_allclose(pydvpy.percentile_curve(curves, 75).y, [2, 2.5, 2.5])
+
+
+def test_difftable():
+
+    baseline = [pydvpy.makecurve([0, 1, 2], [1, 2, 3], name='a'), pydvpy.makecurve([0, 1, 2], [1, 1, 1], name='b'),
+                pydvpy.makecurve([0, 1], [0, 0], name='only baseline')]
+    current = [pydvpy.makecurve([0, 1, 2], [1, 1, 1], name='b'), pydvpy.makecurve([0, 1, 2], [1, 2, 4], name='a')]
+
+    table = pydvpy.DiffTable(baseline, current, 'AbsDiff', abs_tol=0.5)
+    assert [(row.name, row.failed) for row in table] == [('a', True), ('b', False)]
+    assert table[0].avgDiff == {'Abs': pytest.approx(1 / 3)}
+    assert table[0].maxDiff == {'Abs': 1}
+    assert table[0].curves is None
+
+    # the full results match the single pair function
+    table = pydvpy.DiffTable(baseline, current, 'AbsOrRelDiff', abs_tol=2, rel_tol=0.1, curves=True)
+    results = pydvpy.AbsOrRelDiff(baseline[0], current[1], abs_tol=2, rel_tol=0.1)
+    assert table[0].failed is results[-1] is True
+    assert len(table[0].curves) == len(results)
+    for i in (2, 7):
+        np.testing.assert_array_equal(table[0].curves[i].y, results[i].y)
+
+
+def test_overlap_interp():
+
+    a = pydvpy.makecurve([0, 1, 2, 3], [0, 1, 2, 3], name='a')
+    b = pydvpy.makecurve([1.5, 2, 4], [1, 1, 1], name='b')
+
+    # points of each curve inside the other's domain
+    ai, bi = pydvpy.overlap_interp(a, b)
+    np.testing.assert_array_equal(ai.x, [1.5, 2, 3])
+    np.testing.assert_array_equal(ai.y, [1.5, 2, 3])
+    np.testing.assert_array_equal(bi.y, [1, 1, 1])
+
+    ai, bi = pydvpy.overlap_interp(a, b, npts_interp=4)
+    np.testing.assert_array_equal(ai.x, [1.5, 2, 2.5, 3])
+
+    # identical grids are used as they are
+    c = pydvpy.makecurve(a.x, [5, 6, 7, 8], name='c')
+    ai, ci = pydvpy.overlap_interp(a, c)
+    np.testing.assert_array_equal(ai.x, a.x)
+    np.testing.assert_array_equal(ci.y, c.y)
+    assert ci.name == 'c overlap_interp'
+
+
+def test_integral():
+
+    c = pydvpy.makecurve([0, 1, 2, 3, 4], [0, 1, 2, 3, 4])
+    c.plotname = 'A'
+
+    # integrate slices the cumulative integral to the points in range
+    nc = pydvpy.integrate(c, 0.5, 3)[0]
+    np.testing.assert_array_equal(nc.x, [1, 2, 3])
+    np.testing.assert_allclose(nc.y, [0, 1.5, 4])
+
+    # the limits are interpolated and limited to the curve's domain
+    assert pydvpy.integral(c, 0.5, 3)[0][1] == pytest.approx(4.375)
+    assert pydvpy.integral(c, -1, 10)[0][1] == pytest.approx(8)
+    assert pydvpy.integral(c)[0][1] == pytest.approx(8)
+
+    # the cumulative integral is recomputed when the curve changes
+    c.y[:] = 1
+    assert pydvpy.integral(c, 0.5, 3)[0][1] == pytest.approx(2.5)
+    np.testing.assert_allclose(pydvpy.integrate(c)[0].y, [0, 1, 2, 3, 4])
+
+
+def test_range_index():
+
+    values = np.array([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5], dtype=float)
+    index = curve.RangeIndex(values, block_size=2)
+
+    for lo in range(len(values)):
+        for hi in range(lo + 1, len(values) + 1):
+            assert index.argmax(lo, hi) == lo + np.argmax(values[lo:hi])
+            assert index.argmin(lo, hi) == lo + np.argmin(values[lo:hi])
+    np.testing.assert_array_equal(index.where_equal(5, 2, 10), [4, 8])
+
+    # NaN propagates like numpy
+    values[6] = np.nan
+    index = curve.RangeIndex(values, block_size=2)
+    assert np.isnan(index.max(0, 8))
+    assert index.min(0, 6) == 1
+
+    # windowed extrema use the curve's index, which is rebuilt after edits
+    c = pydvpy.makecurve([0, 1, 2, 3, 4, 5], [0, 5, 1, 5, 2, 0])
+    assert pydvpy.getymax(c)[1] == [(1, 5), (3, 5)]
+    assert pydvpy.getymax(c, 1.5, 2.5)[1] == [(1.5, 3), (2.5, 3)]
+    assert pydvpy.getymin(c, 0.5, 4)[1] == [(2, 1)]
+    assert pydvpy.getrange(c, 0.5, 4)[0][1:] == (1, 5)
+
+    c.y[3] = 7
+    assert pydvpy.getymax(c, 0.5, 4)[1] == [(3, 7)]
+
+
+def test_resample():
+
+    x = np.array([0, 1, 2, 4], dtype=float)
+    a = pydvpy.makecurve(x, [0, 1, 4, 16], name='a')
+    b = pydvpy.makecurve(x.copy(), [1, 1, 1, 1], name='b')
+    c = pydvpy.makecurve([0, 2], [0, 2], name='c')
+
+    # each curve spans its own domain
+    ra, rb, rc = pydvpy.resample([a, b, c], 5)
+    np.testing.assert_array_equal(ra.x, [0, 1, 2, 3, 4])
+    np.testing.assert_array_equal(ra.y, [0, 1, 4, 10, 16])
+    np.testing.assert_array_equal(rc.x, [0, 0.5, 1, 1.5, 2])
+    assert ra.x is not rb.x
+
+    # curves sharing x-values are resampled together onto a common grid
+    grid = np.array([-1, 0.5, 3, 5])
+    xs, ys = pydvpy.resample([a, b], grid, stacked=True)
+    np.testing.assert_array_equal(xs, grid)
+    np.testing.assert_array_equal(ys, [np.interp(grid, a.x, a.y), [1, 1, 1, 1]])
+
+    for method in ('pchip', 'cubic'):
+        ry = pydvpy.resample(a, x, method=method)[0].y
+        np.testing.assert_allclose(ry, a.y)
+    np.testing.assert_array_equal(pydvpy.resample(a, grid, method='previous')[0].y, [0, 0, 4, 16])
+    np.testing.assert_array_equal(pydvpy.resample(a, grid, method='nearest')[0].y, [0, 0, 4, 16])
+
+    with pytest.raises(ValueError):
+        pydvpy.resample([a, c], 5, stacked=True)
+    with pytest.raises(ValueError):
+        pydvpy.resample(a, 5, method='quadratic')
+
+
+def test_decimate():
+
+    x = np.linspace(0, 1, 10001)
+    y = np.sin(20 * x)
+    y[4321] = 5
+    y[7654] = -5
+
+    # both methods keep the ends and the spikes that a stride drops
+    for method in ('lttb', 'minmax'):
+        c = pydvpy.makecurve(x, y)
+        pydvpy.decimate(c, 100, method)
+        assert len(c.x) <= 100
+        assert c.x[0] == 0 and c.x[-1] == 1
+        assert np.all(np.diff(c.x) > 0)
+        assert 5 in c.y and -5 in c.y
+
+    # minmax keeps the extrema of each bucket, the first one on ties
+    c = pydvpy.makecurve(np.arange(10), [0, 3, 1, 3, 2, -1, 2, 0, -1, 4])
+    pydvpy.decimate(c, 6, 'minmax')
+    np.testing.assert_array_equal(c.x, [0, 1, 2, 5, 6, 9])
+
+    # short curves are left alone
+    c = pydvpy.makecurve([0, 1, 2], [0, 1, 0])
+    pydvpy.decimate(c, 10)
+    np.testing.assert_array_equal(c.y, [0, 1, 0])
+
+    with pytest.raises(ValueError):
+        pydvpy.decimate(c, 10, 'stride')
+
+
+def test_lazy():
+
+    x = np.linspace(1, 2, 100001)
+    a = pydvpy.makecurve(x, x)
+    b = pydvpy.makecurve(x, x)
+
+    def chain(c):
+        pydvpy.log(c)
+        pydvpy.my(c, 2)
+        pydvpy.dx(c, 1)
+        pydvpy.powa(c, 3)
+        pydvpy.sqrx(c)
+
+    chain(a)
+    previous = pydvpy.set_lazy(True)
+    try:
+        chain(b)
+        # nothing is computed until the values are read
+        assert len(b._pending_x) == 2 and len(b._pending_y) == 3
+        np.testing.assert_array_equal(b._y, x)
+    finally:
+        pydvpy.set_lazy(previous)
+
+    np.testing.assert_allclose(b.y, a.y, rtol=1e-15)
+    np.testing.assert_allclose(b.x, a.x, rtol=1e-15)
+    assert b._pending_y == ()
+    assert b.name == a.name
+
+    # assigning the values discards the recorded operations
+    pydvpy.set_lazy(True)
+    try:
+        pydvpy.sqr(b)
+        b.y = [1, 2]
+    finally:
+        pydvpy.set_lazy(previous)
+    np.testing.assert_array_equal(b.y, [1, 2])
+
+
+def test_result_cache():
+
+    a = pydvpy.makecurve([0, 1, 2, 3], [0, 1, 4, 9], name='a')
+    b = pydvpy.makecurve([0, 1, 2, 3], [1, 1, 1, 1], name='b')
+
+    # the data version changes with every edit and is never shared
+    version = a.version
+    assert a.version == version and b.version != version
+    a.y[0] = 0
+    assert a.version > version
+
+    pydvpy.cache_clear()
+    d1 = pydvpy.derivative(a)
+    d2 = pydvpy.derivative(a)
+    assert pydvpy.cache_info().hits == 1
+    np.testing.assert_array_equal(d1.y, d2.y)
+
+    # results handed out are copies
+    d2.y[:] = 0
+    np.testing.assert_array_equal(pydvpy.derivative(a).y, d1.y)
+
+    # edits invalidate, parameters are part of the key
+    a.y *= 2
+    np.testing.assert_array_equal(pydvpy.derivative(a).y, 2 * d1.y)
+    pydvpy.derivative(a, 2)
+    pydvpy.diffMeasure(a, b)
+    pydvpy.diffMeasure(a, b)
+    info = pydvpy.cache_info()
+    assert (info.hits, info.misses) == (3, 5)
+
+    # the least recently used results are dropped to stay within the budget
+    budget = info.budget
+    try:
+        pydvpy.cache_budget(0)
+        assert pydvpy.cache_info().entries == 0
+        pydvpy.derivative(a)
+        assert pydvpy.cache_info().entries == 0
+    finally:
+        pydvpy.cache_budget(budget)
+        pydvpy.cache_clear()
+
+
+def test_binstats():
+
+    rng = np.random.default_rng(7)
+    x = rng.random(10001) * 10
+    y = rng.normal(size=x.size)
+    y[3] = np.nan
+    c = pydvpy.makecurve(x, y, name='scatter')
+    valid = ~np.isnan(y)
+
+    # chunked reductions match the statistics of all the points at once
+    for stat in ('mean', 'min', 'max', 'count', 'std', 'median'):
+        for bins in (20, [0, 1, 2.5, 5, 10]):
+            b = pydvpy.binstats(c, bins, stat, chunk=999)[0]
+            expected = scipy.stats.binned_statistic(x[valid], y[valid], stat,
+                                                    bins=bins if np.ndim(bins) else np.linspace(x.min(), x.max(), 21))
+            centers = (expected.bin_edges[:-1] + expected.bin_edges[1:]) / 2
+            values = expected.statistic
+            if stat != 'count':
+                centers = centers[~np.isnan(values)]
+                values = values[~np.isnan(values)]
+            np.testing.assert_allclose(b.x, centers)
+            np.testing.assert_allclose(b.y, values, rtol=1e-10, atol=1e-12)
+
+    # empty bins are left out, the last bin includes its right edge
+    c = pydvpy.makecurve([0, 1, 1, 4], [1, 2, 4, 8])
+    b = pydvpy.binstats(c, 4)[0]
+    np.testing.assert_array_equal(b.x, [0.5, 1.5, 3.5])
+    np.testing.assert_array_equal(b.y, [1, 3, 8])
+    assert b.name == ' Binned mean nbins=4'
+
+
+def test_correlate():
+
+    rng = np.random.default_rng(3)
+    a = pydvpy.makecurve(np.arange(60.0), rng.random(60), name='a')
+    b = pydvpy.makecurve(np.arange(10.0, 35.0), rng.random(25), name='b')
+
+    # the methods agree with numpy.correlate for every mode
+    for mode in ('full', 'same', 'valid'):
+        direct = pydvpy.correlate(a, b, mode, 'direct')
+        np.testing.assert_allclose(direct.y, np.correlate(a.y, b.y, mode))
+        np.testing.assert_allclose(pydvpy.correlate(a, b, mode, 'fft').y, direct.y)
+        np.testing.assert_allclose(pydvpy.correlate(a, b, mode).y, direct.y)
+
+        # the lag window keeps the same values
+        window = pydvpy.correlate(a, b, mode, 'direct', maxlag=20)
+        inside = np.abs(direct.x) <= 20
+        np.testing.assert_allclose(window.x, direct.x[inside])
+        np.testing.assert_allclose(window.y, direct.y[inside])
+        np.testing.assert_allclose(pydvpy.correlate(a, b, mode, 'fft', maxlag=20).y, window.y)
+
+    # the x-values are the lags of the first curve relative to the second
+    t = np.linspace(0, 100, 2001)
+    delayed = pydvpy.makecurve(t, np.exp(-(t - 43.5) ** 2))
+    pulse = pydvpy.makecurve(t, np.exp(-(t - 40) ** 2))
+    c = pydvpy.correlate(delayed, pulse, 'full', normalize=True, maxlag=10)
+    assert c.x[np.argmax(c.y)] == pytest.approx(3.5)
+    assert np.max(c.y) == pytest.approx(1, rel=1e-3)
+    assert c.x[0] >= -10 and c.x[-1] <= 10
+
+
+def test_grid_policy():
+
+    a = pydvpy.makecurve([0, 1, 2, 3, 4], [0, 1, 2, 3, 4], name='a')
+    b = pydvpy.makecurve([0.5, 2.5, 4.5], [1, 1, 1], name='b')
+    c = pydvpy.makecurve(np.linspace(1, 3, 9), np.ones(9), name='c')
+
+    np.testing.assert_array_equal(curve.math_grid(a.x, b.x, 'union'), [0, 0.5, 1, 2, 2.5, 3, 4, 4.5])
+    np.testing.assert_array_equal(curve.math_grid(a.x, b.x, 'left'), a.x)
+    np.testing.assert_array_equal(curve.math_grid(b.x, c.x, 'finest'), c.x)
+    np.testing.assert_array_equal(curve.math_grid(b.x, c.x, 'coarsest'), b.x)
+    np.testing.assert_array_equal(curve.math_grid(a.x, b.x, 5), np.linspace(0.5, 4, 5))
+    with pytest.raises(ValueError):
+        pydvpy.set_grid('densest')
+
+    # the call level policy does not change the session's policy
+    s = pydvpy.add([a, b, c], grid='left')
+    np.testing.assert_array_equal(s.x, a.x)
+    np.testing.assert_allclose(s.y, [2, 3, 4, 5, 6])
+    assert len(pydvpy.add([a, b, c]).x) == 13
+
+    # the operators, expressions and the math functions share the session's policy
+    previous = pydvpy.set_grid(3)
+    try:
+        assert previous == 'union' and pydvpy.set_grid() == 3
+        d = a + b * c
+        e = curve.compile_expression('a + b * c').evaluate({'a': a, 'b': b, 'c': c})
+        np.testing.assert_array_equal(d.x, e.x)
+        np.testing.assert_allclose(d.y, e.y)
+        np.testing.assert_array_equal(d.x, [1, 2, 3])
+        assert len(pydvpy.multiply([a, b, c]).x) == 3
+    finally:
+        pydvpy.set_grid(previous)
+
+
+def test_rolling():
+
+    rng = np.random.default_rng(7)
+    y = rng.normal(size=60)
+    y[20] = np.nan
+    a = pydvpy.makecurve(np.cumsum(rng.random(60)), y, name='a')
+    b = pydvpy.makecurve(np.arange(25.0), rng.normal(size=25), name='b')
+
+    stats = {'mean': np.mean, 'sum': np.sum, 'std': np.std, 'min': np.min, 'max': np.max,
+             'median': np.median, 'quantile': lambda v: np.quantile(v, 0.3)}
+    for by, window in (('samples', 7), ('samples', 4), ('samples', 1), ('x', 3.3), ('x', 0)):
+        for stat, func in stats.items():
+            rolled = pydvpy.rolling([a, b], window, stat, by, q=0.3)
+            for c, r in zip([a, b], rolled):
+                expected = list()
+                for k in range(len(c.x)):
+                    if by == 'samples':
+                        first = max(k - window + 1, 0)
+                    else:
+                        first = min(np.searchsorted(c.x, c.x[k] - window, side='right'), k)
+                    expected.append(func(c.y[first:k + 1]))
+                np.testing.assert_array_equal(r.x, c.x)
+                np.testing.assert_allclose(r.y, expected, atol=1e-6, err_msg=f"{stat} {by} {window}")
+
+    assert rolled[1].name == 'b Rolling quantile q=0.3 window=0'
+
+    # the standard deviation holds up far from zero and across a step
+    y = np.where(np.arange(400) < 200, 0, 1e6) + 1e-3 * rng.normal(size=400)
+    r = pydvpy.rolling(pydvpy.makecurve(np.arange(400), y), 20, 'std')[0]
+    np.testing.assert_allclose(r.y[220:], [np.std(y[k - 19:k + 1]) for k in range(220, 400)], rtol=1e-6)
+    with pytest.raises(ValueError):
+        pydvpy.rolling(pydvpy.makecurve([2, 1, 3], [1, 1, 1]), 1.0, by='x')